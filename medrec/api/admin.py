@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ImageUpload, Medicine
+from .models import ActiveIngredient, ImageUpload, Medicine, Region
 
 
 @admin.register(Medicine)
@@ -23,11 +23,18 @@ class MedicineAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        # Saving only the edited fields lets a price edit skip the reindex
+        if change:
+            obj.save(update_fields=[*form.changed_data, 'updated_at'])
+        else:
+            super().save_model(request, obj, form, change)
+
 
 @admin.register(ImageUpload)
 class ImageUploadAdmin(admin.ModelAdmin):
-    list_display = ('id', 'uploaded_by', 'detected_medicine', 'confidence', 'created_at', 'get_result_preview')
-    list_filter = ('created_at', 'uploaded_by', 'detected_medicine')
+    list_display = ('id', 'uploaded_by', 'detected_medicine', 'confidence', 'status', 'created_at', 'get_result_preview')
+    list_filter = ('status', 'created_at', 'uploaded_by', 'detected_medicine')
     search_fields = ('uploaded_by__username', 'detected_medicine__name_ar', 'detected_medicine__code', 'result')
     readonly_fields = ('created_at', 'image_preview')
     
@@ -43,3 +50,16 @@ class ImageUploadAdmin(admin.ModelAdmin):
             return format_html('<img src="{}" style="max-height: 300px;"/>', obj.image.url)
         return '-'
     image_preview.short_description = 'Image Preview'
+
+
+@admin.register(ActiveIngredient)
+class ActiveIngredientAdmin(admin.ModelAdmin):
+    list_display = ('name', 'normalized_name')
+    search_fields = ('name', 'normalized_name')
+
+
+@admin.register(Region)
+class RegionAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name_ar', 'name_en')
+    search_fields = ('code', 'name_ar', 'name_en', 'aliases')
+    filter_horizontal = ('members',)
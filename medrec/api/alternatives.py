@@ -0,0 +1,278 @@
+import re
+from collections import defaultdict
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from core.text import tokenize
+
+from .strengths import strength_key
+
+# Edge score components; an edge that matches everything scores 1.0
+SAME_INGREDIENTS_SCORE = 0.5
+SAME_STRENGTH_SCORE = 0.2
+LISTED_SCORE = 0.3
+
+# Outgoing edges kept per medicine by a rebuild
+MAX_ALTERNATIVES = 50
+
+# Medicines mentioning a saved medicine's brand whose alternatives text is
+# checked by one refresh; bounds the cost of saving a common brand. Missed
+# edges are restored by the next rebuild_alternatives.
+MAX_LISTING_CANDIDATES = 1000
+
+# Edge reasons (MedicineAlternative.reason)
+INGREDIENTS = 'ingredients'
+LISTED = 'listed'
+BOTH = 'both'
+
+_LISTED_SPLIT_RE = re.compile(r'\s*[,،;/+\n]\s*')
+
+
+def _listed_names(text):
+    """Normalized brand names from a free-text alternatives field"""
+    names = (' '.join(tokenize(part)) for part in _LISTED_SPLIT_RE.split(text or ''))
+    return [name for name in names if name]
+
+
+def _signatures(pks):
+    """Map active medicine pk -> (ingredient id set, (ingredient id, strength) set).
+
+    Strengths are compared in canonical units, so "1g" matches "1000mg",
+    or as text when they could not be parsed.
+    """
+    from .models import MedicineIngredient
+
+    ingredients, strengths = defaultdict(set), defaultdict(set)
+    links = MedicineIngredient.objects.filter(medicine_id__in=pks, medicine__is_active=True).values_list(
+        'medicine_id', 'ingredient_id', 'strength_value', 'strength_unit', 'strength',
+    )
+    for medicine_id, ingredient_id, value, unit, strength in links.iterator():
+        ingredients[medicine_id].add(ingredient_id)
+        strengths[medicine_id].add((ingredient_id, strength_key(value, unit, strength)))
+    return {pk: (frozenset(ingredients[pk]), frozenset(strengths[pk])) for pk in ingredients}
+
+
+def _same_ingredient_peers(signatures):
+    """Active medicines whose ingredient set equals one of the given signatures"""
+    from .models import Medicine, MedicineIngredient
+
+    ingredient_ids = set().union(*(ids for ids, _ in signatures.values())) if signatures else set()
+    if not ingredient_ids:
+        return {}
+    # Only medicines made of nothing but these ingredients can match, so
+    # combination products sharing one common ingredient are never loaded
+    candidates = Medicine.objects.filter(
+        is_active=True,
+        pk__in=MedicineIngredient.objects.filter(ingredient_id__in=ingredient_ids).values('medicine_id'),
+    ).annotate(
+        total=Count('ingredient_links'),
+        matched=Count('ingredient_links', filter=Q(ingredient_links__ingredient_id__in=ingredient_ids)),
+    ).filter(total=F('matched')).values('pk')
+    wanted = {ids for ids, _ in signatures.values()}
+    return {pk: sig for pk, sig in _signatures(candidates).items() if sig[0] in wanted}
+
+
+def _resolve_listed(texts):
+    """Map source pk -> pks of active medicines named in its alternatives text.
+
+    A listed name matches a medicine's full English or Arabic name, or, for
+    single-word names, the first word of it ("Panadol" -> "Panadol Advance").
+    Candidates are found through the search token index.
+    """
+    from .models import Medicine, MedicineSearchToken
+
+    listed = {pk: _listed_names(text) for pk, text in texts.items()}
+    brands = {name.split()[0] for names in listed.values() for name in names}
+    if not brands:
+        return {}
+
+    full_names, first_words = defaultdict(set), defaultdict(set)
+    candidates = Medicine.objects.filter(
+        is_active=True,
+        pk__in=MedicineSearchToken.objects.filter(term__in=brands).values('medicine_id'),
+    ).values_list('pk', 'name_en', 'name_ar')
+    for pk, *names in candidates.iterator():
+        for name in names:
+            words = tokenize(name)
+            if words:
+                full_names[' '.join(words)].add(pk)
+                first_words[words[0]].add(pk)
+
+    resolved = {}
+    for pk, names in listed.items():
+        targets = set()
+        for name in names:
+            matches = full_names.get(name)
+            if not matches and ' ' not in name:
+                matches = first_words.get(name)
+            targets |= matches or set()
+        targets.discard(pk)
+        if targets:
+            resolved[pk] = targets
+    return resolved
+
+
+def compute_alternatives(sources, targets=None, limit=MAX_ALTERNATIVES):
+    """Build unsaved MedicineAlternative edges from the given source pks.
+
+    With targets, only edges pointing at those pks are produced (used for
+    incremental refreshes); otherwise each source keeps its `limit`
+    best-scoring edges.
+    """
+    from .models import Medicine, MedicineAlternative
+
+    sources = set(sources)
+    signatures = _signatures(sources)
+    if targets is None:
+        peer_signatures = _same_ingredient_peers(signatures)
+    else:
+        peer_signatures = _signatures(targets)
+    wanted = {ids for ids, _ in signatures.values()}
+    peers = defaultdict(list)
+    for pk, sig in peer_signatures.items():
+        if sig[0] in wanted:
+            peers[sig[0]].append((pk, sig[1]))
+
+    texts = dict(Medicine.objects.filter(pk__in=sources, is_active=True).values_list('pk', 'alternatives'))
+    listed = _resolve_listed(texts)
+
+    edges = []
+    for source in texts:
+        components = {}
+        if source in signatures:
+            ingredient_ids, strengths = signatures[source]
+            for target, target_strengths in peers[ingredient_ids]:
+                if target != source:
+                    components[target] = [True, target_strengths == strengths, False]
+        for target in listed.get(source, ()):
+            if targets is None or target in targets:
+                components.setdefault(target, [False, False, False])[2] = True
+
+        scored = []
+        for target, (same_ingredients, same_strength, is_listed) in components.items():
+            score = (
+                SAME_INGREDIENTS_SCORE * same_ingredients
+                + SAME_STRENGTH_SCORE * same_strength
+                + LISTED_SCORE * is_listed
+            )
+            if same_ingredients and is_listed:
+                reason = BOTH
+            elif same_ingredients:
+                reason = INGREDIENTS
+            else:
+                reason = LISTED
+            scored.append((score, target, reason))
+        scored.sort(key=lambda edge: (-edge[0], edge[1]))
+        if targets is None:
+            scored = scored[:limit]
+        edges.extend(
+            MedicineAlternative(
+                source_id=source, target_id=target, score=round(score, 4), reason=reason,
+                same_strength=components[target][1],
+            )
+            for score, target, reason in scored
+        )
+    return edges
+
+
+def _listing_sources(pks):
+    """Active medicines whose alternatives text names one of pks.
+
+    Looks at no more than MAX_LISTING_CANDIDATES medicines containing a
+    brand word of pks.
+    """
+    from .models import Medicine, MedicineSearchToken
+
+    full_names, first_words = set(), set()
+    for names in Medicine.objects.filter(pk__in=pks).values_list('name_en', 'name_ar'):
+        for words in map(tokenize, names):
+            if words:
+                full_names.add(' '.join(words))
+                first_words.add(words[0])
+    if not first_words:
+        return set()
+
+    candidates = Medicine.objects.filter(
+        is_active=True,
+        pk__in=MedicineSearchToken.objects.filter(term__in=first_words).values('medicine_id'),
+    ).exclude(alternatives='').order_by('pk').values_list('pk', 'alternatives')
+    return {
+        pk
+        for pk, text in candidates[:MAX_LISTING_CANDIDATES]
+        if any(name in full_names or name in first_words for name in _listed_names(text))
+    }
+
+
+def _rank(edge):
+    return (-edge.score, edge.target_id)
+
+
+def _keep_top(edges, limit=MAX_ALTERNATIVES):
+    """Fit new incoming edges into their sources' best `limit`, as a rebuild
+    ranks them; returns (edges to create, pks of existing edges to delete)"""
+    from .models import MedicineAlternative
+
+    new = defaultdict(list)
+    for edge in edges:
+        new[edge.source_id].append(edge)
+    if not new:
+        return [], []
+
+    # Only existing edges ranked below this can be pushed out
+    safe = limit - max(len(source_edges) for source_edges in new.values())
+    tails = defaultdict(list)
+    ranked = MedicineAlternative.objects.filter(source_id__in=list(new)).annotate(
+        rank=Window(RowNumber(), partition_by=F('source_id'), order_by=[F('score').desc(), F('target_id').asc()]),
+    ).filter(rank__gt=safe).only('pk', 'source_id', 'target_id', 'score')
+    for edge in ranked:
+        tails[edge.source_id].append(edge)
+
+    created, evicted = [], []
+    for source, source_edges in new.items():
+        tail = tails.get(source, [])
+        # Edges ranked up to safe stay, leaving the rest of the slots
+        kept = sorted(tail + source_edges, key=_rank)[:limit - max(safe, 0) if tail else limit]
+        kept_ids = {id(edge) for edge in kept}
+        created.extend(edge for edge in source_edges if id(edge) in kept_ids)
+        evicted.extend(edge.pk for edge in tail if id(edge) not in kept_ids)
+    return created, evicted
+
+
+def refresh_alternatives(pks, batch_size=1000):
+    """Recompute the edges from and to the given medicines"""
+    from .models import MedicineAlternative
+
+    pks = set(pks)
+    if not pks:
+        return
+
+    # Sources that may point at pks: current neighbours, medicines with the
+    # same ingredient set, and medicines whose alternatives mention them
+    neighbours = set(
+        MedicineAlternative.objects.filter(target_id__in=pks).values_list('source_id', flat=True)
+    )
+    neighbours |= set(_same_ingredient_peers(_signatures(pks)))
+    neighbours |= _listing_sources(pks)
+    neighbours -= pks
+
+    MedicineAlternative.objects.filter(source_id__in=pks).delete()
+    MedicineAlternative.objects.filter(target_id__in=pks).delete()
+    MedicineAlternative.objects.bulk_create(compute_alternatives(pks), batch_size=batch_size)
+    created, evicted = _keep_top(compute_alternatives(neighbours, targets=pks))
+    MedicineAlternative.objects.filter(pk__in=evicted).delete()
+    MedicineAlternative.objects.bulk_create(created, batch_size=batch_size)
+
+
+def rebuild_alternatives(chunk_size=1000, batch_size=1000):
+    """Rebuild the whole alternatives table; returns the number of edges"""
+    from .models import Medicine, MedicineAlternative
+
+    MedicineAlternative.objects.all().delete()
+    pks = list(Medicine.objects.filter(is_active=True).values_list('pk', flat=True))
+    total = 0
+    for start in range(0, len(pks), chunk_size):
+        edges = compute_alternatives(pks[start:start + chunk_size])
+        MedicineAlternative.objects.bulk_create(edges, batch_size=batch_size)
+        total += len(edges)
+    return total
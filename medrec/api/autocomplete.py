@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connection
+
+from core.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the catalog version, so saves made by other
+# worker processes are picked up without a query on every keystroke
+DEFAULT_CHECK_INTERVAL = 5
+
+
+class AutocompleteIndex:
+    """Per-process sorted array of normalized medicine codes and names.
+
+    Lookups are a binary search plus a short scan, with no database access.
+    The array is built on first use. Afterwards the catalog version (see
+    api.catalog) is checked at most every AUTOCOMPLETE_CHECK_INTERVAL
+    seconds, or on the next lookup after invalidate(); when it has changed
+    a background thread rebuilds the array while lookups keep using the
+    old one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = ([], [])
+        # Catalog version the array was built from; None until first built
+        self._version = None
+        self._checked_at = None
+        self._rebuilding = False
+
+    def invalidate(self):
+        """Check the catalog version on the next lookup"""
+        self._checked_at = None
+
+    def build(self):
+        from .catalog import get_catalog_version
+        from .models import Medicine
+
+        # Read first: a change made while building shows up as a newer
+        # version at the next check
+        version = get_catalog_version()[0]
+        entries = []
+        pairs = []
+        rows = Medicine.objects.filter(is_active=True).values_list('id', 'code', 'name_ar', 'name_en')
+        for row in rows.iterator():
+            position = len(entries)
+            entries.append({'id': row[0], 'code': row[1], 'name_ar': row[2], 'name_en': row[3]})
+            for key in {normalize_text(value).strip() for value in row[1:]}:
+                if key:
+                    pairs.append((key, position))
+        pairs.sort()
+        # Swapped in as one tuple so concurrent readers never see a mix
+        self._index = ([key for key, _ in pairs], [entries[pos] for _, pos in pairs])
+        self._version = version
+
+    def _rebuild(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception('Rebuilding the autocomplete index failed')
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+    def refresh(self):
+        """Build the array if there is none yet, otherwise start a background
+        rebuild when the catalog version has changed"""
+        from .catalog import get_catalog_version
+
+        if self._version is None:
+            with self._lock:
+                if self._version is None:
+                    self.build()
+                    self._checked_at = time.monotonic()
+            return
+
+        now = time.monotonic()
+        interval = getattr(settings, 'AUTOCOMPLETE_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+        if self._checked_at is not None and now - self._checked_at < interval:
+            return
+        self._checked_at = now
+        if get_catalog_version()[0] == self._version:
+            return
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild, name='autocomplete-rebuild', daemon=True).start()
+
+    def complete(self, prefix, limit=10):
+        """Return up to limit medicines whose code or name starts with prefix"""
+        self.refresh()
+
+        prefix = normalize_text(prefix).strip()
+        if not prefix:
+            return []
+        keys, entries = self._index
+        results = []
+        seen = set()
+        for position in range(bisect_left(keys, prefix), len(keys)):
+            if not keys[position].startswith(prefix):
+                break
+            entry = entries[position]
+            if entry['id'] not in seen:
+                seen.add(entry['id'])
+                results.append(entry)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+autocomplete_index = AutocompleteIndex()
@@ -0,0 +1,23 @@
+from .models import Counter
+
+CATALOG_VERSION = 'catalog_version'
+
+
+def get_catalog_version():
+    """Return (version, last modified datetime) of the medicine catalog.
+
+    The version increases on every Medicine save, delete and import, so it
+    can key caches and conditional responses for anything derived from the
+    catalog. Last modified is None until the first change.
+    """
+    counter = Counter.objects.filter(name=CATALOG_VERSION).values_list('value', 'updated_at').first()
+    return counter if counter else (0, None)
+
+
+def bump_catalog_version():
+    """Mark the catalog as changed.
+
+    Receivers call this for model saves and deletes; code that changes
+    medicines with queryset.update() or bulk_create() must call it itself.
+    """
+    Counter.increment(CATALOG_VERSION)
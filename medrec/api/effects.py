@@ -0,0 +1,170 @@
+from functools import reduce
+from operator import and_, or_
+
+from django.db.models import Q
+
+from core.text import tokenize
+
+# Fields covered by the effect index; also the MedicineEffectTerm.source values
+EFFECT_SOURCES = ('side_effects', 'warnings')
+
+MAX_TERM_LENGTH = 100
+
+# Words that carry no meaning on their own in side-effect and warning text
+STOPWORDS = {
+    'في', 'من', 'علي', 'عن', 'مع', 'او', 'و', 'الى', 'عند', 'بعد', 'قبل', 'اذا', 'كان',
+    'a', 'an', 'and', 'or', 'of', 'in', 'on', 'to', 'the', 'with', 'may', 'if',
+}
+
+# Not indexed either, but a query containing one is rejected: dropping it
+# would turn "no drowsiness" into "drowsiness". Exclusions go in none_of.
+NEGATIONS = {
+    'لا', 'ولا', 'بدون', 'بلا', 'دون',
+    'no', 'not', 'non', 'never', 'without', 'don', 'doesn',
+}
+
+# Words meaning the same thing, first one canonical. Entries are stemmed with
+# light_stem() when the table is built, so any inflection can be listed.
+SYNONYMS = (
+    ('dizziness', 'dizzy', 'vertigo', 'دوخه', 'دوار', 'دوخان'),
+    ('drowsiness', 'drowsy', 'sleepiness', 'somnolence', 'نعاس', 'خمول'),
+    ('nausea', 'غثيان'),
+    ('vomiting', 'vomit', 'قيء', 'استفراغ', 'ترجيع'),
+    ('headache', 'صداع'),
+    ('rash', 'طفح'),
+    ('diarrhea', 'diarrhoea', 'اسهال'),
+    ('constipation', 'امساك'),
+    ('insomnia', 'ارق'),
+    ('allergy', 'allergic', 'حساسيه'),
+    ('liver', 'hepatic', 'كبد'),
+    ('kidney', 'renal', 'كلي', 'كلوي'),
+    ('stomach', 'gastric', 'معده', 'معدي'),
+    ('pregnancy', 'pregnant', 'حمل', 'حامل', 'حوامل'),
+    ('bleeding', 'نزيف'),
+    ('asthma', 'ربو'),
+    ('alcohol', 'كحول', 'كحوليه'),
+    ('driving', 'قياده'),
+)
+
+_ARABIC_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+_ARABIC_SUFFIXES = ('ات', 'ون', 'ين', 'ان', 'يه', 'ها', 'ه', 'ي')
+
+
+def _is_arabic(word):
+    return any('\u0600' <= ch <= '\u06ff' for ch in word)
+
+
+def light_stem(word):
+    """Strip common Arabic clitics and endings, or a Latin plural "s".
+
+    Only one prefix and one suffix are removed and at least three letters
+    are kept, which is enough to match "بالكبد" with "الكبد" and "كبد".
+    """
+    if _is_arabic(word):
+        for prefix in _ARABIC_PREFIXES:
+            if word.startswith(prefix) and len(word) - len(prefix) >= 3:
+                word = word[len(prefix):]
+                break
+        else:
+            if word.startswith('و') and len(word) >= 4:
+                word = word[1:]
+        for suffix in _ARABIC_SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                return word[:-len(suffix)]
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith('s') and not word.endswith('ss') and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+_CANONICAL = {
+    light_stem(' '.join(tokenize(word))): light_stem(' '.join(tokenize(group[0])))
+    for group in SYNONYMS
+    for word in group
+}
+
+
+def effect_terms(text):
+    """Index terms for a piece of side-effect or warning text, in order"""
+    terms = []
+    for word in tokenize(text):
+        if word in STOPWORDS or word in NEGATIONS or len(word) < 2 or word.isdigit():
+            continue
+        stem = light_stem(word)
+        terms.append(_CANONICAL.get(stem, stem)[:MAX_TERM_LENGTH])
+    return terms
+
+
+def index_effects(medicines, batch_size=1000):
+    """Rebuild the side-effect/warning terms of the given medicines in bulk"""
+    from .models import MedicineEffectTerm
+
+    medicines = list(medicines)
+    MedicineEffectTerm.objects.filter(medicine_id__in=[m.pk for m in medicines]).delete()
+    MedicineEffectTerm.objects.bulk_create(
+        [
+            MedicineEffectTerm(term=term, medicine_id=medicine.pk, source=source)
+            for medicine in medicines
+            for source in EFFECT_SOURCES
+            for term in set(effect_terms(getattr(medicine, source, '') or ''))
+        ],
+        batch_size=batch_size,
+    )
+
+
+def parse_effect(expression):
+    """Split "warnings:liver" into ('warnings', terms); no prefix searches both.
+
+    Raises ValueError for negated expressions such as "no drowsiness".
+    """
+    negations = NEGATIONS.intersection(tokenize(expression))
+    if negations:
+        raise ValueError(
+            f'Negations ({", ".join(sorted(negations))}) are not supported in effect queries; '
+            f'list effects to exclude in ?none= of medicines/effects/'
+        )
+    source, _, text = expression.partition(':')
+    if text and source.strip() in EFFECT_SOURCES:
+        return source.strip(), effect_terms(text)
+    return None, effect_terms(expression)
+
+
+def effect_condition(expression):
+    """Q matching medicines mentioning every word of expression, or None if
+    it has no searchable words."""
+    from .models import MedicineEffectTerm
+
+    source, terms = parse_effect(expression)
+    if not terms:
+        return None
+    conditions = []
+    for term in set(terms):
+        postings = MedicineEffectTerm.objects.filter(term=term)
+        if source:
+            postings = postings.filter(source=source)
+        conditions.append(Q(pk__in=postings.values('medicine_id')))
+    return reduce(and_, conditions)
+
+
+def filter_by_effects(queryset, all_of=(), any_of=(), none_of=()):
+    """Combine effect expressions: every one of all_of, at least one of
+    any_of and none of none_of. Expressions without searchable words in
+    all_of or any_of match nothing; in none_of they are ignored. Raises
+    ValueError for negated expressions, see parse_effect()."""
+    for expression in all_of:
+        condition = effect_condition(expression)
+        if condition is None:
+            return queryset.none()
+        queryset = queryset.filter(condition)
+    if any_of:
+        conditions = [c for c in map(effect_condition, any_of) if c is not None]
+        if not conditions:
+            return queryset.none()
+        queryset = queryset.filter(reduce(or_, conditions))
+    for expression in none_of:
+        condition = effect_condition(expression)
+        if condition is not None:
+            queryset = queryset.exclude(condition)
+    return queryset
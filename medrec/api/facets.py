@@ -0,0 +1,96 @@
+from django.db.models import Case, Count, IntegerField, Min, Q, Value, When
+
+from .regions import matching_regions, region_table
+
+# (label, lower bound inclusive, upper bound exclusive); None is unbounded
+PRICE_BANDS = (
+    ('0-25', 0, 25),
+    ('25-50', 25, 50),
+    ('50-100', 50, 100),
+    ('100-200', 100, 200),
+    ('200+', 200, None),
+)
+
+
+def _price_band(low, high):
+    condition = Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def _add(buckets, key, count, value):
+    """Add a group to the facet bucket of key, keeping its smallest spelling"""
+    if not key:
+        return
+    bucket = buckets.setdefault(key, [0, value])
+    bucket[0] += count
+    bucket[1] = min(bucket[1], value)
+
+
+def _label_items(buckets):
+    items = [{'value': value.strip(), 'count': count} for count, value in buckets.values()]
+    items.sort(key=lambda item: (-item['count'], item['value']))
+    return items
+
+
+def compute_facets(queryset):
+    """Counts per category, manufacturer, region and price band.
+
+    One grouped query: medicines are grouped by normalized category,
+    normalized manufacturer (as the filters match them) and price band,
+    and each group also counts its medicines per region the way
+    ``?region=`` filters them (see api.regions.matching_regions). Every
+    facet is a sum over the groups; a label is shown under one of its
+    spellings.
+    """
+    table = region_table()
+    members = table.members
+    codes = sorted(members)
+    band = Case(
+        *[When(_price_band(low, high), then=Value(index)) for index, (_, low, high) in enumerate(PRICE_BANDS)],
+        default=Value(None), output_field=IntegerField(),
+    )
+    regions = {
+        f'region_{index}': Count(
+            'pk', filter=Q(region_links__region__code__in=matching_regions(code, members)), distinct=True,
+        )
+        for index, code in enumerate(codes)
+    }
+    rows = (
+        queryset.order_by().annotate(price_band=band)
+        .values('category_norm', 'manufacturer_norm', 'price_band')
+        .annotate(
+            count=Count('pk', distinct=True), category=Min('category'), manufacturer=Min('manufacturer'), **regions,
+        )
+    )
+
+    total = 0
+    categories, manufacturers = {}, {}
+    bands = [0] * len(PRICE_BANDS)
+    region_counts = [0] * len(codes)
+    for row in rows:
+        total += row['count']
+        _add(categories, row['category_norm'], row['count'], row['category'])
+        _add(manufacturers, row['manufacturer_norm'], row['count'], row['manufacturer'])
+        if row['price_band'] is not None:
+            bands[row['price_band']] += row['count']
+        for index in range(len(codes)):
+            region_counts[index] += row[f'region_{index}']
+
+    region = [
+        {'value': code, 'label': table.labels[code], 'count': count}
+        for code, count in zip(codes, region_counts)
+        if count
+    ]
+    region.sort(key=lambda item: (-item['count'], item['value']))
+    return {
+        'total': total,
+        'category': _label_items(categories),
+        'manufacturer': _label_items(manufacturers),
+        'region': region,
+        'price': [
+            {'value': label, 'min': low, 'max': high, 'count': count}
+            for (label, low, high), count in zip(PRICE_BANDS, bands)
+        ],
+    }
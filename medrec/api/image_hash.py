@@ -0,0 +1,98 @@
+from itertools import combinations
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+
+HASH_BITS = 64
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+# Largest distance that can be searched; beyond it a chunk may differ in
+# 3+ bits and the candidate lists stop being small
+MAX_DISTANCE = 11
+
+# Grey levels the shrunk image must span; flatter images (blank, dark or
+# out of focus) all hash to about 0 and would match each other
+MIN_CONTRAST = 8
+
+
+def dhash(image_file):
+    """64-bit difference hash of an image file (path or file object).
+
+    The image is shrunk to 9x8 grey pixels and each bit says whether a
+    pixel is brighter than its right neighbour, so re-compressed, resized
+    or slightly shifted photos of the same box land a few bits apart.
+    Raises ValueError for images too flat to hash (see MIN_CONTRAST).
+    """
+    from PIL import Image
+
+    with Image.open(image_file) as image:
+        # Lets JPEG decode at a fraction of full size
+        image.draft('L', (64, 64))
+        pixels = list(image.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    if max(pixels) - min(pixels) < MIN_CONTRAST:
+        raise ValueError('Image has too little detail to hash')
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            left, right = pixels[row * 9 + column], pixels[row * 9 + column + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def to_signed(value):
+    """Unsigned 64-bit hash -> value that fits a BigIntegerField"""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def to_unsigned(value):
+    return value & ((1 << HASH_BITS) - 1)
+
+
+def hamming(a, b):
+    return bin(to_unsigned(a) ^ to_unsigned(b)).count('1')
+
+
+def hash_chunks(value):
+    """The four 16-bit chunks of a hash, most significant first"""
+    value = to_unsigned(value)
+    return [(value >> (CHUNK_BITS * (CHUNKS - 1 - index))) & CHUNK_MASK for index in range(CHUNKS)]
+
+
+def hash_fields(value):
+    """ImageUpload field values for a hash"""
+    return {
+        'dhash': to_signed(value),
+        **{f'dhash_{index}': chunk for index, chunk in enumerate(hash_chunks(value))},
+    }
+
+
+def _within(chunk, radius):
+    """Chunk values at most radius bits away from chunk"""
+    values = [chunk]
+    for flips in range(1, radius + 1):
+        for bits in combinations(range(CHUNK_BITS), flips):
+            flipped = chunk
+            for bit in bits:
+                flipped ^= 1 << bit
+            values.append(flipped)
+    return values
+
+
+def near_hash_condition(value, distance):
+    """Q matching rows whose dhash may be within distance bits of value.
+
+    Multi-index hashing: when two hashes differ in at most `distance` bits,
+    one of their four chunks differs in at most distance // 4 bits, so
+    looking each chunk up in its own index finds every true neighbour.
+    Candidates still need an exact hamming() check. Raises
+    ImproperlyConfigured for distances above MAX_DISTANCE.
+    """
+    if distance > MAX_DISTANCE:
+        raise ImproperlyConfigured(f'Near-duplicate distance must be at most {MAX_DISTANCE} bits, got {distance}')
+    radius = distance // CHUNKS
+    condition = Q()
+    for index, chunk in enumerate(hash_chunks(value)):
+        condition |= Q(**{f'dhash_{index}__in': _within(chunk, radius)})
+    return condition
@@ -0,0 +1,109 @@
+import re
+
+from core.text import tokenize
+
+from .strengths import parse_strength
+
+# Separators between ingredients: "A, B", "A + B", "A / B", "A & B", "A and B", "A و B"
+_INGREDIENT_SEPARATOR = r'\s*(?:[,+/&;،]|\band\b|\bwith\b|\sو\s)\s*'
+
+# Separators between strengths. "/" is not one: it belongs to "250mg/5ml".
+_STRENGTH_SEPARATOR = r'\s*(?:[,+&;،]|\band\b)\s*'
+
+# A strength written in the text, e.g. "500mg", "1,5 g" or "250mg/5ml"
+_STRENGTH = (
+    r'(?<![\w.,])\d+(?:[.,]\d+)?\s*(?:mg|g|mcg|µg|ml|iu|%|ملجم|مجم|جم|وحدة)(?!\w)'
+    r'(?:\s*/\s*(?:\d+(?:[.,]\d+)?)?\s*(?:ml|g|مل|جم)(?!\w))?'
+)
+
+# Strengths are matched first, so separators inside them never split
+_INGREDIENT_PART_RE = re.compile(rf'({_STRENGTH})|{_INGREDIENT_SEPARATOR}', re.IGNORECASE)
+_STRENGTH_PART_RE = re.compile(rf'({_STRENGTH})|{_STRENGTH_SEPARATOR}', re.IGNORECASE)
+
+MAX_NAME_LENGTH = 200
+
+
+def normalize_ingredient(name):
+    return ' '.join(tokenize(name))[:MAX_NAME_LENGTH]
+
+
+def _split(text, pattern):
+    """Split text on pattern's separators into (text, first strength) parts.
+
+    Strengths are kept whole inside their part and removed from its text.
+    """
+    parts = []
+    words, strengths = [], []
+    position = 0
+    for match in pattern.finditer(text):
+        words.append(text[position:match.start()])
+        position = match.end()
+        if match.group(1):
+            strengths.append(match.group(1))
+            # Keeps "Vitamin 500mg D" two words
+            words.append(' ')
+        else:
+            parts.append((''.join(words), strengths[0] if strengths else ''))
+            words, strengths = [], []
+    words.append(text[position:])
+    parts.append((''.join(words), strengths[0] if strengths else ''))
+    return [(words.strip(), strength) for words, strength in parts if words.strip() or strength]
+
+
+def parse_ingredients(active_ingredients, concentration='', fallback=''):
+    """Split a medicine's ingredient text into (name, normalized name, strength).
+
+    Strengths come from a strength embedded in the entry ("Paracetamol
+    500mg") or, when the counts line up, from the matching position of
+    concentration ("875mg, 125mg"). fallback (the scientific name) is used
+    when active_ingredients is empty. Duplicate ingredients are dropped.
+    """
+    text = active_ingredients or fallback or ''
+    entries = [(name, strength) for name, strength in _split(text, _INGREDIENT_PART_RE) if name]
+    strengths = [strength or rest for rest, strength in _split(concentration or '', _STRENGTH_PART_RE)]
+    if len(strengths) != len(entries):
+        strengths = [''] * len(entries)
+
+    parsed = []
+    seen = set()
+    for (name, embedded), strength in zip(entries, strengths):
+        normalized = normalize_ingredient(name)
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            parsed.append((name[:MAX_NAME_LENGTH], normalized, (strength or embedded).strip()[:100]))
+    return parsed
+
+
+def index_ingredients(medicines, batch_size=1000):
+    """Rebuild the ingredient links of the given medicines in bulk"""
+    from .models import ActiveIngredient, MedicineIngredient
+
+    medicines = list(medicines)
+    parsed = {
+        medicine.pk: parse_ingredients(medicine.active_ingredients, medicine.concentration, medicine.scientific_name)
+        for medicine in medicines
+    }
+    names = {normalized: name for entries in parsed.values() for name, normalized, _ in entries}
+
+    ids = dict(ActiveIngredient.objects.filter(normalized_name__in=names).values_list('normalized_name', 'id'))
+    missing = [ActiveIngredient(name=names[key], normalized_name=key) for key in names if key not in ids]
+    if missing:
+        ActiveIngredient.objects.bulk_create(missing, batch_size=batch_size, ignore_conflicts=True)
+        ids.update(
+            ActiveIngredient.objects.filter(normalized_name__in=[i.normalized_name for i in missing])
+            .values_list('normalized_name', 'id')
+        )
+
+    MedicineIngredient.objects.filter(medicine_id__in=list(parsed)).delete()
+    # bulk_create skips save(), so the parsed strength is filled in here
+    MedicineIngredient.objects.bulk_create(
+        [
+            MedicineIngredient(
+                medicine_id=pk, ingredient_id=ids[normalized], strength=strength, position=position,
+                **dict(zip(('strength_value', 'strength_unit'), parse_strength(strength))),
+            )
+            for pk, entries in parsed.items()
+            for position, (_, normalized, strength) in enumerate(entries)
+        ],
+        batch_size=batch_size,
+    )
@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from .effects import effect_terms
+
+# Extra ways a warning may name an ingredient: Arabic spellings and the
+# drug class it belongs to. Keys are normalized ingredient names (see
+# api/ingredients.py); every ingredient also matches its own name.
+INGREDIENT_ALIASES = {
+    'paracetamol': ('باراسيتامول', 'acetaminophen'),
+    'ibuprofen': ('ايبوبروفين', 'nsaid', 'مضادات الالتهاب'),
+    'diclofenac': ('ديكلوفيناك', 'nsaid', 'مضادات الالتهاب'),
+    'aspirin': ('اسبرين', 'nsaid', 'مضادات الالتهاب'),
+    'amoxicillin': ('اموكسيسيلين', 'penicillin', 'البنسلين'),
+    'ampicillin': ('امبيسيلين', 'penicillin', 'البنسلين'),
+    'clavulanic acid': ('كلافولانيك',),
+    'metformin': ('ميتفورمين',),
+    'metronidazole': ('ميترونيدازول',),
+    'omeprazole': ('اوميبرازول',),
+    'atorvastatin': ('اتورفاستاتين', 'statin'),
+    'furosemide': ('فوروسيميد', 'مدر'),
+    'hydrochlorothiazide': ('هيدروكلوروثيازيد', 'مدر'),
+    'bisoprolol': ('بيسوبرولول', 'beta blocker', 'حاصرات بيتا'),
+    'pseudoephedrine': ('سودوافيدرين', 'decongestant'),
+    'chlorpheniramine': ('كلورفينيرامين', 'antihistamine', 'مضادات الهيستامين'),
+}
+
+
+def ingredient_phrases(normalized_name):
+    """Effect-term phrases (see api/effects.py) that name an ingredient"""
+    phrases = []
+    for text in (normalized_name,) + INGREDIENT_ALIASES.get(normalized_name, ()):
+        terms = tuple(effect_terms(text))
+        if terms and terms not in phrases:
+            phrases.append(terms)
+    return phrases
+
+
+def check_medicines(medicines):
+    """Problems in taking the given medicines together.
+
+    medicines are Medicine instances (pk, code, warnings). Returns
+    ``duplicate_ingredients``, ingredients found in more than one of them
+    with their strengths and, when the units agree, the combined strength;
+    and ``warnings``, warnings of one medicine that name an ingredient of
+    another. Answered with two queries, from the ingredient links and the
+    warning term index, whatever the number of medicines.
+    """
+    from .models import MedicineEffectTerm, MedicineIngredient
+
+    by_pk = {medicine.pk: medicine for medicine in medicines}
+    links = MedicineIngredient.objects.filter(medicine_id__in=by_pk).order_by('medicine_id', 'position').values_list(
+        'medicine_id', 'ingredient_id', 'ingredient__name', 'ingredient__normalized_name',
+        'strength', 'strength_value', 'strength_unit',
+    )
+    holders = defaultdict(list)
+    names = {}
+    for medicine_id, ingredient_id, name, normalized, strength, value, unit in links:
+        holders[ingredient_id].append((medicine_id, strength, value, unit))
+        names[ingredient_id] = (name, normalized)
+
+    duplicates = []
+    for ingredient_id, held in holders.items():
+        if len(held) < 2:
+            continue
+        units = {unit for _, _, value, unit in held if value is not None}
+        combined = None
+        if len(units) == 1 and all(value is not None for _, _, value, _ in held):
+            combined = {'value': round(sum(value for _, _, value, _ in held), 6), 'unit': units.pop()}
+        duplicates.append({
+            'ingredient': names[ingredient_id][0],
+            'medicines': [{'code': by_pk[pk].code, 'strength': strength} for pk, strength, _, _ in held],
+            'combined_strength': combined,
+        })
+
+    phrases = {ingredient_id: ingredient_phrases(normalized) for ingredient_id, (_, normalized) in names.items()}
+    wanted = {term for entries in phrases.values() for phrase in entries for term in phrase}
+    warning_terms = defaultdict(set)
+    if wanted and len(by_pk) > 1:
+        rows = MedicineEffectTerm.objects.filter(
+            medicine_id__in=by_pk, source='warnings', term__in=wanted
+        ).values_list('medicine_id', 'term')
+        for medicine_id, term in rows:
+            warning_terms[medicine_id].add(term)
+
+    warnings = []
+    for medicine in medicines:
+        terms = warning_terms.get(medicine.pk)
+        if not terms:
+            continue
+        for ingredient_id, held in holders.items():
+            others = [by_pk[pk].code for pk, _, _, _ in held if pk != medicine.pk]
+            matched = next((phrase for phrase in phrases[ingredient_id] if terms.issuperset(phrase)), None)
+            if others and matched:
+                warnings.append({
+                    'medicine': medicine.code,
+                    'ingredient': names[ingredient_id][0],
+                    'medicines': others,
+                    'warning': medicine.warnings,
+                })
+
+    return {'duplicate_ingredients': duplicates, 'warnings': warnings}
@@ -0,0 +1,102 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import search
+from api.models import Medicine
+from api.search import fuzzy_search_medicines, index_trigrams
+
+SYLLABLES_EN = (
+    'pa', 'na', 'dol', 'ce', 'ta', 'mol', 'au', 'gmen', 'tin', 'am', 'ox', 'ci', 'lin', 'met', 'for', 'min',
+    'zol', 'pra', 'vi', 'cal', 'ra', 'be', 'lo', 'sar', 'tan', 'fen', 'bru', 'zi', 'thro', 'my', 'cin', 'del',
+)
+SYLLABLES_AR = (
+    'با', 'نا', 'دول', 'سي', 'تا', 'مول', 'او', 'جمن', 'تين', 'ام', 'كس', 'سيل', 'لين', 'ميت', 'فور', 'مين',
+    'زول', 'برا', 'في', 'كال', 'را', 'بي', 'لو', 'سار', 'تان', 'فين', 'برو', 'زي', 'ثرو', 'ماي', 'سين', 'ديل',
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark fuzzy (trigram) medicine search latency and recall on a synthetic catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100000, help='Synthetic medicines')
+        parser.add_argument('--ingredients', type=int, default=300, help='Distinct scientific names')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        size = options['size']
+
+        def word(syllables):
+            return ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+
+        suffixes = ('ine', 'ol', 'ate', 'ide')
+        ingredients = [word(SYLLABLES_EN) + rng.choice(suffixes) for _ in range(options['ingredients'])]
+
+        # Synthetic rows are rolled back, the catalog is left untouched
+        with transaction.atomic():
+            started = time.perf_counter()
+            medicines = Medicine.objects.bulk_create(
+                [
+                    Medicine(
+                        code=f'FUZZ{i:07d}',
+                        name_en=f'{word(SYLLABLES_EN)} {rng.choice(("", "plus", "forte", "extra"))}'.strip(),
+                        name_ar=word(SYLLABLES_AR),
+                        scientific_name=rng.choice(ingredients),
+                        category='مسكنات',
+                    )
+                    for i in range(size)
+                ],
+                batch_size=2000,
+            )
+            for start in range(0, size, 2000):
+                index_trigrams(medicines[start:start + 2000], batch_size=5000)
+            build = time.perf_counter() - started
+            self.stdout.write(f'catalog build: {build:.1f}s for {size} medicines')
+
+            queries = [
+                (medicine.pk, self._typo(rng, medicine.name_en.split()[0]))
+                for medicine in rng.sample(medicines, min(options['queries'], size))
+            ]
+            active = Medicine.objects.filter(is_active=True)
+
+            self.stdout.write(f'{"grams":>10} {"p50":>9} {"p95":>9} {"max":>9} {"recall@20":>10}')
+            # Every trigram of the query, then the rarest ones within the budget
+            budget = search.FUZZY_MAX_POSTINGS
+            for label, limit in (('all', float('inf')), ('rarest', budget)):
+                search.FUZZY_MAX_POSTINGS = limit
+                try:
+                    timings, found = self._run(active, queries)
+                finally:
+                    search.FUZZY_MAX_POSTINGS = budget
+                timings.sort()
+                self.stdout.write(
+                    f'{label:>10} {statistics.median(timings) * 1000:>7.1f}ms '
+                    f'{timings[int(len(timings) * 0.95) - 1] * 1000:>7.1f}ms {timings[-1] * 1000:>7.1f}ms '
+                    f'{found / len(queries):>10.3f}'
+                )
+            transaction.set_rollback(True)
+
+    def _typo(self, rng, name):
+        """name with one character deleted, replaced or swapped"""
+        position = rng.randrange(len(name) - 1)
+        kind = rng.choice(('delete', 'replace', 'swap'))
+        if kind == 'delete':
+            return name[:position] + name[position + 1:]
+        if kind == 'replace':
+            return name[:position] + rng.choice('aeiou') + name[position + 1:]
+        return name[:position] + name[position + 1] + name[position] + name[position + 2:]
+
+    def _run(self, active, queries):
+        timings, found = [], 0
+        for pk, query in queries:
+            started = time.perf_counter()
+            pks = list(fuzzy_search_medicines(active, query).values_list('pk', flat=True))
+            timings.append(time.perf_counter() - started)
+            found += pk in pks
+        return timings, found
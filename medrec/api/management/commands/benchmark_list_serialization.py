@@ -0,0 +1,69 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Medicine
+from api.serializers import MedicineListSerializer, render_values_rows, values_row_plan
+
+
+class Command(BaseCommand):
+    help = 'Compare the .values() list rendering path with MedicineListSerializer on synthetic rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per size; the best time is reported')
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        plan = values_row_plan(MedicineListSerializer())
+        columns = [column for _, column, _ in plan]
+
+        self.stdout.write(f'{"rows":>8} {"serializer":>12} {"values()":>12} {"speedup":>8}')
+        for size in options['sizes']:
+            # Synthetic rows are rolled back, the catalog is left untouched
+            with transaction.atomic():
+                Medicine.objects.bulk_create(
+                    [
+                        Medicine(
+                            code=f'BENCH{i:07d}',
+                            name_ar=f'دواء تجريبي {i}',
+                            name_en=f'Benchmark Medicine {i}',
+                            category='مسكنات',
+                            price=Decimal(i % 500) + Decimal('0.5'),
+                            active_ingredients='Paracetamol, Caffeine',
+                            concentration='500mg, 65mg',
+                            description_ar='وصف طويل ' * 40,
+                            side_effects='غثيان ' * 40,
+                        )
+                        for i in range(size)
+                    ],
+                    batch_size=2000,
+                )
+                queryset = Medicine.objects.filter(code__startswith='BENCH').order_by('pk')
+
+                def serializer_path():
+                    return renderer.render(MedicineListSerializer(queryset.all(), many=True).data)
+
+                def values_path():
+                    return renderer.render(render_values_rows(queryset.values(*columns), plan))
+
+                slow, slow_body = self._best_of(serializer_path, options['repeat'])
+                fast, fast_body = self._best_of(values_path, options['repeat'])
+                transaction.set_rollback(True)
+
+            if slow_body != fast_body:
+                self.stdout.write(self.style.ERROR(f'{size:>8} output differs between paths'))
+                continue
+            self.stdout.write(f'{size:>8} {slow * 1000:>10.1f}ms {fast * 1000:>10.1f}ms {slow / fast:>7.1f}x')
+
+    def _best_of(self, func, repeat):
+        best, body = None, None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            body = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
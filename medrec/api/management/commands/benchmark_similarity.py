@@ -0,0 +1,79 @@
+import random
+import time
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+
+from api.similarity import SIMILAR_CANDIDATES, jaccard, lsh_buckets, minhash_signature
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the MinHash/LSH similar-composition lookup against a full scan on a synthetic catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=500000, help='Synthetic products')
+        parser.add_argument('--ingredients', type=int, default=3000, help='Distinct ingredients')
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--threshold', type=float, default=0.5)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        size, threshold = options['size'], options['threshold']
+
+        # Products are variations of shared base formulas (extra or missing
+        # ingredients), like combination products around a common molecule
+        formulas = [
+            rng.sample(range(options['ingredients']), rng.randint(1, 4))
+            for _ in range(max(size // 10, 1))
+        ]
+        catalog = []
+        for _ in range(size):
+            ingredients = set(rng.choice(formulas))
+            if rng.random() < 0.3:
+                ingredients.add(rng.randrange(options['ingredients']))
+            if len(ingredients) > 1 and rng.random() < 0.2:
+                ingredients.discard(rng.choice(sorted(ingredients)))
+            catalog.append(frozenset(ingredients))
+
+        started = time.perf_counter()
+        buckets = defaultdict(list)
+        for pk, ingredients in enumerate(catalog):
+            for bucket in lsh_buckets(minhash_signature(ingredients)):
+                buckets[bucket].append(pk)
+        build = time.perf_counter() - started
+        self.stdout.write(f'index build: {build:.1f}s for {size} products ({build / size * 1e6:.0f}µs each)')
+
+        lsh_time = scan_time = 0.0
+        candidates_total = found_total = expected_total = 0
+        for pk in rng.sample(range(size), min(options['queries'], size)):
+            base = catalog[pk]
+
+            started = time.perf_counter()
+            hits = Counter()
+            for bucket in lsh_buckets(minhash_signature(base)):
+                hits.update(buckets[bucket])
+            del hits[pk]
+            candidates = [other for other, _ in hits.most_common(SIMILAR_CANDIDATES)]
+            found = {other for other in candidates if jaccard(base, catalog[other]) >= threshold}
+            lsh_time += time.perf_counter() - started
+
+            started = time.perf_counter()
+            expected = {
+                other for other, ingredients in enumerate(catalog)
+                if other != pk and jaccard(base, ingredients) >= threshold
+            }
+            scan_time += time.perf_counter() - started
+
+            candidates_total += len(candidates)
+            found_total += len(found & expected)
+            expected_total += len(expected)
+
+        queries = min(options['queries'], size)
+        recall = found_total / expected_total if expected_total else 1.0
+        self.stdout.write(f'{"":>10} {"per query":>12}')
+        self.stdout.write(f'{"lsh":>10} {lsh_time / queries * 1000:>10.2f}ms  ({candidates_total // queries} candidates)')
+        self.stdout.write(f'{"full scan":>10} {scan_time / queries * 1000:>10.2f}ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'speedup {scan_time / lsh_time:.0f}x, recall {recall:.3f} at threshold {threshold}'
+        ))
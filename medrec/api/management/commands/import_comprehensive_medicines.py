@@ -1,6 +1,7 @@
 import csv
 from django.core.management.base import BaseCommand
 from api.models import Medicine
+from api.signals import deferred_indexing
 
 class Command(BaseCommand):
     help = 'Import medicines from a comprehensive CSV file'
@@ -12,7 +13,7 @@ class Command(BaseCommand):
         csv_file = kwargs['csv_file']
 
         try:
-            with open(csv_file, 'r', encoding='utf-8') as file:
+            with open(csv_file, 'r', encoding='utf-8') as file, deferred_indexing():
                 reader = csv.DictReader(file)
                 count = 0
                 for row in reader:
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from api.models import Medicine
+from api.signals import deferred_indexing
 import csv
 import os
 
@@ -21,7 +22,7 @@ class Command(BaseCommand):
         updated_count = 0
         error_count = 0
 
-        with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
+        with open(csv_file_path, 'r', encoding='utf-8') as csvfile, deferred_indexing():
             reader = csv.DictReader(csvfile)
             
             # Expected columns:
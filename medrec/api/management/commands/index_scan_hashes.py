@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from api.image_hash import dhash, hash_fields
+from api.models import ImageUpload
+
+
+class Command(BaseCommand):
+    help = 'Compute perceptual hashes for uploaded scans that do not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Uploads read per query')
+
+    def handle(self, *args, **options):
+        indexed = skipped = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                ImageUpload.objects.filter(pk__gt=last_pk, dhash__isnull=True)
+                .exclude(image='').order_by('pk').only('pk', 'image')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            for upload in batch:
+                last_pk = upload.pk
+                try:
+                    with upload.image.open('rb') as image_file:
+                        value = dhash(image_file)
+                except (OSError, ValueError):
+                    skipped += 1
+                    continue
+                ImageUpload.objects.filter(pk=upload.pk).update(**hash_fields(value))
+                indexed += 1
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed {indexed} scans ({skipped} unreadable images skipped)'))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from api.models import Medicine
+from api.signals import deferred_indexing
 
 
 class Command(BaseCommand):
@@ -124,17 +125,18 @@ class Command(BaseCommand):
         created_count = 0
         updated_count = 0
 
-        for med_data in medicines_data:
-            medicine, created = Medicine.objects.update_or_create(
-                code=med_data['code'],
-                defaults=med_data
-            )
-            if created:
-                created_count += 1
-                self.stdout.write(self.style.SUCCESS(f'✓ Created: {medicine.code} - {medicine.name_ar}'))
-            else:
-                updated_count += 1
-                self.stdout.write(self.style.WARNING(f'↻ Updated: {medicine.code} - {medicine.name_ar}'))
+        with deferred_indexing():
+            for med_data in medicines_data:
+                medicine, created = Medicine.objects.update_or_create(
+                    code=med_data['code'],
+                    defaults=med_data
+                )
+                if created:
+                    created_count += 1
+                    self.stdout.write(self.style.SUCCESS(f'✓ Created: {medicine.code} - {medicine.name_ar}'))
+                else:
+                    updated_count += 1
+                    self.stdout.write(self.style.WARNING(f'↻ Updated: {medicine.code} - {medicine.name_ar}'))
 
         self.stdout.write(self.style.SUCCESS(f'\n✓ Successfully processed {len(medicines_data)} medicines'))
         self.stdout.write(self.style.SUCCESS(f'  - Created: {created_count}'))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.alternatives import rebuild_alternatives
+from api.catalog import bump_catalog_version
+from api.strengths import parse_link_strengths
+
+
+class Command(BaseCommand):
+    help = 'Parse ingredient strengths into canonical numeric values (mg, mg/ml, iu, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Links read and updated per query')
+        parser.add_argument('--only-missing', action='store_true', help='Only parse links without a parsed value')
+        parser.add_argument(
+            '--rebuild-alternatives', action='store_true',
+            help='Rebuild the alternatives graph afterwards so it uses the new values',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            parsed = parse_link_strengths(batch_size=options['batch_size'], only_missing=options['only_missing'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Parsed {parsed} strengths in {elapsed:.1f}s ({parsed / max(elapsed, 1e-6):,.0f} rows/s)'
+        ))
+
+        if options['rebuild_alternatives']:
+            with transaction.atomic():
+                total = rebuild_alternatives()
+            self.stdout.write(self.style.SUCCESS(f'✓ Stored {total} alternative edges'))
+        bump_catalog_version()
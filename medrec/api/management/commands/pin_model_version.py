@@ -0,0 +1,35 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.model_registry import registry
+
+
+class Command(BaseCommand):
+    help = 'Switch running workers to another model version, or show the pinned version'
+
+    def add_arguments(self, parser):
+        parser.add_argument('version', nargs='?', help='Model version to serve')
+        parser.add_argument('--unpin', action='store_true', help='Go back to AI_MODEL_VERSION')
+
+    def handle(self, *args, **options):
+        pin_file = getattr(settings, 'AI_MODEL_PIN_FILE', '')
+        if not pin_file:
+            raise CommandError('Set AI_MODEL_PIN_FILE to pin model versions')
+
+        if options['unpin']:
+            if os.path.exists(pin_file):
+                os.unlink(pin_file)
+        elif options['version']:
+            # Load it here first, so a broken version is caught before
+            # workers try to swap to it
+            info = registry.load(options['version']).info()
+            self.stdout.write(f'Loaded {info}')
+            # Workers must never read a half-written file
+            temporary = f'{pin_file}.tmp'
+            with open(temporary, 'w') as pin:
+                pin.write(options['version'])
+            os.replace(temporary, pin_file)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Serving model version {registry.wanted_version()}'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.alternatives import rebuild_alternatives
+from api.catalog import bump_catalog_version
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed alternatives graph from ingredients and listed alternatives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Source medicines per pass')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_alternatives(chunk_size=options['chunk_size'])
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'✓ Stored {total} alternative edges'))
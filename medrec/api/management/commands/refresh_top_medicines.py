@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.popularity import refresh_top_medicines
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed popularity rankings served by medicines/top/ (run from cron)'
+
+    def handle(self, *args, **kwargs):
+        total = refresh_top_medicines()
+        self.stdout.write(self.style.SUCCESS(f'✓ Stored {total} ranking entries'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from api.models import Medicine
+from api.signals import reindex_medicines
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the derived indexes for every medicine (run after migrating a database with data)'
+
+    def handle(self, *args, **kwargs):
+        pks = list(Medicine.objects.values_list('pk', flat=True))
+        reindex_medicines(pks)
+        self.stdout.write(self.style.SUCCESS(f'✓ Reindexed {len(pks)} medicines'))
@@ -0,0 +1,60 @@
+import json
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.inference_server import (
+    DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT, InferenceClient, InferenceServer, server_authkey,
+)
+from core.model_registry import preload
+
+
+class Command(BaseCommand):
+    help = 'Serve core.ai_service inference to other processes, batching concurrent requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=getattr(settings, 'INFERENCE_SERVER_SOCKET', ''),
+                            help='Unix socket path (default: INFERENCE_SERVER_SOCKET)')
+        parser.add_argument('--max-batch-size', type=int,
+                            default=getattr(settings, 'INFERENCE_MAX_BATCH_SIZE', DEFAULT_MAX_BATCH_SIZE))
+        parser.add_argument('--max-wait-ms', type=float,
+                            default=getattr(settings, 'INFERENCE_MAX_WAIT_MS', DEFAULT_MAX_WAIT * 1000),
+                            help='Longest a request waits for its batch to fill')
+        parser.add_argument('--stats-interval', type=float, default=60, help='Seconds between stats lines')
+        parser.add_argument('--stats', action='store_true', help='Print the stats of the running server and exit')
+
+    def handle(self, *args, **options):
+        address = options['socket']
+        if not address:
+            raise CommandError('Set INFERENCE_SERVER_SOCKET or pass --socket')
+
+        if options['stats']:
+            try:
+                stats = InferenceClient(address, authkey=server_authkey()).stats()
+            except ConnectionError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+
+        server = InferenceServer(
+            address,
+            max_batch_size=options['max_batch_size'],
+            max_wait=options['max_wait_ms'] / 1000,
+            authkey=server_authkey(),
+        )
+        stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda *args: stop.set())
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+
+        self.stdout.write(f'Model ready: {preload().info()}')
+        server.start()
+        self.stdout.write(
+            f'Serving inference on {address} '
+            f'(batches of up to {server.max_batch_size}, {options["max_wait_ms"]:g} ms wait)'
+        )
+        while not stop.wait(options['stats_interval']):
+            self.stdout.write(json.dumps(server.stats.snapshot()))
+        server.close()
+        self.stdout.write(self.style.SUCCESS(f'✓ Stopped: {json.dumps(server.stats.snapshot())}'))
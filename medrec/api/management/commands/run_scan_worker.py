@@ -0,0 +1,70 @@
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.scans import get_near_duplicate_distance, run_worker
+from core.model_registry import preload
+
+
+def _serve(stop, poll_interval, once):
+    """Worker process body; stops after the current job once stop is set"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    run_worker(poll_interval=poll_interval, once=once, should_stop=stop.is_set)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Process queued image scans in worker processes (SCAN_PROCESSING_ASYNC)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes to run')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls of an empty queue')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        # Fail here rather than in every job on a bad setting
+        get_near_duplicate_distance()
+        if not getattr(settings, 'INFERENCE_SERVER_SOCKET', ''):
+            # Load the model once here so forked workers share it
+            self.stdout.write(f'Model ready: {preload().info()}')
+
+        if options['processes'] <= 1:
+            processed = run_worker(poll_interval=options['poll_interval'], once=options['once'])
+            self.stdout.write(self.style.SUCCESS(f'✓ Processed {processed} scans'))
+            return
+
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        worker_args = (stop, options['poll_interval'], options['once'])
+        # Children must open their own database connections
+        connections.close_all()
+        workers = [context.Process(target=_serve, args=worker_args) for _ in range(options['processes'])]
+        for worker in workers:
+            worker.start()
+
+        def request_stop(*args):
+            stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+        self.stdout.write(f'Started {len(workers)} scan workers')
+
+        # Replace workers that die, e.g. killed by the OOM killer; their
+        # job is picked up again when its lease runs out
+        while workers:
+            for index, worker in enumerate(workers):
+                worker.join(timeout=1)
+                if worker.is_alive():
+                    continue
+                if worker.exitcode != 0 and not stop.is_set():
+                    self.stderr.write(f'Scan worker {worker.pid} exited with {worker.exitcode}, restarting')
+                    workers[index] = context.Process(target=_serve, args=worker_args)
+                    workers[index].start()
+                else:
+                    workers[index] = None
+            workers = [worker for worker in workers if worker is not None]
+        self.stdout.write(self.style.SUCCESS('✓ Scan workers stopped'))
@@ -0,0 +1,19 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api.models import ScanCacheEntry
+from api.scan_cache import get_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counts and size of the repeat-scan result cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Drop every cached result')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted, _ = ScanCacheEntry.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f'✓ Dropped {deleted} cached results'))
+        self.stdout.write(json.dumps(get_stats(), indent=2))
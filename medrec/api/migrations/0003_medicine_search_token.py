@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_medicine_alter_imageupload_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicine',
+            name='active_ingredients',
+            field=models.CharField(blank=True, help_text='المواد الفعالة', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='medicine',
+            name='alternatives',
+            field=models.TextField(blank=True, help_text='البدائل والأدوية المتشابهة'),
+        ),
+        migrations.AddField(
+            model_name='medicine',
+            name='concentration',
+            field=models.CharField(blank=True, help_text='التركيزات', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='medicine',
+            name='packaging',
+            field=models.CharField(blank=True, help_text='التعبئة/الشكل الدوائي', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='medicine',
+            name='region_availability',
+            field=models.CharField(blank=True, help_text='مناطق التوافر', max_length=200),
+        ),
+        migrations.CreateModel(
+            name='MedicineSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='api.medicine')),
+            ],
+            options={
+                'unique_together': {('term', 'medicine')},
+            },
+        ),
+    ]
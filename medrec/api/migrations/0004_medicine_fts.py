@@ -0,0 +1,35 @@
+from django.db import OperationalError, migrations
+
+# Frozen copy of the table api.search maintains; rows are filled by
+# reindex_medicines
+FTS_TABLE = 'api_medicine_fts'
+FTS_COLUMNS = ('names', 'code', 'ingredients', 'alternatives', 'description', 'safety')
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5({', '.join(FTS_COLUMNS)}, tokenize='unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5; ranked search falls back to the token index
+        pass
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_medicine_search_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
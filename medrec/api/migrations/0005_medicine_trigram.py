@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_medicine_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicineTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3)),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='api.medicine')),
+            ],
+            options={
+                'unique_together': {('gram', 'medicine')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:43
+
+from django.db import migrations, models
+
+
+def seed_change_log(apps, schema_editor):
+    """Log every existing medicine so a first sync replays the whole catalog"""
+    Medicine = apps.get_model('api', 'Medicine')
+    MedicineChange = apps.get_model('api', 'MedicineChange')
+    MedicineChange.objects.bulk_create(
+        [
+            MedicineChange(medicine_id=pk, code=code, action='created' if is_active else 'deactivated')
+            for pk, code, is_active in Medicine.objects.order_by('pk').values_list('pk', 'code', 'is_active').iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicineChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('medicine_id', models.BigIntegerField()),
+                ('code', models.CharField(max_length=50)),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deactivated', 'Deactivated'), ('deleted', 'Deleted')], max_length=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(seed_change_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_medicine_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActiveIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('normalized_name', models.CharField(max_length=200, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MedicineIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('strength', models.CharField(blank=True, max_length=100)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='medicine_links', to='api.activeingredient')),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredient_links', to='api.medicine')),
+            ],
+            options={
+                'ordering': ['position'],
+                'unique_together': {('ingredient', 'medicine')},
+            },
+        ),
+        migrations.AddField(
+            model_name='medicine',
+            name='ingredients',
+            field=models.ManyToManyField(blank=True, related_name='medicines', through='api.MedicineIngredient', to='api.activeingredient'),
+        ),
+    ]
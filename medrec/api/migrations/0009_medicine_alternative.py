@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_active_ingredient'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicineAlternative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('reason', models.CharField(choices=[('ingredients', 'Same active ingredients'), ('listed', 'Listed as an alternative'), ('both', 'Same active ingredients and listed')], max_length=12)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alternative_edges', to='api.medicine')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='incoming_alternatives', to='api.medicine')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'unique_together': {('source', 'target')},
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:52
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Frozen copy of core.text.normalize_label as of this migration
+_ARABIC_MARKS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+_ARABIC_FOLD = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ة': 'ه', 'ى': 'ي', 'ؤ': 'و', 'ئ': 'ي',
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},
+})
+
+
+def normalize_label(value):
+    if not value:
+        return ''
+    value = _ARABIC_MARKS.sub('', value).translate(_ARABIC_FOLD)
+    value = unicodedata.normalize('NFKD', value.casefold())
+    return ' '.join(''.join(ch for ch in value if not unicodedata.combining(ch)).split())
+
+
+def fill_lookup_columns(apps, schema_editor):
+    Medicine = apps.get_model('api', 'Medicine')
+    batch = []
+    for medicine in Medicine.objects.only('pk', 'category', 'manufacturer').iterator(chunk_size=500):
+        medicine.category_norm = normalize_label(medicine.category)[:100]
+        medicine.manufacturer_norm = normalize_label(medicine.manufacturer)[:200]
+        batch.append(medicine)
+        if len(batch) == 500:
+            Medicine.objects.bulk_update(batch, ['category_norm', 'manufacturer_norm'])
+            batch = []
+    Medicine.objects.bulk_update(batch, ['category_norm', 'manufacturer_norm'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_medicine_minhash_bucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicine',
+            name='category_norm',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='medicine',
+            name='manufacturer_norm',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.RunPython(fill_lookup_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category_norm', 'name_ar'], name='medicine_active_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['manufacturer_norm', 'name_ar'], name='medicine_active_maker_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['name_ar'], name='medicine_active_name_ar_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_medicine_lookup_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicineEffectTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('source', models.CharField(choices=[('side_effects', 'Side effects'), ('warnings', 'Warnings')], max_length=12)),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effect_terms', to='api.medicine')),
+            ],
+            options={
+                'unique_together': {('term', 'source', 'medicine')},
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def seed_detections(apps, schema_editor):
+    ImageUpload = apps.get_model('api', 'ImageUpload')
+    MedicinePopularity = apps.get_model('api', 'MedicinePopularity')
+    rows = (
+        ImageUpload.objects.filter(detected_medicine__isnull=False)
+        .annotate(day=TruncDate('created_at'))
+        .values('detected_medicine_id', 'day')
+        .annotate(detections=Count('id'))
+    )
+    MedicinePopularity.objects.bulk_create(
+        [
+            MedicinePopularity(medicine_id=row['detected_medicine_id'], day=row['day'], detections=row['detections'])
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_medicine_effect_term'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicinePopularity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('detections', models.PositiveIntegerField(default=0)),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popularity', to='api.medicine')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='popularity_day_idx')],
+                'unique_together': {('medicine', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TopMedicine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('all', 'All time'), ('7d', 'Last 7 days'), ('30d', 'Last 30 days')], max_length=3)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.PositiveIntegerField()),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='top_entries', to='api.medicine')),
+            ],
+            options={
+                'ordering': ['window', 'rank'],
+                'unique_together': {('window', 'rank')},
+            },
+        ),
+        migrations.RunPython(seed_detections, migrations.RunPython.noop),
+    ]
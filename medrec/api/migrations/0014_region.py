@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+GCC_COUNTRIES = ('SA', 'AE', 'KW', 'QA', 'BH', 'OM')
+ARAB_COUNTRIES = GCC_COUNTRIES + ('EG', 'JO', 'LB', 'IQ', 'SY', 'PS', 'YE', 'SD', 'LY', 'TN', 'DZ', 'MA')
+
+# Seed rows: code -> (Arabic name, English name, member countries). Medicine
+# links are filled by reindex_medicines.
+REGIONS = {
+    'EG': ('مصر', 'Egypt', ()),
+    'SA': ('السعودية', 'Saudi Arabia', ()),
+    'AE': ('الإمارات', 'United Arab Emirates', ()),
+    'KW': ('الكويت', 'Kuwait', ()),
+    'QA': ('قطر', 'Qatar', ()),
+    'BH': ('البحرين', 'Bahrain', ()),
+    'OM': ('عمان', 'Oman', ()),
+    'JO': ('الأردن', 'Jordan', ()),
+    'LB': ('لبنان', 'Lebanon', ()),
+    'IQ': ('العراق', 'Iraq', ()),
+    'SY': ('سوريا', 'Syria', ()),
+    'PS': ('فلسطين', 'Palestine', ()),
+    'YE': ('اليمن', 'Yemen', ()),
+    'SD': ('السودان', 'Sudan', ()),
+    'LY': ('ليبيا', 'Libya', ()),
+    'TN': ('تونس', 'Tunisia', ()),
+    'DZ': ('الجزائر', 'Algeria', ()),
+    'MA': ('المغرب', 'Morocco', ()),
+    'TR': ('تركيا', 'Turkey', ()),
+    'IR': ('إيران', 'Iran', ()),
+    'GCC': ('دول الخليج', 'Gulf countries', GCC_COUNTRIES),
+    'ARAB': ('دول عربية', 'Arab countries', ARAB_COUNTRIES),
+    'MENA': ('الشرق الأوسط', 'Middle East', ARAB_COUNTRIES + ('TR', 'IR')),
+    'INTL': ('دولي', 'International', ()),
+}
+
+
+def seed_regions(apps, schema_editor):
+    Region = apps.get_model('api', 'Region')
+    regions = {
+        code: Region.objects.create(code=code, name_ar=name_ar, name_en=name_en)
+        for code, (name_ar, name_en, _) in REGIONS.items()
+    }
+    for code, (_, _, members) in REGIONS.items():
+        regions[code].members.set([regions[member] for member in members])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_medicine_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Region',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10, unique=True)),
+                ('name_ar', models.CharField(max_length=100)),
+                ('name_en', models.CharField(max_length=100)),
+                ('members', models.ManyToManyField(blank=True, related_name='groups', to='api.region')),
+            ],
+            options={
+                'ordering': ['code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MedicineRegion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='region_links', to='api.medicine')),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='medicine_links', to='api.region')),
+            ],
+            options={
+                'unique_together': {('region', 'medicine')},
+            },
+        ),
+        migrations.AddField(
+            model_name='medicine',
+            name='regions',
+            field=models.ManyToManyField(blank=True, related_name='medicines', through='api.MedicineRegion', to='api.region'),
+        ),
+        migrations.RunPython(seed_regions, migrations.RunPython.noop),
+    ]
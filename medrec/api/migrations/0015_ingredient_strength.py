@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_region'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicinealternative',
+            name='same_strength',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='medicineingredient',
+            name='strength_unit',
+            field=models.CharField(blank=True, editable=False, max_length=8),
+        ),
+        migrations.AddField(
+            model_name='medicineingredient',
+            name='strength_value',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='medicineingredient',
+            index=models.Index(fields=['ingredient', 'strength_unit', 'strength_value'], name='ingredient_strength_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicineingredient',
+            index=models.Index(fields=['strength_unit', 'strength_value'], name='strength_idx'),
+        ),
+    ]
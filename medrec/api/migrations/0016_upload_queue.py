@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_processed(apps, schema_editor):
+    # Uploads made before the queue were processed inside the request
+    ImageUpload = apps.get_model('api', 'ImageUpload')
+    ImageUpload.objects.update(status='done')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_ingredient_strength'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imageupload',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='imageupload',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='imageupload',
+            name='locked_by',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='imageupload',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='imageupload',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=8),
+        ),
+        migrations.RunPython(mark_processed, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='imageupload',
+            index=models.Index(condition=models.Q(('status__in', ('queued', 'running'))), fields=['locked_until', 'id'], name='upload_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+# Spellings region_availability uses besides the codes and names
+ALIASES = {
+    'SA': 'السعوديه, saudi, ksa',
+    'AE': 'الامارات, uae, emirates',
+    'GCC': 'الخليج, gulf',
+    'ARAB': 'الدول العربيه',
+    'MENA': 'middle east',
+    'INTL': 'عالمي, global, worldwide',
+}
+
+
+def seed_aliases(apps, schema_editor):
+    Region = apps.get_model('api', 'Region')
+    for code, aliases in ALIASES.items():
+        Region.objects.filter(code=code).update(aliases=aliases)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_upload_dhash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='region',
+            name='aliases',
+            field=models.CharField(blank=True, help_text='Other spellings, comma-separated, e.g. "ksa, saudi". Run reindex_medicines after changing them.', max_length=500),
+        ),
+        migrations.RunPython(seed_aliases, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,11 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from core.text import normalize_label
+
+from .strengths import parse_strength
 
 
 class Medicine(models.Model):
@@ -20,8 +26,15 @@ class Medicine(models.Model):
     side_effects = models.TextField(blank=True, help_text="الآثار الجانبية")
     warnings = models.TextField(blank=True, help_text="التحذيرات")
     category = models.CharField(max_length=100, blank=True, help_text="تصنيف الدواء")
+    # Normalized copies of category/manufacturer for indexed lookups, set in save()
+    category_norm = models.CharField(max_length=100, blank=True, editable=False)
+    manufacturer_norm = models.CharField(max_length=200, blank=True, editable=False)
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     image = models.ImageField(upload_to='medicines/', blank=True, null=True)
+    ingredients = models.ManyToManyField(
+        'ActiveIngredient', through='MedicineIngredient', related_name='medicines', blank=True
+    )
+    regions = models.ManyToManyField('Region', through='MedicineRegion', related_name='medicines', blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -30,22 +43,377 @@ class Medicine(models.Model):
         ordering = ['name_ar']
         verbose_name = 'Medicine'
         verbose_name_plural = 'Medicines'
+        # Partial on is_active, which every catalog query filters on; the
+        # trailing name_ar lets filtered lists come back in order from the index
+        indexes = [
+            models.Index(
+                fields=['category_norm', 'name_ar'], condition=Q(is_active=True),
+                name='medicine_active_category_idx',
+            ),
+            models.Index(
+                fields=['manufacturer_norm', 'name_ar'], condition=Q(is_active=True),
+                name='medicine_active_maker_idx',
+            ),
+            models.Index(fields=['name_ar'], condition=Q(is_active=True), name='medicine_active_name_ar_idx'),
+        ]
 
     def __str__(self):
         return f"{self.code} - {self.name_ar}"
 
+    def save(self, *args, **kwargs):
+        self.category_norm = normalize_label(self.category)[:100]
+        self.manufacturer_norm = normalize_label(self.manufacturer)[:200]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'category' in update_fields:
+                update_fields.add('category_norm')
+            if 'manufacturer' in update_fields:
+                update_fields.add('manufacturer_norm')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+
+class ActiveIngredient(models.Model):
+    """Active ingredient parsed from Medicine.active_ingredients"""
+    name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class MedicineIngredient(models.Model):
+    """Ingredient of a medicine, with its strength from Medicine.concentration"""
+    medicine = models.ForeignKey(Medicine, on_delete=models.CASCADE, related_name='ingredient_links')
+    ingredient = models.ForeignKey(ActiveIngredient, on_delete=models.CASCADE, related_name='medicine_links')
+    strength = models.CharField(max_length=100, blank=True)
+    # Parsed strength in canonical units (mg, mg/ml, iu, ...), see api/strengths.py
+    strength_value = models.FloatField(null=True, blank=True, editable=False)
+    strength_unit = models.CharField(max_length=8, blank=True, editable=False)
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('ingredient', 'medicine')
+        ordering = ['position']
+        indexes = [
+            models.Index(fields=['ingredient', 'strength_unit', 'strength_value'], name='ingredient_strength_idx'),
+            models.Index(fields=['strength_unit', 'strength_value'], name='strength_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.strength_value, self.strength_unit = parse_strength(self.strength)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'strength' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'strength_value', 'strength_unit'}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f'{self.medicine_id}: {self.ingredient_id} {self.strength}'.strip()
+
+
+class Region(models.Model):
+    """Country (ISO code) or grouping of countries such as GCC, see api/regions.py"""
+    code = models.CharField(max_length=10, unique=True)
+    name_ar = models.CharField(max_length=100)
+    name_en = models.CharField(max_length=100)
+    aliases = models.CharField(
+        max_length=500, blank=True,
+        help_text='Other spellings, comma-separated, e.g. "ksa, saudi". Run reindex_medicines after changing them.',
+    )
+    members = models.ManyToManyField('self', symmetrical=False, related_name='groups', blank=True)
+
+    class Meta:
+        ordering = ['code']
+
+    def __str__(self):
+        return f'{self.code} - {self.name_en}'
+
+
+class MedicineRegion(models.Model):
+    """Region a medicine is available in, parsed from region_availability"""
+    medicine = models.ForeignKey(Medicine, on_delete=models.CASCADE, related_name='region_links')
+    region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name='medicine_links')
+
+    class Meta:
+        unique_together = ('region', 'medicine')
+
+    def __str__(self):
+        return f'{self.medicine_id} in {self.region_id}'
+
 
 class ImageUpload(models.Model):
-    """User uploaded images for medicine detection"""
+    """User uploaded images for medicine detection.
+
+    Uploads double as the scan job queue: run_scan_worker claims queued
+    rows, see api/scans.py.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
     image = models.ImageField(upload_to='uploads/%Y/%m/%d')
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='uploads')
     detected_medicine = models.ForeignKey(Medicine, on_delete=models.SET_NULL, null=True, blank=True, related_name='detections')
     confidence = models.FloatField(null=True, blank=True, help_text="AI confidence score")
     result = models.TextField(blank=True)  # Full JSON result from AI
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Queued: not retried before this time. Running: the worker's lease,
+    # after which another worker may take the job over.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+    # SHA-256 of the image bytes; identical uploads share one file
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # Result reused from an earlier scan instead of running the model
+    cached = models.BooleanField(default=False)
+    # Perceptual hash (api/image_hash.py) and its four 16-bit chunks, each
+    # indexed for near-duplicate lookups
+    dhash = models.BigIntegerField(null=True, blank=True)
+    dhash_0 = models.PositiveIntegerField(null=True, blank=True)
+    dhash_1 = models.PositiveIntegerField(null=True, blank=True)
+    dhash_2 = models.PositiveIntegerField(null=True, blank=True)
+    dhash_3 = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['locked_until', 'id'], condition=Q(status__in=('queued', 'running')),
+                name='upload_pending_idx',
+            ),
+            *[
+                models.Index(fields=[f'dhash_{index}', 'created_at'], name=f'upload_dhash_{index}_idx')
+                for index in range(4)
+            ],
+        ]
 
     def __str__(self):
         return f'Upload {self.id} by {self.uploaded_by.username}'
+
+
+class ScanCacheEntry(models.Model):
+    """Inference result of an image, by content hash and model version.
+
+    Bounded by SCAN_CACHE_MAX_ENTRIES; the least recently used entries are
+    evicted first, see api/scan_cache.py.
+    """
+    content_hash = models.CharField(max_length=64)
+    model_version = models.CharField(max_length=100)
+    result = models.TextField()
+    image = models.CharField(max_length=255)  # Storage name of the shared file
+    hits = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ('content_hash', 'model_version')
+
+    def __str__(self):
+        return f'{self.content_hash[:12]} ({self.model_version})'
+
+
+class MedicineSearchToken(models.Model):
+    """Inverted index of normalized words in a medicine's searchable text"""
+    term = models.CharField(max_length=100)
+    medicine = models.ForeignKey(Medicine, on_delete=models.CASCADE, related_name='search_tokens')
+
+    class Meta:
+        unique_together = ('term', 'medicine')
+
+    def __str__(self):
+        return f'{self.term} -> {self.medicine_id}'
+
+
+class MedicineTrigram(models.Model):
+    """Character trigrams of medicine names for typo-tolerant matching"""
+    gram = models.CharField(max_length=3)
+    medicine = models.ForeignKey(Medicine, on_delete=models.CASCADE, related_name='trigrams')
+
+    class Meta:
+        unique_together = ('gram', 'medicine')
+
+    def __str__(self):
+        return f'{self.gram!r} -> {self.medicine_id}'
+
+
+class Counter(models.Model):
+    """Named counters shared by every worker process (e.g. the catalog version)"""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name} = {self.value}'
+
+    @classmethod
+    def increment(cls, name, amount=1):
+        """Atomically add amount to the named counter, creating it if needed"""
+        now = timezone.now()
+        if cls.objects.filter(name=name).update(value=F('value') + amount, updated_at=now):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(name=name, value=amount)
+        except IntegrityError:
+            # Created concurrently by another process
+            cls.objects.filter(name=name).update(value=F('value') + amount, updated_at=now)
+
+
+class MedicineChange(models.Model):
+    """Append-only log of catalog changes; entry ids serve as delta sync tokens"""
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DEACTIVATED = 'deactivated'
+    DELETED = 'deleted'
+    ACTION_CHOICES = (
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DEACTIVATED, 'Deactivated'),
+        (DELETED, 'Deleted'),
+    )
+
+    # Not a foreign key: entries must outlive deleted medicines
+    medicine_id = models.BigIntegerField()
+    code = models.CharField(max_length=50)
+    action = models.CharField(max_length=12, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f'#{self.id} {self.action} {self.code}'
+
+
+class MedicineAlternative(models.Model):
+    """Precomputed, scored alternative edge between two medicines"""
+    INGREDIENTS = 'ingredients'
+    LISTED = 'listed'
+    BOTH = 'both'
+    REASON_CHOICES = (
+        (INGREDIENTS, 'Same active ingredients'),
+        (LISTED, 'Listed as an alternative'),
+        (BOTH, 'Same active ingredients and listed'),
+    )
+
+    source = models.ForeignKey(Medicine, on_delete=models.CASCADE, related_name='alternative_edges')
+    target = models.ForeignKey(Medicine, on_delete=models.CASCADE, related_name='incoming_alternatives')
+    score = models.FloatField()
+    reason = models.CharField(max_length=12, choices=REASON_CHOICES)
+    # Same ingredients at the same canonical strengths (dose-equivalent)
+    same_strength = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ('source', 'target')
+        ordering = ['-score']
+
+    def __str__(self):
+        return f'{self.source_id} -> {self.target_id} ({self.score:.2f}, {self.reason})'
+
+
+class MedicineMinHashBucket(models.Model):
+    """LSH bucket of a medicine's ingredient-set MinHash signature (one row per band)"""
+    bucket = models.BigIntegerField(db_index=True)
+    medicine = models.ForeignKey(Medicine, on_delete=models.CASCADE, related_name='minhash_buckets')
+
+    def __str__(self):
+        return f'{self.bucket} -> {self.medicine_id}'
+
+
+class MedicineEffectTerm(models.Model):
+    """Posting of a stemmed side-effect/warning term for a medicine"""
+    SOURCE_CHOICES = (
+        ('side_effects', 'Side effects'),
+        ('warnings', 'Warnings'),
+    )
+
+    term = models.CharField(max_length=100)
+    medicine = models.ForeignKey(Medicine, on_delete=models.CASCADE, related_name='effect_terms')
+    source = models.CharField(max_length=12, choices=SOURCE_CHOICES)
+
+    class Meta:
+        unique_together = ('term', 'source', 'medicine')
+
+    def __str__(self):
+        return f'{self.term} ({self.source}) -> {self.medicine_id}'
+
+
+class MedicinePopularity(models.Model):
+    """Daily rollup of how often a medicine was detected in scans and viewed"""
+    medicine = models.ForeignKey(Medicine, on_delete=models.CASCADE, related_name='popularity')
+    day = models.DateField()
+    detections = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('medicine', 'day')
+        indexes = [models.Index(fields=['day'], name='popularity_day_idx')]
+
+    def __str__(self):
+        return f'{self.medicine_id} on {self.day}: {self.detections} detections, {self.views} views'
+
+    @classmethod
+    def record(cls, medicine_id, detections=0, views=0):
+        """Atomically add to today's counters of a medicine"""
+        day = timezone.localdate()
+        changes = {'detections': F('detections') + detections, 'views': F('views') + views}
+        if cls.objects.filter(medicine_id=medicine_id, day=day).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(medicine_id=medicine_id, day=day, detections=detections, views=views)
+        except IntegrityError:
+            # Created concurrently by another process
+            cls.objects.filter(medicine_id=medicine_id, day=day).update(**changes)
+
+    @classmethod
+    def record_views(cls, views):
+        """Add {medicine_id: count} to today's view counters.
+
+        One insert for the missing rows and one UPDATE per distinct count,
+        however many medicines there are.
+        """
+        day = timezone.localdate()
+        by_count = {}
+        for medicine_id, count in views.items():
+            by_count.setdefault(count, []).append(medicine_id)
+        with transaction.atomic():
+            cls.objects.bulk_create([cls(medicine_id=pk, day=day) for pk in views], ignore_conflicts=True)
+            for count, medicine_ids in by_count.items():
+                cls.objects.filter(day=day, medicine_id__in=medicine_ids).update(views=F('views') + count)
+
+
+class TopMedicine(models.Model):
+    """Precomputed popularity ranking per window, rebuilt by refresh_top_medicines"""
+    ALL_TIME = 'all'
+    LAST_7_DAYS = '7d'
+    LAST_30_DAYS = '30d'
+    WINDOW_CHOICES = (
+        (ALL_TIME, 'All time'),
+        (LAST_7_DAYS, 'Last 7 days'),
+        (LAST_30_DAYS, 'Last 30 days'),
+    )
+
+    window = models.CharField(max_length=3, choices=WINDOW_CHOICES)
+    rank = models.PositiveSmallIntegerField()
+    medicine = models.ForeignKey(Medicine, on_delete=models.CASCADE, related_name='top_entries')
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('window', 'rank')
+        ordering = ['window', 'rank']
+
+    def __str__(self):
+        return f'{self.window} #{self.rank}: {self.medicine_id} ({self.score})'
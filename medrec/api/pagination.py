@@ -0,0 +1,114 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class MedicineKeysetPagination(CursorPagination):
+    """Keyset pagination over (ordering field, id).
+
+    The cursor stores the sort value and id of the last row of a page, and
+    the next page is fetched with ``WHERE (field, id) > (value, id)``, so a
+    deep page costs the same as the first one. Unlike DRF's CursorPagination
+    there is no offset component: ties on the ordering field are broken by
+    id, which keeps cursors stable while rows are inserted or removed.
+
+    Rows with a NULL sort value (a medicine without a price) come last in
+    both directions, ordered by id among themselves.
+    """
+    ordering = 'name_ar'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)[:1]
+        self.field = self.ordering[0].lstrip('-')
+        self.model_field = queryset.model._meta.get_field(self.field)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor['reverse']
+        descending = self.ordering[0].startswith('-') != reverse
+        # Walking back from a cursor reads the page order backwards, NULLs first
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        if descending:
+            queryset = queryset.order_by(F(self.field).desc(**nulls), '-pk')
+        else:
+            queryset = queryset.order_by(F(self.field).asc(**nulls), 'pk')
+        if self.cursor is not None:
+            value, pk = self.cursor['position']
+            queryset = queryset.filter(self._after(value, pk, descending, nulls_last=not reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _after(self, value, pk, descending, nulls_last):
+        """Rows sorting strictly after (value, pk) in the given direction,
+        with NULL values sorting after (nulls_last) or before every other"""
+        field = self.field
+        lookup = 'lt' if descending else 'gt'
+        if value is None:
+            after = Q(**{f'{field}__isnull': True, f'pk__{lookup}': pk})
+            return after if nulls_last else after | Q(**{f'{field}__isnull': False})
+        after = Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'pk__{lookup}': pk})
+        return (after | Q(**{f'{field}__isnull': True})) if nulls_last else after
+
+    def _position(self, item):
+        if isinstance(item, dict):
+            value, pk = item[self.field], item['id']
+        else:
+            value, pk = getattr(item, self.field), item.pk
+        if value is not None and not isinstance(value, str):
+            value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        return [value, pk]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor({'position': self._position(self.page[-1]), 'reverse': False})
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor({'position': self._position(self.page[0]), 'reverse': True})
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            value, pk = data['p']
+            if value is not None:
+                value = self.model_field.to_python(value)
+            return {'position': (value, int(pk)), 'reverse': bool(data.get('r'))}
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        data = {'p': cursor['position']}
+        if cursor['reverse']:
+            data['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
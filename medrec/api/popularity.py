@@ -0,0 +1,118 @@
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Counter, Medicine, MedicinePopularity, TopMedicine
+
+logger = logging.getLogger(__name__)
+
+# A scan that recognised a medicine says more about demand than a page view
+DETECTION_WEIGHT = 5
+VIEW_WEIGHT = 1
+
+TOP_SIZE = 10
+
+# Days covered by each window; None is all time
+WINDOWS = {
+    TopMedicine.ALL_TIME: None,
+    TopMedicine.LAST_7_DAYS: 7,
+    TopMedicine.LAST_30_DAYS: 30,
+}
+
+# Counter bumped on every refresh; its updated_at is the refresh time
+TOP_MEDICINES_VERSION = 'top_medicines_version'
+
+# Seconds a process buffers detail views before writing them, and the
+# number of distinct medicines that forces an earlier write
+DEFAULT_VIEW_FLUSH_INTERVAL = 10
+VIEW_FLUSH_SIZE = 500
+
+
+def record_detection(medicine_id):
+    MedicinePopularity.record(medicine_id, detections=1)
+
+
+class ViewCounter:
+    """Per-process buffer of medicine detail views.
+
+    record() only counts in memory, by medicine code, so a view costs no
+    query and is counted even when the response is a 304. Once
+    POPULARITY_VIEW_FLUSH_INTERVAL seconds have passed, the next record()
+    writes the buffered counts in one batch; what is left at exit is
+    written then.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(int)
+        self._flushed_at = time.monotonic()
+
+    def record(self, code):
+        interval = getattr(settings, 'POPULARITY_VIEW_FLUSH_INTERVAL', DEFAULT_VIEW_FLUSH_INTERVAL)
+        with self._lock:
+            self._views[code] += 1
+            due = len(self._views) >= VIEW_FLUSH_SIZE or time.monotonic() - self._flushed_at >= interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered views; returns the number of views written"""
+        with self._lock:
+            views, self._views = self._views, defaultdict(int)
+            self._flushed_at = time.monotonic()
+        if not views:
+            return 0
+        ids = dict(Medicine.objects.filter(code__in=list(views), is_active=True).values_list('code', 'pk'))
+        # Codes of missing or inactive medicines (404s) are dropped
+        counts = {ids[code]: count for code, count in views.items() if code in ids}
+        if counts:
+            MedicinePopularity.record_views(counts)
+        return sum(counts.values())
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Writing buffered medicine views failed')
+
+
+view_counter = ViewCounter()
+atexit.register(view_counter._flush_at_exit)
+
+
+def get_top_version():
+    """(version, refreshed at) of the precomputed rankings, or (0, None)"""
+    counter = Counter.objects.filter(name=TOP_MEDICINES_VERSION).values_list('value', 'updated_at').first()
+    return counter if counter else (0, None)
+
+
+def refresh_top_medicines(size=TOP_SIZE):
+    """Recompute every window's top-N from the daily rollup table"""
+    today = timezone.localdate()
+    score = Sum(F('detections') * DETECTION_WEIGHT + F('views') * VIEW_WEIGHT)
+    entries = []
+    for window, days in WINDOWS.items():
+        rollup = MedicinePopularity.objects.filter(medicine__is_active=True)
+        if days is not None:
+            rollup = rollup.filter(day__gt=today - timedelta(days=days))
+        ranked = (
+            rollup.values('medicine_id').annotate(score=score)
+            .filter(score__gt=0).order_by('-score', 'medicine_id')[:size]
+        )
+        entries.extend(
+            TopMedicine(window=window, rank=rank, medicine_id=row['medicine_id'], score=row['score'])
+            for rank, row in enumerate(ranked, start=1)
+        )
+    with transaction.atomic():
+        TopMedicine.objects.all().delete()
+        TopMedicine.objects.bulk_create(entries)
+        Counter.increment(TOP_MEDICINES_VERSION)
+    return len(entries)
@@ -0,0 +1,145 @@
+from core.text import tokenize
+
+from django.core.cache import cache
+
+from core.text import tokenize
+
+GLOBAL_REGION = 'INTL'
+
+REGION_CACHE_TIMEOUT = 60 * 60
+
+
+def _alias_key(text):
+    return ' '.join(tokenize(text))
+
+
+class RegionTable:
+    """Regions as the lookups need them, built from the Region table.
+
+    members maps code -> member country codes (empty for countries),
+    aliases maps normalized phrases (codes, both names and the admin-edited
+    aliases) -> code, and labels maps code -> Arabic name.
+    """
+
+    def __init__(self, rows):
+        self.members, self.aliases, self.labels = {}, {}, {}
+        for code, name_ar, name_en, aliases, member in rows:
+            self.members.setdefault(code, set())
+            if member:
+                self.members[code].add(member)
+            self.labels[code] = name_ar
+            for alias in (code, name_ar, name_en, *aliases.split(',')):
+                key = _alias_key(alias)
+                if key:
+                    self.aliases.setdefault(key, code)
+        self.max_words = max((len(alias.split()) for alias in self.aliases), default=1)
+        self.first_words = {alias.split()[0] for alias in self.aliases}
+
+    def strip_conjunction(self, word):
+        """"ومصر" -> "مصر": drop a leading Arabic "and" glued to a known word"""
+        if word.startswith('و') and len(word) > 2 and word[1:] in self.first_words:
+            return word[1:]
+        return word
+
+
+def region_table():
+    """The RegionTable, cached per catalog version so groupings and aliases
+    edited in the admin take effect on their next lookup"""
+    from .catalog import get_catalog_version
+    from .models import Region
+
+    key = f'regions:{get_catalog_version()[0]}'
+    table = cache.get(key)
+    if table is None:
+        table = RegionTable(Region.objects.values_list('code', 'name_ar', 'name_en', 'aliases', 'members__code'))
+        cache.set(key, table, REGION_CACHE_TIMEOUT)
+    return table
+
+
+def parse_regions(text, table=None):
+    """Region codes named in a free-text region_availability value, in order.
+
+    "دولي ومصر والخليج" -> ['INTL', 'EG', 'GCC']. The longest known phrase
+    wins, so "دول الخليج" is one region; unknown words are ignored. table
+    is region_table(), read when not given.
+    """
+    if table is None:
+        table = region_table()
+    words = [table.strip_conjunction(word) for word in tokenize(text or '')]
+    codes = []
+    position = 0
+    while position < len(words):
+        for length in range(min(table.max_words, len(words) - position), 0, -1):
+            code = table.aliases.get(' '.join(words[position:position + length]))
+            if code:
+                if code not in codes:
+                    codes.append(code)
+                position += length
+                break
+        else:
+            position += 1
+    return codes
+
+
+def region_members():
+    """Map region code -> member country codes, read from the Region table
+    so groupings edited in the admin take effect; countries map to an
+    empty set"""
+    return region_table().members
+
+
+def resolve_region(value, table=None):
+    """Region code for a code or name given by a client, or None"""
+    if table is None:
+        table = region_table()
+    value = (value or '').strip()
+    if value.upper() in table.members:
+        return value.upper()
+    return table.aliases.get(_alias_key(value))
+
+
+def matching_regions(code, members=None):
+    """Codes whose medicines are available in region code.
+
+    A medicine listed for a grouping (GCC) is available in each member
+    country, and one listed as international is available everywhere;
+    asking for a grouping also matches medicines listed for its members.
+    members is region_members(), read when not given.
+    """
+    if members is None:
+        members = region_members()
+    wanted = members.get(code) or {code}
+    codes = {code, GLOBAL_REGION}
+    for other, other_members in members.items():
+        other_members = other_members or {other}
+        # Groupings containing the region, and countries/groupings inside it
+        if wanted <= other_members or other_members <= wanted:
+            codes.add(other)
+    return codes
+
+
+def filter_by_region(queryset, code, members=None):
+    """Medicines of queryset available in region code (see matching_regions)"""
+    from .models import MedicineRegion
+
+    available = MedicineRegion.objects.filter(region__code__in=matching_regions(code, members))
+    return queryset.filter(pk__in=available.values('medicine_id'))
+
+
+def index_regions(medicines, batch_size=1000):
+    """Rebuild the region links of the given medicines in bulk"""
+    from .models import MedicineRegion, Region
+
+    medicines = list(medicines)
+    table = region_table()
+    ids = dict(Region.objects.values_list('code', 'id'))
+    MedicineRegion.objects.filter(medicine_id__in=[m.pk for m in medicines]).delete()
+    MedicineRegion.objects.bulk_create(
+        [
+            MedicineRegion(medicine_id=medicine.pk, region_id=ids[code])
+            for medicine in medicines
+            for code in parse_regions(medicine.region_availability, table)
+            if code in ids
+        ],
+        batch_size=batch_size,
+    )
@@ -0,0 +1,117 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Counter, ImageUpload, ScanCacheEntry
+
+DEFAULT_MAX_ENTRIES = 10000
+
+# Counter names (api.models.Counter)
+CACHE_HITS = 'scan_cache_hits'
+CACHE_MISSES = 'scan_cache_misses'
+NEAR_DUPLICATE_HITS = 'scan_near_duplicate_hits'
+
+
+class ContentHashUploadHandler(FileUploadHandler):
+    """Hash uploaded files while they stream in.
+
+    Chunks are passed on unchanged to the next handler, which stores the
+    file as usual; the hex SHA-256 of each file ends up in
+    ``digests[field_name]``. Must be first in request.upload_handlers.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.digests = {}
+        self._hasher = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.digests[self.field_name] = self._hasher.hexdigest()
+        return None
+
+
+def get_max_entries():
+    return getattr(settings, 'SCAN_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+
+
+def existing_file(content_hash):
+    """Storage name of an already stored image with these bytes, or None"""
+    names = (
+        ImageUpload.objects.filter(content_hash=content_hash)
+        .exclude(image='').order_by('pk').values_list('image', flat=True)
+    )
+    for name in names[:3]:
+        if default_storage.exists(name):
+            return name
+    return None
+
+
+def lookup(content_hash, model_version):
+    """Cached entry for an image and model version, counting a hit.
+
+    A miss is not counted here: the scan may still reuse a near-duplicate's
+    result, see record_miss.
+    """
+    entry = ScanCacheEntry.objects.filter(content_hash=content_hash, model_version=model_version).first()
+    if entry is not None and not default_storage.exists(entry.image):
+        entry.delete()
+        entry = None
+    if entry is None:
+        return None
+    ScanCacheEntry.objects.filter(pk=entry.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+    Counter.increment(CACHE_HITS)
+    return entry
+
+
+def record_miss():
+    """Count a scan whose result came from the model, neither cached nor
+    reused from a near-duplicate"""
+    Counter.increment(CACHE_MISSES)
+
+
+def store(upload, result, model_version):
+    """Remember the result of a finished scan and evict the least recently
+    used entries beyond SCAN_CACHE_MAX_ENTRIES"""
+    if not upload.content_hash or not model_version:
+        return
+    try:
+        with transaction.atomic():
+            ScanCacheEntry.objects.update_or_create(
+                content_hash=upload.content_hash,
+                model_version=model_version,
+                defaults={'result': result, 'image': upload.image.name, 'last_used_at': timezone.now()},
+            )
+    except IntegrityError:
+        # Stored concurrently by another worker
+        return
+    excess = ScanCacheEntry.objects.count() - get_max_entries()
+    if excess > 0:
+        oldest = ScanCacheEntry.objects.order_by('last_used_at', 'pk').values_list('pk', flat=True)[:excess]
+        ScanCacheEntry.objects.filter(pk__in=list(oldest)).delete()
+
+
+def get_stats():
+    names = (CACHE_HITS, CACHE_MISSES, NEAR_DUPLICATE_HITS)
+    counters = dict(Counter.objects.filter(name__in=names).values_list('name', 'value'))
+    hits, misses = counters.get(CACHE_HITS, 0), counters.get(CACHE_MISSES, 0)
+    return {
+        'entries': ScanCacheEntry.objects.count(),
+        'max_entries': get_max_entries(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+        'near_duplicate_hits': counters.get(NEAR_DUPLICATE_HITS, 0),
+    }
@@ -0,0 +1,273 @@
+import json
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.ai_service import infer
+from core.model_registry import registry
+
+from . import scan_cache
+from .image_hash import MAX_DISTANCE, dhash, hamming, hash_fields, near_hash_condition
+from .models import Counter, ImageUpload, Medicine
+from .popularity import record_detection
+from .scan_cache import NEAR_DUPLICATE_HITS
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the SCAN_* settings
+DEFAULT_VISIBILITY_TIMEOUT = 120
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Seconds before the first retry of a failed scan; doubled for each later one
+RETRY_DELAY = 5
+
+# Defaults for the SCAN_NEAR_DUPLICATE_* settings
+DEFAULT_NEAR_DUPLICATE_DISTANCE = 4
+DEFAULT_NEAR_DUPLICATE_WINDOW = 10 * 60
+DEFAULT_NEAR_DUPLICATE_MIN_CONFIDENCE = 0.8
+
+# Recent scans sharing a hash chunk that are compared bit by bit
+NEAR_DUPLICATE_CANDIDATES = 50
+
+# Pending rows looked at per claim; more than one so that workers racing
+# for the oldest job fall through to the next instead of polling again
+CLAIM_CANDIDATES = 5
+
+
+def is_async():
+    return getattr(settings, 'SCAN_PROCESSING_ASYNC', False)
+
+
+def get_visibility_timeout():
+    return getattr(settings, 'SCAN_VISIBILITY_TIMEOUT', DEFAULT_VISIBILITY_TIMEOUT)
+
+
+def get_max_attempts():
+    return getattr(settings, 'SCAN_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'[:64]
+
+
+def result_fields(result):
+    """ImageUpload field values for an infer() result"""
+    medicine_code = result.get('medicine_code')
+    medicine_id = None
+    if medicine_code:
+        medicine_id = Medicine.objects.filter(code=medicine_code, is_active=True).values_list('pk', flat=True).first()
+    return {
+        'result': json.dumps(result, ensure_ascii=False),
+        'confidence': result.get('confidence', 0.0),
+        'detected_medicine_id': medicine_id,
+    }
+
+
+def get_near_duplicate_distance():
+    """SCAN_NEAR_DUPLICATE_DISTANCE, or None when the lookup is disabled"""
+    distance = getattr(settings, 'SCAN_NEAR_DUPLICATE_DISTANCE', DEFAULT_NEAR_DUPLICATE_DISTANCE)
+    if distance is None or distance < 0:
+        return None
+    if distance > MAX_DISTANCE:
+        raise ImproperlyConfigured(
+            f'SCAN_NEAR_DUPLICATE_DISTANCE must be at most {MAX_DISTANCE} bits, got {distance}'
+        )
+    return distance
+
+
+def image_dhash(image_file):
+    """Perceptual hash of an uploaded file, or None if it cannot be decoded"""
+    try:
+        return dhash(image_file)
+    except (OSError, ValueError):
+        return None
+    finally:
+        image_file.seek(0)
+
+
+def find_near_duplicate(value, model_version, exclude=None):
+    """Result of a recent confident scan within SCAN_NEAR_DUPLICATE_DISTANCE
+    bits of hash value, made by model_version; the closest wins"""
+    distance = get_near_duplicate_distance()
+    if value is None or distance is None:
+        return None
+    window = getattr(settings, 'SCAN_NEAR_DUPLICATE_WINDOW', DEFAULT_NEAR_DUPLICATE_WINDOW)
+    min_confidence = getattr(settings, 'SCAN_NEAR_DUPLICATE_MIN_CONFIDENCE', DEFAULT_NEAR_DUPLICATE_MIN_CONFIDENCE)
+
+    # Only results the model produced itself, so a reused result is never
+    # passed on again
+    candidates = ImageUpload.objects.filter(
+        near_hash_condition(value, distance),
+        created_at__gte=timezone.now() - timedelta(seconds=window),
+        status=ImageUpload.DONE,
+        cached=False,
+        confidence__gte=min_confidence,
+    ).exclude(pk=exclude).order_by('-created_at').values_list('dhash', 'confidence', 'result')
+
+    best = None
+    for other, confidence, result in candidates[:NEAR_DUPLICATE_CANDIDATES]:
+        bits = hamming(value, other)
+        if bits > distance or (best is not None and (bits, -confidence) >= best[0]):
+            continue
+        try:
+            result = json.loads(result)
+        except ValueError:
+            continue
+        if result.get('model_version') == model_version:
+            best = ((bits, -confidence), result)
+    if best is None:
+        return None
+    Counter.increment(NEAR_DUPLICATE_HITS)
+    return best[1]
+
+
+def _save_cached(serializer, result, **extra):
+    fields = result_fields(result)
+    upload = serializer.save(status=ImageUpload.DONE, cached=True, **fields, **extra)
+    if upload.detected_medicine_id:
+        record_detection(upload.detected_medicine_id)
+    return upload
+
+
+def create_upload(serializer, user, content_hash=''):
+    """Save a validated ImageUploadSerializer as a new scan.
+
+    An image already scanned with the current model version, byte for byte
+    or as a near-duplicate of a recent confident scan (see
+    find_near_duplicate), gets that result straight away (status done,
+    cached set). Otherwise it is queued, or processed here when
+    SCAN_PROCESSING_ASYNC is off; either way identical bytes reuse the
+    stored file instead of a new copy.
+    """
+    model_version = registry.wanted_version()
+    extra = {'uploaded_by': user, 'content_hash': content_hash}
+    value = image_dhash(serializer.validated_data['image'])
+    if value is not None:
+        extra.update(hash_fields(value))
+
+    if content_hash:
+        entry = scan_cache.lookup(content_hash, model_version)
+        if entry is not None:
+            return _save_cached(serializer, json.loads(entry.result), image=entry.image, **extra)
+        shared = scan_cache.existing_file(content_hash)
+        if shared:
+            extra['image'] = shared
+
+    result = find_near_duplicate(value, model_version)
+    if result is not None:
+        return _save_cached(serializer, result, **extra)
+
+    upload = serializer.save(**extra)
+    if not is_async():
+        process_upload(upload)
+    return upload
+
+
+def process_upload(upload):
+    """Run inference for upload inside the current process and save it"""
+    result = infer(upload.image.path)
+    for name, value in result_fields(result).items():
+        setattr(upload, name, value)
+    upload.status = ImageUpload.DONE
+    upload.attempts += 1
+    upload.save()
+    scan_cache.record_miss()
+    scan_cache.store(upload, upload.result, result.get('model_version'))
+    if upload.detected_medicine_id:
+        record_detection(upload.detected_medicine_id)
+
+
+def _pending(now):
+    """Jobs a worker may take: queued ones past their retry time and running
+    ones whose worker let the lease expire (crashed or stuck)"""
+    return ImageUpload.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lte=now),
+        status__in=(ImageUpload.QUEUED, ImageUpload.RUNNING),
+        attempts__lt=get_max_attempts(),
+    )
+
+
+def claim_next(worker):
+    """Lease the oldest pending job to worker; returns it or None.
+
+    The lease is taken with a conditional UPDATE, so of several workers
+    racing for a row exactly one sees it change.
+    """
+    now = timezone.now()
+    pending = _pending(now)
+    candidates = pending.order_by(F('locked_until').asc(nulls_first=True), 'id').values_list('pk', flat=True)
+    for pk in candidates[:CLAIM_CANDIDATES]:
+        claimed = pending.filter(pk=pk).update(
+            status=ImageUpload.RUNNING,
+            locked_until=now + timedelta(seconds=get_visibility_timeout()),
+            locked_by=worker,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return ImageUpload.objects.filter(pk=pk).first()
+    return None
+
+
+def fail_abandoned():
+    """Fail running jobs whose last allowed attempt lost its worker"""
+    return ImageUpload.objects.filter(
+        status=ImageUpload.RUNNING, locked_until__lte=timezone.now(), attempts__gte=get_max_attempts(),
+    ).update(status=ImageUpload.FAILED, locked_until=None, error='Worker stopped before finishing the scan')
+
+
+def run_job(upload, worker):
+    """Process a claimed job; returns True when its result was stored.
+
+    Writes only go through while worker still holds the lease, so a job
+    taken over after a timeout is never finished twice.
+    """
+    owned = ImageUpload.objects.filter(pk=upload.pk, status=ImageUpload.RUNNING, locked_by=worker)
+    try:
+        # A near-duplicate may have finished while this scan was queued
+        result = find_near_duplicate(upload.dhash, registry.wanted_version(), exclude=upload.pk)
+        cached = result is not None
+        if not cached:
+            result = infer(upload.image.path)
+        fields = result_fields(result)
+    except Exception as exc:
+        logger.exception('Scan %s failed (attempt %s)', upload.pk, upload.attempts)
+        if upload.attempts >= get_max_attempts():
+            owned.update(status=ImageUpload.FAILED, locked_until=None, error=repr(exc))
+        else:
+            retry_at = timezone.now() + timedelta(seconds=RETRY_DELAY * 2 ** (upload.attempts - 1))
+            owned.update(status=ImageUpload.QUEUED, locked_until=retry_at, error=repr(exc))
+        return False
+
+    stored = owned.update(status=ImageUpload.DONE, locked_until=None, error='', cached=cached, **fields)
+    if stored:
+        if not cached:
+            scan_cache.record_miss()
+            scan_cache.store(upload, fields['result'], result.get('model_version'))
+        if fields['detected_medicine_id']:
+            record_detection(fields['detected_medicine_id'])
+    return bool(stored)
+
+
+def run_worker(poll_interval=1.0, once=False, should_stop=lambda: False):
+    """Claim and process jobs until should_stop() (or, with once, until the
+    queue is empty); returns the number of jobs processed"""
+    worker = worker_id()
+    processed = 0
+    while not should_stop():
+        fail_abandoned()
+        upload = claim_next(worker)
+        if upload is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(upload, worker)
+        processed += 1
+    return processed
@@ -0,0 +1,255 @@
+from django.db import connection
+from django.db.models import Case, Count, IntegerField, When
+
+from core.text import edit_distance, normalize_text, tokenize, trigrams
+
+# Medicine fields covered by the token index (same set the search view used to scan)
+SEARCH_FIELDS = ('code', 'name_ar', 'name_en', 'scientific_name', 'active_ingredients', 'alternatives')
+
+MAX_TERM_LENGTH = 100
+
+# Name fields covered by the trigram index for fuzzy matching
+FUZZY_FIELDS = ('name_en', 'name_ar', 'scientific_name')
+
+# How many trigram-overlap candidates are reranked by edit distance. Bounds
+# the Python work per request regardless of catalog size.
+FUZZY_CANDIDATES = 100
+
+# Maximum edit distance accepted, as a fraction of the query length
+FUZZY_MAX_DISTANCE_RATIO = 0.4
+
+# Candidates are generated from the query's rarest trigrams, adding them
+# while their index postings total at most FUZZY_MAX_POSTINGS (but at least
+# FUZZY_MIN_GRAMS of them). Common trigrams (" pa", "ine", "ال") barely tell
+# names apart, and skipping them keeps the aggregation bounded as the
+# catalog grows; see the benchmark_fuzzy_search command.
+FUZZY_MAX_POSTINGS = 20000
+FUZZY_MIN_GRAMS = 4
+
+# SQLite FTS5 mirror of the catalog: (column, source fields, bm25 weight).
+# Name matches outrank ingredient matches, which outrank descriptions and
+# side effects.
+FTS_TABLE = 'api_medicine_fts'
+FTS_COLUMNS = (
+    ('names', ('name_ar', 'name_en'), 10.0),
+    ('code', ('code',), 8.0),
+    ('ingredients', ('scientific_name', 'active_ingredients'), 5.0),
+    ('alternatives', ('alternatives',), 3.0),
+    ('description', ('description_ar', 'description_en'), 1.0),
+    ('safety', ('side_effects', 'warnings'), 0.5),
+)
+
+# Sorts after every other character, so [term, term + PREFIX_END) is a prefix range
+PREFIX_END = '\U0010ffff'
+
+
+def _ranked(queryset, ids):
+    """Restrict queryset to ids, keeping the order of ids"""
+    if not ids:
+        return queryset.none()
+    rank = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(rank)
+
+
+def _index_text(medicine, fields):
+    """Normalized words of the given fields, plus Arabic words without the
+    definite article so "كبد" also finds "الكبد"."""
+    words = []
+    for field in fields:
+        for token in tokenize(getattr(medicine, field, '') or ''):
+            words.append(token)
+            if token.startswith('ال') and len(token) > 4:
+                words.append(token[2:])
+    return ' '.join(words)
+
+
+def medicine_terms(medicine) -> set:
+    """Return the set of index terms for a medicine instance"""
+    return {term[:MAX_TERM_LENGTH] for term in _index_text(medicine, SEARCH_FIELDS).split()}
+
+
+def index_medicines(medicines, batch_size=1000):
+    """Rebuild the search tokens of the given medicines in bulk"""
+    from .models import MedicineSearchToken
+
+    medicines = list(medicines)
+    MedicineSearchToken.objects.filter(medicine_id__in=[m.pk for m in medicines]).delete()
+    MedicineSearchToken.objects.bulk_create(
+        [
+            MedicineSearchToken(term=term, medicine_id=medicine.pk)
+            for medicine in medicines
+            for term in medicine_terms(medicine)
+        ],
+        batch_size=batch_size,
+    )
+
+
+_fts_available = None
+
+
+def fts_available():
+    """Whether the FTS5 table exists on the default database"""
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available
+
+
+def fts_index_medicines(medicines):
+    """Mirror the given medicines into the FTS5 table"""
+    medicines = list(medicines)
+    if not medicines:
+        return
+    columns = ', '.join(name for name, _, _ in FTS_COLUMNS)
+    placeholders = ', '.join(['%s'] * (len(FTS_COLUMNS) + 1))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(m.pk,) for m in medicines])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES ({placeholders})',
+            [
+                [m.pk] + [_index_text(m, fields) for _, fields, _ in FTS_COLUMNS]
+                for m in medicines
+            ],
+        )
+
+
+def fts_delete_medicine(pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def ranked_search_medicines(queryset, query, limit=20):
+    """Search with FTS5 and order hits by weighted bm25 relevance.
+
+    Falls back to search_medicines() (name ordering) when the database has
+    no FTS5 table.
+    """
+    if not fts_available():
+        return search_medicines(queryset, query)[:limit]
+
+    words = set(tokenize(query))
+    if not words:
+        return queryset.none()
+    match = ' '.join(f'"{word}"*' for word in words)
+    weights = ', '.join(str(weight) for _, _, weight in FTS_COLUMNS)
+    # Hits are limited to the rows of queryset (active, region...) before ranking
+    allowed, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid IN ({allowed}) '
+            f'ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s',
+            [match, *params, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    return _ranked(queryset, ids)
+
+
+def search_medicines(queryset, query):
+    """Filter a Medicine queryset to rows matching every word of query.
+
+    Each query word is matched as a prefix of an index term, so partial
+    typing ("panad") still finds "Panadol". Returns an empty queryset when
+    the query has no searchable words.
+    """
+    from .models import MedicineSearchToken
+
+    words = set(tokenize(query))
+    if not words:
+        return queryset.none()
+    for word in words:
+        word = word[:MAX_TERM_LENGTH]
+        matching = MedicineSearchToken.objects.filter(
+            term__gte=word, term__lt=word + PREFIX_END
+        ).values('medicine_id')
+        queryset = queryset.filter(pk__in=matching)
+    return queryset
+
+
+def medicine_trigrams(medicine) -> set:
+    grams = set()
+    for field in FUZZY_FIELDS:
+        grams |= trigrams(getattr(medicine, field, '') or '')
+    return grams
+
+
+def index_trigrams(medicines, batch_size=1000):
+    """Rebuild the name trigrams of the given medicines in bulk"""
+    from .models import MedicineTrigram
+
+    medicines = list(medicines)
+    MedicineTrigram.objects.filter(medicine_id__in=[m.pk for m in medicines]).delete()
+    MedicineTrigram.objects.bulk_create(
+        [
+            MedicineTrigram(gram=gram, medicine_id=medicine.pk)
+            for medicine in medicines
+            for gram in medicine_trigrams(medicine)
+        ],
+        batch_size=batch_size,
+    )
+
+
+def _name_distance(query, medicine, max_distance):
+    """Smallest edit distance between query and a name or a word of a name"""
+    best = max_distance + 1
+    for field in FUZZY_FIELDS:
+        name = normalize_text(getattr(medicine, field, '') or '')
+        for candidate in [name] + name.split():
+            best = min(best, edit_distance(query, candidate, max_distance))
+            if best == 0:
+                return 0
+    return best
+
+
+def fuzzy_search_medicines(queryset, query, limit=20):
+    """Typo-tolerant name search.
+
+    Candidates come from the trigram index (the medicines sharing the most
+    of the query's rarest trigrams, see FUZZY_MAX_POSTINGS), then are
+    reranked by edit distance to the closest name and dropped if too far
+    off.
+    """
+    from .models import MedicineTrigram
+
+    grams = trigrams(query)
+    normalized = ' '.join(tokenize(query))
+    if not grams:
+        return queryset.none()
+
+    # Counted on the (gram, medicine) index alone, without touching medicines
+    frequency = dict(
+        MedicineTrigram.objects.filter(gram__in=grams)
+        .values('gram').annotate(medicines=Count('id')).values_list('gram', 'medicines')
+    )
+    selected, postings = [], 0
+    for gram in sorted(frequency, key=lambda gram: (frequency[gram], gram)):
+        if len(selected) >= FUZZY_MIN_GRAMS and postings + frequency[gram] > FUZZY_MAX_POSTINGS:
+            break
+        selected.append(gram)
+        postings += frequency[gram]
+    if not selected:
+        return queryset.none()
+
+    # Also index-only: inactive medicines are dropped by queryset below
+    candidates = (
+        MedicineTrigram.objects
+        .filter(gram__in=selected)
+        .values('medicine_id')
+        .annotate(overlap=Count('id'))
+        .order_by('-overlap')[:FUZZY_CANDIDATES]
+    )
+    overlap = {row['medicine_id']: row['overlap'] for row in candidates}
+    if not overlap:
+        return queryset.none()
+
+    max_distance = max(1, int(len(normalized) * FUZZY_MAX_DISTANCE_RATIO))
+    scored = []
+    for medicine in queryset.filter(pk__in=overlap).only('pk', *FUZZY_FIELDS):
+        distance = _name_distance(normalized, medicine, max_distance)
+        if distance <= max_distance:
+            scored.append((distance, -overlap[medicine.pk], medicine.pk))
+    scored.sort()
+    return _ranked(queryset, [pk for _, _, pk in scored[:limit]])
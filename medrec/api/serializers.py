@@ -2,6 +2,113 @@ from rest_framework import serializers
 from .models import ImageUpload, Medicine
 
 
+def parse_field_list(value):
+    """Parse "a,b,nested.c" into {'a': {}, 'b': {}, 'nested': {'c': {}}}.
+
+    An empty dict means "the whole field"; a non-empty one selects fields of
+    a nested serializer.
+    """
+    tree = {}
+    for path in (value or '').split(','):
+        parts = [part.strip() for part in path.split('.') if part.strip()]
+        node = tree
+        for part in parts:
+            node = node.setdefault(part, {})
+    return tree
+
+
+def apply_field_selection(serializer, fields=None, omit=None):
+    """Drop serializer fields not listed in fields, or listed in omit.
+
+    Both are trees from parse_field_list(). Unknown names are ignored.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    if fields:
+        for name in list(serializer.fields):
+            if name not in fields:
+                serializer.fields.pop(name)
+            elif fields[name] and isinstance(serializer.fields[name], serializers.BaseSerializer):
+                apply_field_selection(serializer.fields[name], fields=fields[name])
+    for name, nested in (omit or {}).items():
+        if name not in serializer.fields:
+            continue
+        if not nested:
+            serializer.fields.pop(name)
+        elif isinstance(serializer.fields[name], serializers.BaseSerializer):
+            apply_field_selection(serializer.fields[name], omit=nested)
+
+
+def serializer_projection(serializer):
+    """Model field paths needed to render the serializer's current fields.
+
+    Returns (only_fields, select_related), or None when a field's source
+    cannot be determined and every column has to be loaded.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    sources = getattr(serializer.Meta, 'projection_sources', {})
+    only, related = ['id'], []
+    for name, field in serializer.fields.items():
+        if name in sources:
+            only.extend(sources[name])
+        elif isinstance(field, serializers.BaseSerializer):
+            nested = serializer_projection(field)
+            if nested is None:
+                return None
+            source = field.source.replace('.', '__')
+            related.append(source)
+            related.extend(f'{source}__{path}' for path in nested[1])
+            only.append(source)
+            only.extend(f'{source}__{path}' for path in nested[0])
+        elif isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+            return None
+        else:
+            only.append(field.source.replace('.', '__'))
+    return only, related
+
+
+# DRF fields whose to_representation() returns database values unchanged
+_PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField)
+
+
+def values_row_plan(serializer):
+    """Precompute how to render ``.values()`` rows with a serializer's fields.
+
+    Returns a list of (output name, column, converter) where converter is
+    None for pass-through fields, or None if a field needs a model instance
+    (method, nested, relational, file or dotted-source fields).
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    plan = []
+    for name, field in serializer.fields.items():
+        if (
+            field.source == '*' or '.' in field.source
+            or isinstance(field, (
+                serializers.SerializerMethodField, serializers.BaseSerializer,
+                serializers.RelatedField, serializers.ManyRelatedField, serializers.FileField,
+            ))
+        ):
+            return None
+        converter = None if type(field) in _PASSTHROUGH_FIELDS else field.to_representation
+        plan.append((name, field.source, converter))
+    return plan
+
+
+def render_values_rows(rows, plan):
+    """Render ``.values()`` dicts exactly as the planned serializer would
+    render the corresponding instances."""
+    data = []
+    for row in rows:
+        item = {}
+        for name, column, converter in plan:
+            value = row[column]
+            item[name] = value if converter is None or value is None else converter(value)
+        data.append(item)
+    return data
+
+
 class MedicineSerializer(serializers.ModelSerializer):
     """Serializer for Medicine model"""
     image_url = serializers.SerializerMethodField()
@@ -18,6 +125,8 @@ class MedicineSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         )
         read_only_fields = ('created_at', 'updated_at')
+        # Columns read by method fields, for ?fields= projection
+        projection_sources = {'image_url': ('image',)}
 
     def get_image_url(self, obj):
         request = self.context.get('request')
@@ -33,6 +142,17 @@ class MedicineListSerializer(serializers.ModelSerializer):
         fields = ('id', 'code', 'name_ar', 'name_en', 'category', 'price', 'active_ingredients', 'concentration')
 
 
+class MedicineAlternativeSerializer(MedicineListSerializer):
+    """Medicine listing with the score and reason of its alternative edge"""
+    score = serializers.FloatField(read_only=True)
+    reason = serializers.CharField(read_only=True)
+
+    class Meta(MedicineListSerializer.Meta):
+        fields = MedicineListSerializer.Meta.fields + ('score', 'reason')
+        # Annotations, not columns
+        projection_sources = {'score': (), 'reason': ()}
+
+
 class ImageUploadSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
     medicine_details = MedicineSerializer(source='detected_medicine', read_only=True)
@@ -41,9 +161,12 @@ class ImageUploadSerializer(serializers.ModelSerializer):
         model = ImageUpload
         fields = (
             'id', 'image', 'image_url', 'detected_medicine',
-            'medicine_details', 'confidence', 'result', 'created_at'
+            'medicine_details', 'confidence', 'result', 'status', 'attempts', 'error', 'cached', 'created_at'
+        )
+        read_only_fields = (
+            'detected_medicine', 'confidence', 'result', 'status', 'attempts', 'error', 'cached', 'created_at'
         )
-        read_only_fields = ('detected_medicine', 'confidence', 'result', 'created_at')
+        projection_sources = {'image_url': ('image',)}
 
     def get_image_url(self, obj):
         request = self.context.get('request')
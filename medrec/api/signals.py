@@ -0,0 +1,141 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .alternatives import refresh_alternatives
+from .autocomplete import autocomplete_index
+from .catalog import bump_catalog_version
+from .effects import EFFECT_SOURCES, index_effects
+from .ingredients import index_ingredients
+from .models import Medicine, MedicineChange, Region
+from .regions import index_regions
+from .search import (
+    FTS_COLUMNS,
+    FUZZY_FIELDS,
+    SEARCH_FIELDS,
+    fts_available,
+    fts_delete_medicine,
+    fts_index_medicines,
+    index_medicines,
+    index_trigrams,
+)
+from .similarity import index_minhash
+
+REINDEX_BATCH_SIZE = 500
+
+# Medicine fields the derived indexes are built from. A save whose
+# update_fields touch none of them (price, image, ...) skips the reindex.
+INDEXED_FIELDS = frozenset({
+    *SEARCH_FIELDS,
+    *FUZZY_FIELDS,
+    *(field for _, fields, _ in FTS_COLUMNS for field in fields),
+    *EFFECT_SOURCES,
+    'concentration',
+    'region_availability',
+    'is_active',
+})
+
+_state = threading.local()
+
+
+def _index(medicines):
+    medicines = list(medicines)
+    autocomplete_index.invalidate()
+    index_medicines(medicines)
+    index_trigrams(medicines)
+    index_effects(medicines)
+    index_ingredients(medicines)
+    index_regions(medicines)
+    index_minhash(medicines)
+    refresh_alternatives([m.pk for m in medicines])
+    if fts_available():
+        fts_index_medicines(medicines)
+
+
+def reindex_medicines(pks):
+    """Refresh every derived index for the medicines with the given pks"""
+    pks = sorted(pks)
+    for start in range(0, len(pks), REINDEX_BATCH_SIZE):
+        medicines = Medicine.objects.filter(pk__in=pks[start:start + REINDEX_BATCH_SIZE])
+        _index(medicines)
+    bump_catalog_version()
+
+
+@contextmanager
+def deferred_indexing():
+    """Collect Medicine saves and reindex them in bulk when the block exits.
+
+    Used by the import commands so a CSV import costs one bulk index pass
+    and one bulk change-log insert instead of per-row work.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+    _state.pending = set()
+    _state.changes = []
+    try:
+        yield
+    finally:
+        pending, _state.pending = _state.pending, None
+        changes, _state.changes = _state.changes, None
+        MedicineChange.objects.bulk_create(changes, batch_size=1000)
+        if pending:
+            reindex_medicines(pending)
+        elif changes:
+            bump_catalog_version()
+
+
+def _log_change(change):
+    if getattr(_state, 'pending', None) is not None:
+        _state.changes.append(change)
+    else:
+        change.save()
+
+
+@receiver(post_save, sender=Medicine)
+def medicine_saved(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        action = MedicineChange.CREATED
+    elif not instance.is_active:
+        action = MedicineChange.DEACTIVATED
+    else:
+        action = MedicineChange.UPDATED
+    _log_change(MedicineChange(medicine_id=instance.pk, code=instance.code, action=action))
+
+    pending = getattr(_state, 'pending', None)
+    if update_fields is not None and not INDEXED_FIELDS.intersection(update_fields):
+        # The indexes are unchanged, but responses show the new values
+        if pending is None:
+            bump_catalog_version()
+    elif pending is not None:
+        pending.add(instance.pk)
+    else:
+        _index([instance])
+        bump_catalog_version()
+
+
+@receiver(post_delete, sender=Medicine)
+def medicine_deleted(sender, instance, **kwargs):
+    _log_change(MedicineChange(medicine_id=instance.pk, code=instance.code, action=MedicineChange.DELETED))
+    autocomplete_index.invalidate()
+    if fts_available():
+        fts_delete_medicine(instance.pk)
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+def region_saved(sender, raw=False, **kwargs):
+    # Region filters and facets read groupings from this table
+    if not raw:
+        bump_catalog_version()
+
+
+@receiver(m2m_changed, sender=Region.members.through)
+def region_members_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_catalog_version()
@@ -0,0 +1,105 @@
+import random
+from hashlib import blake2b
+
+from django.db.models import Count
+
+# MinHash signature length, split into LSH bands of BAND_ROWS values. Two
+# medicines become candidates when any band matches, which happens with
+# probability 1 - (1 - J^BAND_ROWS)^BANDS for Jaccard similarity J:
+# ~0.99 at J=0.5 and ~0.78 at J=0.3.
+BANDS = 16
+BAND_ROWS = 2
+NUM_HASHES = BANDS * BAND_ROWS
+
+# How many bucket-collision candidates are scored by exact Jaccard. Bounds
+# the work per request regardless of catalog size.
+SIMILAR_CANDIDATES = 2000
+
+DEFAULT_THRESHOLD = 0.5
+
+# reason reported for similarity-ranked alternatives
+SIMILAR_REASON = 'similar'
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+# Fixed seed: stored buckets must stay comparable across processes and restarts
+_HASHES = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+
+
+def minhash_signature(ingredient_ids):
+    """MinHash signature of a set of ingredient ids"""
+    return tuple(min((a * x + b) % _PRIME for x in ingredient_ids) for a, b in _HASHES)
+
+
+def lsh_buckets(signature):
+    """One bucket key per band; the band number is part of the key"""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * BAND_ROWS:(band + 1) * BAND_ROWS]
+        digest = blake2b(repr((band,) + rows).encode(), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _ingredient_sets(pks):
+    from .models import MedicineIngredient
+
+    sets = {}
+    for medicine_id, ingredient_id in MedicineIngredient.objects.filter(medicine_id__in=pks).values_list(
+        'medicine_id', 'ingredient_id'
+    ).iterator():
+        sets.setdefault(medicine_id, set()).add(ingredient_id)
+    return sets
+
+
+def index_minhash(medicines, batch_size=1000):
+    """Rebuild the LSH buckets of the given medicines from their ingredient links"""
+    from .models import MedicineMinHashBucket
+
+    pks = [medicine.pk for medicine in medicines]
+    sets = _ingredient_sets(pks)
+    MedicineMinHashBucket.objects.filter(medicine_id__in=pks).delete()
+    MedicineMinHashBucket.objects.bulk_create(
+        [
+            MedicineMinHashBucket(bucket=bucket, medicine_id=pk)
+            for pk, ingredient_ids in sets.items()
+            for bucket in lsh_buckets(minhash_signature(ingredient_ids))
+        ],
+        batch_size=batch_size,
+    )
+
+
+def similar_medicines(queryset, medicine, threshold=DEFAULT_THRESHOLD, limit=50):
+    """Medicines whose ingredient sets have Jaccard similarity >= threshold
+    with medicine's, most similar first, as (pk, similarity) pairs.
+
+    Candidates are the medicines sharing the most LSH buckets with it; only
+    those are compared exactly.
+    """
+    from .models import MedicineMinHashBucket
+
+    base = _ingredient_sets([medicine.pk]).get(medicine.pk)
+    if not base:
+        return []
+    candidates = (
+        MedicineMinHashBucket.objects
+        .filter(bucket__in=lsh_buckets(minhash_signature(base)))
+        .exclude(medicine_id=medicine.pk)
+        .values('medicine_id')
+        .annotate(hits=Count('id'))
+        .order_by('-hits')[:SIMILAR_CANDIDATES]
+    )
+    pks = queryset.filter(pk__in=[row['medicine_id'] for row in candidates]).values_list('pk', flat=True)
+    scored = [
+        (round(jaccard(base, ingredient_ids), 4), pk)
+        for pk, ingredient_ids in _ingredient_sets(list(pks)).items()
+    ]
+    scored = [(score, pk) for score, pk in scored if score >= threshold]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [(pk, score) for score, pk in scored[:limit]]
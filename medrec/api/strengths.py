@@ -0,0 +1,166 @@
+import math
+import re
+from collections import defaultdict
+
+from core.text import normalize_text
+
+# Amount units -> (canonical unit, factor to it)
+AMOUNT_UNITS = {
+    'mg': ('mg', 1), 'ملجم': ('mg', 1), 'مجم': ('mg', 1), 'ملغ': ('mg', 1),
+    'g': ('mg', 1000), 'gm': ('mg', 1000), 'جم': ('mg', 1000), 'جرام': ('mg', 1000),
+    'mcg': ('mg', 0.001), 'μg': ('mg', 0.001), 'ug': ('mg', 0.001), 'ميكروجرام': ('mg', 0.001),
+    'kg': ('mg', 1000000),
+    'iu': ('iu', 1), 'unit': ('iu', 1), 'units': ('iu', 1), 'وحده': ('iu', 1),
+    'ml': ('ml', 1), 'مل': ('ml', 1), 'l': ('ml', 1000), 'لتر': ('ml', 1000),
+    '%': ('%', 1),
+}
+
+# Units a strength can be "per", e.g. 250mg/5ml
+PER_UNITS = {
+    'ml': ('ml', 1), 'مل': ('ml', 1), 'l': ('ml', 1000), 'لتر': ('ml', 1000),
+    'g': ('g', 1), 'gm': ('g', 1), 'جم': ('g', 1),
+}
+
+_UNIT_PATTERN = '|'.join(sorted(map(re.escape, AMOUNT_UNITS), key=len, reverse=True))
+_PER_PATTERN = '|'.join(sorted(map(re.escape, PER_UNITS), key=len, reverse=True))
+# Amounts take "." or "," as the decimal separator ("1,5 g"), and never
+# start inside another number
+_AMOUNT = r'(?<![\d.,])\d+(?:[.,]\d+)?'
+_STRENGTH_RE = re.compile(
+    rf'({_AMOUNT})\s*({_UNIT_PATTERN})(?!\w)'
+    rf'(?:\s*/\s*({_AMOUNT})?\s*({_PER_PATTERN})(?!\w))?'
+)
+# "1,500" may be a thousands separator or a decimal comma
+_AMBIGUOUS_COMMA_RE = re.compile(r'^[1-9]\d*,\d{3}$')
+
+MAX_UNIT_LENGTH = 8
+
+# Distinct strength strings remembered by parse_link_strengths
+MAX_CACHED_STRENGTHS = 10000
+
+
+def _parse_amount(text):
+    """Float value of an amount, or None when its comma is ambiguous"""
+    if _AMBIGUOUS_COMMA_RE.match(text):
+        return None
+    return float(text.replace(',', '.'))
+
+
+def parse_strength(text):
+    """Canonical (value, unit) of a strength string, or (None, '').
+
+    Amounts are converted to mg, IU or ml and concentrations to a per-1 ml
+    or per-1 g value: "1g" -> (1000.0, 'mg'), "250mg/5ml" -> (50.0, 'mg/ml'),
+    "1000 IU" -> (1000.0, 'iu'), "1,5 g" -> (1500.0, 'mg'). Only the first
+    strength in text is used. "1,500 mg" could mean 1.5 or 1500 mg and is
+    left unparsed.
+    """
+    match = _STRENGTH_RE.search(normalize_text(text or ''))
+    if not match:
+        return None, ''
+    amount, unit, per_amount, per_unit = match.groups()
+    amount = _parse_amount(amount)
+    per_amount = _parse_amount(per_amount) if per_amount else 1
+    if amount is None or per_amount is None:
+        return None, ''
+    unit, factor = AMOUNT_UNITS[unit]
+    value = amount * factor
+    if per_unit:
+        per_unit, per_factor = PER_UNITS[per_unit]
+        per_amount = per_amount * per_factor
+        if not per_amount:
+            return None, ''
+        value, unit = value / per_amount, f'{unit}/{per_unit}'
+    return round(value, 6), unit[:MAX_UNIT_LENGTH]
+
+
+def strength_key(value, unit, raw=''):
+    """Comparable form of a strength: canonical when parsed, else the text"""
+    if value is not None:
+        return (value, unit)
+    return ('', raw.replace(' ', '').lower())
+
+
+def convert_range(minimum, maximum, unit='mg'):
+    """Convert a client range like (0.5, 1, 'g') to canonical units.
+
+    Returns (minimum, maximum, canonical unit); bounds may be None. Raises
+    ValueError for unknown units or non-numeric bounds.
+    """
+    unit = normalize_text(unit or 'mg').replace(' ', '')
+    amount_unit, _, per_unit = unit.partition('/')
+    if amount_unit not in AMOUNT_UNITS or (per_unit and per_unit not in PER_UNITS):
+        raise ValueError(f'Unknown unit: {unit}')
+    canonical, factor = AMOUNT_UNITS[amount_unit]
+    if per_unit:
+        per_canonical, per_factor = PER_UNITS[per_unit]
+        canonical, factor = f'{canonical}/{per_canonical}', factor / per_factor
+    bounds = []
+    for bound in (minimum, maximum):
+        if bound in (None, ''):
+            bounds.append(None)
+            continue
+        try:
+            value = float(bound)
+        except (TypeError, ValueError):
+            value = math.nan
+        if not math.isfinite(value):
+            raise ValueError(f'Not a number: {bound}')
+        bounds.append(round(value * factor, 6))
+    return bounds[0], bounds[1], canonical
+
+
+def parse_link_strengths(batch_size=2000, only_missing=False):
+    """Fill strength_value/strength_unit of ingredient links in bulk.
+
+    Walks the table in primary key order, so it runs in constant memory.
+    Rows of a batch are grouped by their parsed strength and each group is
+    written with one UPDATE, as catalogs repeat a few hundred strengths
+    across millions of links. Returns the number of links with a parsed
+    strength.
+    """
+    from .models import MedicineIngredient
+
+    links = MedicineIngredient.objects.exclude(strength='')
+    if only_missing:
+        links = links.filter(strength_value__isnull=True)
+    cache = {}
+    parsed = 0
+    last_pk = 0
+    while True:
+        rows = list(links.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'strength')[:batch_size])
+        if not rows:
+            return parsed
+        if len(cache) > MAX_CACHED_STRENGTHS:
+            cache.clear()
+        groups = defaultdict(list)
+        for pk, strength in rows:
+            if strength not in cache:
+                cache[strength] = parse_strength(strength)
+            groups[cache[strength]].append(pk)
+        for (value, unit), pks in groups.items():
+            # Unparseable strengths are written too, clearing stale values
+            if value is not None or not only_missing:
+                MedicineIngredient.objects.filter(pk__in=pks).update(strength_value=value, strength_unit=unit)
+            if value is not None:
+                parsed += len(pks)
+        last_pk = rows[-1][0]
+
+
+def filter_by_strength(queryset, minimum, maximum, unit, links=None):
+    """Medicines of queryset with an ingredient strength within the bounds.
+
+    Bounds are canonical (see convert_range) and inclusive; either may be
+    None. links narrows the ingredient links considered, e.g. to one
+    ingredient, so the range applies to that ingredient's strength.
+    """
+    if links is None:
+        from .models import MedicineIngredient
+
+        links = MedicineIngredient.objects.all()
+    links = links.filter(strength_unit=unit)
+    if minimum is not None:
+        links = links.filter(strength_value__gte=minimum)
+    if maximum is not None:
+        links = links.filter(strength_value__lte=maximum)
+    return queryset.filter(pk__in=links.values('medicine_id'))
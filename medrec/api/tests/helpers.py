@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.models import Medicine
+from api.popularity import view_counter
+
+
+def make_medicine(code, **fields):
+    defaults = {
+        'name_ar': f'دواء {code}',
+        'name_en': f'Medicine {code}',
+        'category': 'مسكنات',
+        'manufacturer': 'Pharco',
+        'price': '20.00',
+    }
+    defaults.update(fields)
+    return Medicine.objects.create(code=code, **defaults)
+
+
+class APITestMixin:
+    """Authenticated API client; caches keyed on the catalog version are
+    cleared because the version counter restarts in every test, and views
+    buffered by detail requests are written before the test's rows go"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(view_counter.flush)
+        self.user = User.objects.create_user('tester', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
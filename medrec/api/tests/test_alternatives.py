@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from api.alternatives import rebuild_alternatives
+from api.models import MedicineAlternative
+
+from .helpers import APITestMixin, make_medicine
+
+
+class AlternativesGraphTests(APITestMixin, TestCase):
+    """The alternatives graph, kept up to date on save and rebuilt in bulk"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('PAN', name_en='Panadol', active_ingredients='Paracetamol', concentration='500mg')
+        make_medicine('ADO', name_en='Adol', active_ingredients='Paracetamol', concentration='0.5 g',
+                      alternatives='Panadol')
+        make_medicine('CET', name_en='Cetal', active_ingredients='Paracetamol', concentration='1 g')
+        make_medicine('IBU', name_en='Brufen', active_ingredients='Ibuprofen', concentration='400mg',
+                      alternatives='Panadol')
+        make_medicine('MIX', name_en='Panadol Extra', active_ingredients='Paracetamol, Caffeine',
+                      concentration='500mg, 65mg')
+
+    def edges(self):
+        return sorted(MedicineAlternative.objects.values_list('source__code', 'target__code', 'reason', 'same_strength'))
+
+    def alternatives(self, code, **params):
+        response = self.client.get(f'/api/medicines/{code}/alternatives/', params)
+        self.assertEqual(response.status_code, 200)
+        return [(item['code'], item['score'], item['reason']) for item in response.json()]
+
+    def test_best_first(self):
+        self.assertEqual(self.alternatives('ADO'), [
+            ('PAN', 1.0, 'both'),
+            ('CET', 0.5, 'ingredients'),
+        ])
+        # Named in the alternatives text only
+        self.assertEqual(self.alternatives('IBU'), [('PAN', 0.3, 'listed')])
+
+    def test_equivalent_only(self):
+        self.assertEqual(self.alternatives('PAN', equivalent=1), [('ADO', 0.7, 'ingredients')])
+        self.assertEqual(self.alternatives('CET', equivalent=1), [])
+
+    def test_rebuild_matches_incremental(self):
+        incremental = self.edges()
+        MedicineAlternative.objects.all().delete()
+        self.assertEqual(rebuild_alternatives(), len(incremental))
+        self.assertEqual(self.edges(), incremental)
+
+    def test_edits_update_both_directions(self):
+        medicine = make_medicine('NEW', name_en='Novaldol', active_ingredients='Paracetamol', concentration='500mg')
+        self.assertIn(('PAN', 'NEW', 'ingredients', True), self.edges())
+        medicine.active_ingredients = 'Ibuprofen'
+        medicine.concentration = '400mg'
+        medicine.save()
+        self.assertNotIn('NEW', [target for _, target, _ in self.alternatives('PAN')])
+        self.assertIn(('IBU', 'NEW', 'ingredients', True), self.edges())
+
+    def test_deactivated_medicines_drop_out(self):
+        medicine = make_medicine('OFF', active_ingredients='Paracetamol', concentration='500mg')
+        medicine.is_active = False
+        medicine.save(update_fields=['is_active'])
+        self.assertFalse(MedicineAlternative.objects.filter(target__code='OFF').exists())
+
+    def test_unindexed_update_skips_reindex(self):
+        medicine = make_medicine('PRC', active_ingredients='Paracetamol')
+        etag = self.client.get('/api/medicines/')['ETag']
+        with mock.patch('api.signals._index') as index:
+            medicine.price = '99.00'
+            medicine.save(update_fields=['price'])
+            index.assert_not_called()
+            medicine.name_en = 'Renamed'
+            medicine.save(update_fields=['name_en'])
+            index.assert_called_once()
+        # The new price is served, so cached representations are stale
+        self.assertEqual(self.client.get('/api/medicines/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
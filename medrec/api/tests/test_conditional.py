@@ -0,0 +1,53 @@
+from django.test import TestCase
+
+from api.models import Medicine
+
+from .helpers import APITestMixin, make_medicine
+
+
+class CatalogConditionalTests(APITestMixin, TestCase):
+    """ETag / Last-Modified validators follow the catalog version"""
+
+    def setUp(self):
+        super().setUp()
+        self.medicine = make_medicine('C1')
+
+    def test_matching_etag_is_not_modified(self):
+        first = self.client.get('/api/medicines/')
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+
+        second = self.client.get('/api/medicines/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], etag)
+        self.assertEqual(second.content, b'')
+
+    def test_catalog_change_invalidates_etag(self):
+        etag = self.client.get('/api/medicines/')['ETag']
+        self.medicine.name_en = 'Renamed'
+        self.medicine.save()
+
+        response = self.client.get('/api/medicines/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_varies_with_representation(self):
+        plain = self.client.get('/api/medicines/')['ETag']
+        projected = self.client.get('/api/medicines/', {'fields': 'code'})['ETag']
+        detail = self.client.get('/api/medicines/C1/')['ETag']
+        self.assertEqual(len({plain, projected, detail}), 3)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get('/api/medicines/C1/')['Last-Modified']
+        response = self.client.get('/api/medicines/C1/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_errors_carry_no_validators(self):
+        response = self.client.get('/api/medicines/MISSING/')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_queryset_update_needs_explicit_bump(self):
+        etag = self.client.get('/api/medicines/')['ETag']
+        Medicine.objects.filter(pk=self.medicine.pk).update(name_en='Silent')
+        self.assertEqual(self.client.get('/api/medicines/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
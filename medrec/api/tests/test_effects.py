@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase, TestCase
+
+from api.effects import effect_terms, light_stem
+
+from .helpers import APITestMixin, make_medicine
+
+
+class EffectTermTests(SimpleTestCase):
+    """Stemming and synonyms fold spellings onto one index term"""
+
+    def test_arabic_clitics(self):
+        self.assertEqual({light_stem(word) for word in ('بالكبد', 'الكبد', 'كبد')}, {'كبد'})
+
+    def test_synonyms_and_stopwords(self):
+        self.assertEqual(effect_terms('Dizziness and drowsy'), ['dizziness', 'drowsiness'])
+        self.assertEqual(effect_terms('يسبب الدوخة'), effect_terms('يسبب dizziness'))
+
+    def test_negations_are_not_indexed(self):
+        self.assertEqual(effect_terms('Do not drive'), effect_terms('Do drive'))
+
+
+class EffectQueryTests(APITestMixin, TestCase):
+    """medicines/effect/ and medicines/effects/ over the term index"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('E1', side_effects='Drowsiness, dizziness', warnings='Do not drive')
+        make_medicine('E2', side_effects='Nausea', warnings='يمنع استخدامه لمرضى الكبد')
+        make_medicine('E3', side_effects='الدوخة والنعاس')
+
+    def codes(self, path, **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(item['code'] for item in response.json()['results'])
+
+    def test_single_effect_in_either_language(self):
+        self.assertEqual(self.codes('/api/medicines/effect/drowsiness/'), ['E1', 'E3'])
+        self.assertEqual(self.codes('/api/medicines/effect/نعاس/'), ['E1', 'E3'])
+        self.assertEqual(self.codes('/api/medicines/effect/liver/'), ['E2'])
+
+    def test_combined_query(self):
+        self.assertEqual(self.codes('/api/medicines/effects/', all='dizziness', none='drowsiness'), [])
+        self.assertEqual(self.codes('/api/medicines/effects/', any='nausea,dizziness', none='side_effects:drowsy'), ['E2'])
+        self.assertEqual(self.codes('/api/medicines/effects/', none='drowsiness,warnings:liver'), [])
+
+    def test_negated_effect_is_rejected(self):
+        for path, params in (
+            ('/api/medicines/effect/no drowsiness/', {}),
+            ('/api/medicines/effect/بدون نعاس/', {}),
+            ('/api/medicines/effects/', {'all': 'not dizzy'}),
+            ('/api/medicines/effects/', {'none': 'no nausea'}),
+        ):
+            response = self.client.get(path, params)
+            self.assertEqual(response.status_code, 400, path)
+            self.assertIn('?none=', response.json()['detail'])
@@ -0,0 +1,96 @@
+from django.test import TestCase
+
+from api.facets import compute_facets
+from api.models import Medicine, Region
+from api.regions import region_table
+
+from .helpers import APITestMixin, make_medicine
+
+
+class FacetFilterAgreementTests(APITestMixin, TestCase):
+    """Each facet count equals what filtering on that value returns"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('F1', category='Analgesic', manufacturer='GSK', price='10', region_availability='مصر')
+        make_medicine('F2', category=' analgesic ', manufacturer='gsk', price='30', region_availability='السعودية')
+        make_medicine('F3', category='Antibiotic', manufacturer='Pfizer', price='150', region_availability='دول الخليج')
+        make_medicine('F4', category='Antibiotic', manufacturer='Pfizer', price=None, region_availability='دولي')
+        make_medicine('F5', category='Vitamins', manufacturer='Pharco', price='250', is_active=False)
+
+    def facets(self, **params):
+        response = self.client.get('/api/medicines/facets/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def listed(self, **params):
+        response = self.client.get('/api/medicines/', {**params, 'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['code'] for item in response.json()['results'])
+
+    def assert_agreement(self, **params):
+        facets = self.facets(**params)
+        # Picking another value of an applied filter replaces it, so those
+        # counts are the intersection and not comparable
+        self.assertEqual(len(self.listed(**params)), facets['total'])
+        for facet in {'category', 'manufacturer', 'region'} - set(params):
+            for item in facets[facet]:
+                narrowed = {**params, facet: item['value']}
+                self.assertEqual(self.facets(**narrowed)['total'], item['count'], (facet, item))
+                self.assertEqual(len(self.listed(**narrowed)), item['count'], (facet, item))
+
+    def test_spelling_variants_share_a_bucket(self):
+        facets = self.facets()
+        self.assertEqual(facets['total'], 4)
+        # Shown under one of the group's spellings
+        self.assertEqual(
+            sorted((item['value'].lower(), item['count']) for item in facets['category']),
+            [('analgesic', 2), ('antibiotic', 2)],
+        )
+        self.assertEqual(
+            sorted((item['value'].lower(), item['count']) for item in facets['manufacturer']),
+            [('gsk', 2), ('pfizer', 2)],
+        )
+
+    def test_region_counts_follow_groupings(self):
+        counts = {item['value']: item['count'] for item in self.facets()['region']}
+        # SA: its own medicine, the GCC one and the international one
+        self.assertEqual(counts['SA'], 3)
+        self.assertEqual(counts['EG'], 2)
+        self.assertEqual(counts['GCC'], 3)
+        self.assertEqual(counts['INTL'], 1)
+        self.assertEqual(self.listed(region='SA'), ['F2', 'F3', 'F4'])
+
+    def test_price_bands(self):
+        facets = self.facets()
+        bands = {band['value']: band['count'] for band in facets['price']}
+        # F4 has no price and F5 is inactive
+        self.assertEqual(bands, {'0-25': 1, '25-50': 1, '50-100': 0, '100-200': 1, '200+': 0})
+        self.assertEqual(facets['total'], 4)
+
+    def test_facets_agree_with_filters(self):
+        self.assert_agreement()
+        self.assert_agreement(category='analgesic')
+        self.assert_agreement(manufacturer='PFIZER')
+        self.assert_agreement(region='GCC')
+        self.assert_agreement(search='F')
+
+    def test_search_matches_the_list(self):
+        facets = self.facets(search='antibiotic')
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(facets['manufacturer'], [{'value': 'Pfizer', 'count': 2}])
+        self.assert_agreement(search='antibiotic')
+
+    def test_one_grouped_query(self):
+        region_table()
+        # The catalog version keying the cached regions, then the grouped count
+        with self.assertNumQueries(2):
+            facets = compute_facets(Medicine.objects.filter(is_active=True))
+        self.assertEqual(facets['total'], 4)
+
+    def test_admin_grouping_changes_apply(self):
+        Region.objects.get(code='GCC').members.remove(Region.objects.get(code='SA'))
+        counts = {item['value']: item['count'] for item in self.facets()['region']}
+        self.assertEqual(counts['SA'], 2)
+        self.assertEqual(self.listed(region='SA'), ['F2', 'F4'])
+        self.assert_agreement()
@@ -0,0 +1,82 @@
+from django.test import SimpleTestCase, TestCase
+
+from api.ingredients import parse_ingredients
+from api.models import ActiveIngredient, MedicineIngredient
+
+from .helpers import APITestMixin, make_medicine
+
+
+class ParseIngredientsTests(SimpleTestCase):
+    """parse_ingredients splits entries without cutting strengths apart"""
+
+    def assertParsed(self, active_ingredients, expected, concentration=''):
+        parsed = parse_ingredients(active_ingredients, concentration)
+        self.assertEqual([(name, strength) for name, _, strength in parsed], expected)
+
+    def test_separators(self):
+        self.assertParsed('Paracetamol, Caffeine', [('Paracetamol', ''), ('Caffeine', '')])
+        self.assertParsed('Amoxicillin / Clavulanic acid', [('Amoxicillin', ''), ('Clavulanic acid', '')])
+        self.assertParsed('Paracetamol + Caffeine & Codeine', [('Paracetamol', ''), ('Caffeine', ''), ('Codeine', '')])
+        self.assertParsed('باراسيتامول و كافيين', [('باراسيتامول', ''), ('كافيين', '')])
+
+    def test_embedded_concentration_is_not_split(self):
+        self.assertParsed('Amoxicillin 250mg/5ml', [('Amoxicillin', '250mg/5ml')])
+        self.assertParsed('Amoxicillin 125 mg / 5 ml, Clavulanic acid 31.25mg/5ml', [
+            ('Amoxicillin', '125 mg / 5 ml'), ('Clavulanic acid', '31.25mg/5ml'),
+        ])
+
+    def test_embedded_decimal_comma_is_not_split(self):
+        self.assertParsed('Paracetamol 1,5 g', [('Paracetamol', '1,5 g')])
+        self.assertParsed('Paracetamol 1,5 g, Caffeine 65mg', [('Paracetamol', '1,5 g'), ('Caffeine', '65mg')])
+
+    def test_strengths_from_concentration(self):
+        self.assertParsed(
+            'Amoxicillin, Clavulanic acid', [('Amoxicillin', '875mg'), ('Clavulanic acid', '125mg')],
+            concentration='875mg, 125mg',
+        )
+        self.assertParsed('Paracetamol', [('Paracetamol', '1,5 g')], concentration='1,5 g')
+        self.assertParsed(
+            'Amoxicillin + Clavulanic acid', [('Amoxicillin', '400mg/5ml'), ('Clavulanic acid', '57mg/5ml')],
+            concentration='400mg/5ml + 57mg/5ml',
+        )
+
+    def test_mismatched_counts_drop_concentration(self):
+        # Which strength belongs to which ingredient is unknown
+        self.assertParsed('Paracetamol, Caffeine', [('Paracetamol', ''), ('Caffeine', '')], concentration='500mg')
+        self.assertParsed('Paracetamol', [('Paracetamol', '')], concentration='500mg, 65mg')
+        # Embedded strengths are still used
+        self.assertParsed(
+            'Paracetamol 500mg, Caffeine', [('Paracetamol', '500mg'), ('Caffeine', '')], concentration='1g',
+        )
+
+    def test_fallback_and_duplicates(self):
+        self.assertEqual(parse_ingredients('', '', 'Ibuprofen'), [('Ibuprofen', 'ibuprofen', '')])
+        self.assertParsed('Paracetamol, PARACETAMOL', [('Paracetamol', '')])
+        self.assertEqual(parse_ingredients('', ''), [])
+
+
+class IngredientIndexTests(APITestMixin, TestCase):
+    """Saving a medicine rebuilds its ingredient links"""
+
+    def test_links_and_lookup(self):
+        make_medicine('I1', active_ingredients='Amoxicillin 250mg/5ml')
+        make_medicine('I2', active_ingredients='Amoxicillin, Clavulanic acid', concentration='875mg, 125mg')
+        self.assertEqual(
+            sorted(ActiveIngredient.objects.values_list('normalized_name', flat=True)),
+            ['amoxicillin', 'clavulanic acid'],
+        )
+        self.assertEqual(
+            sorted(MedicineIngredient.objects.values_list('medicine__code', 'ingredient__normalized_name', 'strength')),
+            [('I1', 'amoxicillin', '250mg/5ml'), ('I2', 'amoxicillin', '875mg'), ('I2', 'clavulanic acid', '125mg')],
+        )
+        response = self.client.get('/api/medicines/ingredient/amoxicillin/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(item['code'] for item in response.json()['results']), ['I1', 'I2'])
+
+    def test_edit_replaces_links(self):
+        medicine = make_medicine('I1', active_ingredients='Paracetamol, Caffeine')
+        medicine.active_ingredients = 'Ibuprofen'
+        medicine.save()
+        self.assertEqual(
+            list(MedicineIngredient.objects.values_list('ingredient__normalized_name', flat=True)), ['ibuprofen'],
+        )
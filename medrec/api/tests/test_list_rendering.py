@@ -0,0 +1,46 @@
+import json
+
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Medicine
+from api.serializers import MedicineListSerializer, MedicineSerializer, render_values_rows, values_row_plan
+
+from .helpers import APITestMixin, make_medicine
+
+
+class ValuesRenderingTests(APITestMixin, TestCase):
+    """The .values() list path must render exactly what the serializer does"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('A1', name_ar='بانادول', price='12.50', active_ingredients='Paracetamol', concentration='500mg')
+        make_medicine('A2', name_ar='أدول', price=None, category='')
+        make_medicine('A3', name_ar='بروفين', price='1000', name_en='Brufen "400"')
+
+    def test_rows_match_serializer(self):
+        plan = values_row_plan(MedicineListSerializer())
+        queryset = Medicine.objects.order_by('pk')
+        rows = queryset.values(*{column for _, column, _ in plan})
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(render_values_rows(rows, plan)),
+            renderer.render(MedicineListSerializer(queryset, many=True).data),
+        )
+
+    def test_instance_fields_fall_back(self):
+        # image_url is a method field, so the serializer path is kept
+        self.assertIsNone(values_row_plan(MedicineSerializer()))
+
+    def test_list_endpoint_matches_serializer(self):
+        response = self.client.get('/api/medicines/', {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        expected = MedicineListSerializer(Medicine.objects.order_by('name_ar', 'pk'), many=True).data
+        self.assertEqual(response.json()['results'], json.loads(JSONRenderer().render(expected)))
+
+    def test_field_selection(self):
+        response = self.client.get('/api/medicines/', {'fields': 'code,price'})
+        self.assertEqual(
+            sorted(response.json()['results'], key=lambda item: item['code']),
+            [{'code': 'A1', 'price': '12.50'}, {'code': 'A2', 'price': None}, {'code': 'A3', 'price': '1000.00'}],
+        )
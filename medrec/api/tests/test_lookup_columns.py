@@ -0,0 +1,47 @@
+from django.db import connection
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.models import Medicine
+from api.views import label_lookup
+
+from .helpers import APITestMixin, make_medicine
+
+
+class LabelLookupTests(APITestMixin, TestCase):
+    """category/ and company/ match normalized labels by prefix, exactly or anywhere"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('L1', category='مضادات حيوية', manufacturer='Pfizer')
+        make_medicine('L2', category='مضادات الحموضة', manufacturer='Pfizer Egypt')
+        make_medicine('L3', category=' مضادات  حيويه ', manufacturer='EIPICO')
+        make_medicine('L4', category='مسكنات', manufacturer='Global Pfizer', is_active=False)
+
+    def codes(self, path, **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['code'] for item in response.json()['results'])
+
+    def test_prefix_by_default(self):
+        self.assertEqual(self.codes('/api/medicines/category/مضادات/'), ['L1', 'L2', 'L3'])
+        self.assertEqual(self.codes('/api/medicines/category/مضادات حيوية/'), ['L1', 'L3'])
+        self.assertEqual(self.codes('/api/medicines/company/PFIZER/'), ['L1', 'L2'])
+        self.assertEqual(self.codes('/api/medicines/category/حيوية/'), [])
+
+    def test_exact(self):
+        self.assertEqual(self.codes('/api/medicines/company/pfizer/', exact=1), ['L1'])
+        self.assertEqual(self.codes('/api/medicines/category/مضادات/', exact=1), [])
+
+    def test_contains(self):
+        self.assertEqual(self.codes('/api/medicines/category/حيوية/', contains=1), ['L1', 'L3'])
+        self.assertEqual(self.codes('/api/medicines/company/egypt/', contains=1), ['L2'])
+
+    def test_prefix_uses_the_partial_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite query plan')
+        request = Request(APIRequestFactory().get('/'))
+        lookup = label_lookup(request, 'category_norm', 'مضادات')
+        plan = Medicine.objects.filter(is_active=True, **lookup).order_by('name_ar').explain()
+        self.assertIn('medicine_active_category_idx', plan)
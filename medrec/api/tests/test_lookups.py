@@ -0,0 +1,112 @@
+from django.test import TestCase
+
+from api.autocomplete import autocomplete_index
+
+from .helpers import APITestMixin, make_medicine
+
+
+class AutocompleteTests(APITestMixin, TestCase):
+    """Prefix completions over codes and both names"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('PAN500', name_en='Panadol', name_ar='بنادول')
+        make_medicine('PAX', name_en='Panadol Extra', name_ar='بنادول اكسترا')
+        make_medicine('ADO', name_en='Adol', name_ar='أدول')
+        make_medicine('OFF', name_en='Panadol Night', is_active=False)
+        # The version counter restarts in every test, so rebuild explicitly
+        autocomplete_index.build()
+
+    def complete(self, query, **params):
+        response = self.client.get('/api/medicines/autocomplete/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item['code'] for item in response.json()]
+
+    def test_prefixes(self):
+        self.assertEqual(sorted(self.complete('pana')), ['PAN500', 'PAX'])
+        self.assertEqual(self.complete('pan5'), ['PAN500'])
+        self.assertEqual(self.complete('ادو'), ['ADO'])
+        self.assertEqual(self.complete('zzz'), [])
+        self.assertEqual(self.complete(''), [])
+
+    def test_limit(self):
+        self.assertEqual(len(self.complete('pana', limit=1)), 1)
+        self.assertEqual(len(self.complete('pana', limit='x')), 2)
+
+
+class BulkLookupTests(APITestMixin, TestCase):
+    """Many codes or ids in one request, in order, with missing ones listed"""
+
+    def setUp(self):
+        super().setUp()
+        self.first = make_medicine('B1')
+        make_medicine('B2')
+        make_medicine('OFF', is_active=False)
+
+    def test_get(self):
+        response = self.client.get('/api/medicines/bulk/', {'codes': 'B2,NOPE,B1,OFF', 'fields': 'code'})
+        self.assertEqual(response.json(), {'results': [{'code': 'B2'}, {'code': 'B1'}], 'missing': ['NOPE', 'OFF']})
+
+    def test_post_codes_and_ids(self):
+        response = self.client.post(
+            '/api/medicines/bulk/', {'codes': ['B2'], 'ids': [self.first.pk, 999999]}, format='json',
+        )
+        self.assertEqual([item['code'] for item in response.json()['results']], ['B2', 'B1'])
+        self.assertEqual(response.json()['missing'], [999999])
+
+    def test_one_query(self):
+        # The catalog version, then one lookup for every code
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/medicines/bulk/', {'codes': 'B1,B2'})
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_invalid_requests(self):
+        self.assertEqual(
+            self.client.post('/api/medicines/bulk/', {'ids': ['x']}, format='json').status_code, 400,
+        )
+        self.assertEqual(
+            self.client.post('/api/medicines/bulk/', {'codes': 'B1'}, format='json').status_code, 400,
+        )
+        codes = ','.join(f'C{index}' for index in range(101))
+        self.assertEqual(self.client.get('/api/medicines/bulk/', {'codes': codes}).status_code, 400)
+
+
+class MedicationCheckTests(APITestMixin, TestCase):
+    """Duplicate ingredients and warnings naming another medicine's ingredient"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('PAN', active_ingredients='Paracetamol', concentration='500mg')
+        make_medicine('COLD', active_ingredients='Paracetamol, Pseudoephedrine', concentration='325mg, 30mg')
+        make_medicine('BRU', active_ingredients='Ibuprofen', concentration='400mg')
+        make_medicine(
+            'ASP', active_ingredients='Aspirin', concentration='75mg',
+            warnings='لا يستخدم مع مضادات الالتهاب الأخرى مثل ibuprofen',
+        )
+
+    def check(self, codes):
+        response = self.client.get('/api/medicines/check/', {'codes': ','.join(codes)})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_duplicate_ingredients(self):
+        result = self.check(['PAN', 'COLD', 'NOPE'])
+        self.assertEqual(result['medicines'], ['PAN', 'COLD'])
+        self.assertEqual(result['missing'], ['NOPE'])
+        [duplicate] = result['duplicate_ingredients']
+        self.assertEqual(duplicate['ingredient'], 'Paracetamol')
+        self.assertEqual(
+            duplicate['medicines'], [{'code': 'PAN', 'strength': '500mg'}, {'code': 'COLD', 'strength': '325mg'}],
+        )
+        self.assertEqual(duplicate['combined_strength'], {'value': 825.0, 'unit': 'mg'})
+        self.assertEqual(result['warnings'], [])
+
+    def test_warnings_naming_another_ingredient(self):
+        result = self.check(['ASP', 'BRU', 'PAN'])
+        self.assertEqual(result['duplicate_ingredients'], [])
+        self.assertEqual(
+            [(warning['medicine'], warning['ingredient'], warning['medicines']) for warning in result['warnings']],
+            [('ASP', 'Ibuprofen', ['BRU'])],
+        )
+        # Alone, the warning names nothing that is taken with it
+        self.assertEqual(self.check(['ASP', 'PAN'])['warnings'], [])
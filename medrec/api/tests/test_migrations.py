@@ -0,0 +1,92 @@
+import ast
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TransactionTestCase
+
+from api.models import Medicine, MedicineAlternative, MedicineIngredient, MedicineRegion, MedicineSearchToken
+
+MIGRATIONS = Path(__file__).resolve().parent.parent / 'migrations'
+
+
+class MigrationIsolationTests(SimpleTestCase):
+    """Migrations must keep working as the app code changes, so they never
+    import it; derived indexes are rebuilt by reindex_medicines instead"""
+
+    def test_no_app_imports(self):
+        for path in sorted(MIGRATIONS.glob('[0-9]*.py')):
+            for node in ast.walk(ast.parse(path.read_text(encoding='utf-8'))):
+                if isinstance(node, ast.ImportFrom):
+                    modules = [node.module or '']
+                    self.assertFalse(node.level, path.name)
+                elif isinstance(node, ast.Import):
+                    modules = [alias.name for alias in node.names]
+                else:
+                    continue
+                for module in modules:
+                    self.assertNotIn(module.split('.')[0], {'api', 'core', 'medrec'}, path.name)
+
+
+class UpgradeTests(TransactionTestCase):
+    """A database holding medicines migrates to the end, and
+    reindex_medicines then builds every derived index for its rows"""
+
+    migrate_from = [('api', '0003_medicine_search_token')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor
+
+    def latest(self):
+        return MigrationExecutor(connection).loader.graph.leaf_nodes()
+
+    def setUp(self):
+        executor = self.migrate(self.migrate_from)
+        old_apps = executor.loader.project_state(self.migrate_from).apps
+        OldMedicine = old_apps.get_model('api', 'Medicine')
+        rows = (
+            ('M1', 'Panadol', 'Paracetamol', '500mg', 'Adol', 'Analgesic', 'مصر'),
+            ('M2', 'Adol', 'Paracetamol', '0.5 g', 'Panadol', ' analgesic', 'دول الخليج'),
+            ('M3', 'Augmentin', 'Amoxicillin, Clavulanic acid', '875mg, 125mg', '', 'Antibiotic', 'دولي'),
+        )
+        for code, name_en, ingredients, concentration, alternatives, category, regions in rows:
+            OldMedicine.objects.create(
+                code=code, name_ar=name_en, name_en=name_en, scientific_name=ingredients,
+                active_ingredients=ingredients, concentration=concentration, alternatives=alternatives,
+                category=category, region_availability=regions, price='10',
+            )
+        self.migrate(self.latest())
+
+    def tearDown(self):
+        self.migrate(self.latest())
+        super().tearDown()
+
+    def test_migrations_only_change_the_schema(self):
+        self.assertFalse(MedicineSearchToken.objects.exists())
+        self.assertFalse(MedicineIngredient.objects.exists())
+        # Frozen in 0011, as the lookup columns must hold data to be filtered on
+        self.assertEqual(Medicine.objects.filter(category_norm='analgesic').count(), 2)
+
+    def test_reindex_builds_the_indexes(self):
+        call_command('reindex_medicines', stdout=StringIO())
+
+        self.assertTrue(MedicineSearchToken.objects.filter(medicine__code='M1').exists())
+        links = MedicineIngredient.objects.filter(medicine__code__in=('M1', 'M2'))
+        self.assertEqual(
+            sorted(links.values_list('medicine__code', 'strength_value', 'strength_unit')),
+            [('M1', 500.0, 'mg'), ('M2', 500.0, 'mg')],
+        )
+        self.assertEqual(MedicineIngredient.objects.filter(medicine__code='M3').count(), 2)
+
+        edges = MedicineAlternative.objects.values_list('source__code', 'target__code', 'same_strength')
+        self.assertEqual(sorted(edges), [('M1', 'M2', True), ('M2', 'M1', True)])
+
+        self.assertEqual(
+            sorted(MedicineRegion.objects.values_list('medicine__code', 'region__code')),
+            [('M1', 'EG'), ('M2', 'GCC'), ('M3', 'INTL')],
+        )
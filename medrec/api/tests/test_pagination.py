@@ -0,0 +1,78 @@
+from django.test import TestCase
+
+from api.models import Medicine
+
+from .helpers import APITestMixin, make_medicine
+
+PRICES = ('30', None, '10', '30', None, '20', '30', '10', None)
+
+
+class KeysetPaginationTests(APITestMixin, TestCase):
+    """Walking the cursors visits every row once, in the same order as one
+    big page, over NULL sort values and ties"""
+
+    def setUp(self):
+        super().setUp()
+        for index, price in enumerate(PRICES):
+            make_medicine(f'P{index}', price=price, name_ar='دواء' if index % 2 else 'علاج')
+
+    def page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def codes(self, page):
+        return [item['code'] for item in page['results']]
+
+    def expected(self, ordering):
+        field = ordering.lstrip('-')
+        descending = ordering.startswith('-')
+        rows = list(Medicine.objects.values_list(field, 'pk', 'code'))
+        present = sorted((row for row in rows if row[0] is not None), reverse=descending)
+        missing = sorted((row for row in rows if row[0] is None), reverse=descending)
+        return [code for _, _, code in present + missing]
+
+    def walk(self, ordering, page_size):
+        """Codes of every page walked forwards, and of every page walked
+        back from the last one"""
+        page = self.page('/api/medicines/', {'ordering': ordering, 'page_size': page_size})
+        self.assertIsNone(page['previous'])
+        pages = [self.codes(page)]
+        while page['next']:
+            page = self.page(page['next'])
+            pages.append(self.codes(page))
+        backwards = [pages[-1]]
+        while page['previous']:
+            page = self.page(page['previous'])
+            backwards.append(self.codes(page))
+        return pages, backwards[::-1]
+
+    def test_nulls_last_in_both_directions(self):
+        for ordering in ('price', '-price'):
+            codes = self.codes(self.page('/api/medicines/', {'ordering': ordering, 'page_size': 100}))
+            self.assertEqual(codes, self.expected(ordering), ordering)
+            self.assertEqual(codes[-3:], sorted(codes[-3:], reverse=ordering.startswith('-')), ordering)
+            self.assertEqual({Medicine.objects.get(code=code).price for code in codes[-3:]}, {None})
+
+    def test_walks_forwards_and_backwards(self):
+        for ordering in ('price', '-price', 'name_ar', '-name_ar'):
+            expected = self.expected(ordering)
+            for page_size in (1, 2, 4):
+                forwards, backwards = self.walk(ordering, page_size)
+                self.assertEqual(sum(forwards, []), expected, (ordering, page_size))
+                self.assertEqual(backwards, forwards, (ordering, page_size))
+                self.assertTrue(all(len(page) == page_size for page in forwards[:-1]))
+
+    def test_cursor_survives_inserts(self):
+        first = self.page('/api/medicines/', {'ordering': 'price', 'page_size': 4})
+        make_medicine('NEW', price='5')
+        make_medicine('NONE', price=None)
+        second = self.page(first['next'])
+        expected = self.expected('price')
+        # Picks up right after the last row seen, including NULLs added since
+        start = expected.index(self.codes(first)[-1]) + 1
+        self.assertEqual(self.codes(second), expected[start:start + 4])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/medicines/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
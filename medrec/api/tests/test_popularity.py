@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.models import MedicinePopularity, TopMedicine
+from api.popularity import record_detection, refresh_top_medicines, view_counter
+
+from .helpers import APITestMixin, make_medicine
+
+
+class PopularityTests(APITestMixin, TestCase):
+    """Detail views and detections feed the precomputed top rankings"""
+
+    def setUp(self):
+        super().setUp()
+        view_counter.flush()
+        self.viewed = make_medicine('V1')
+        self.scanned = make_medicine('V2')
+
+    def views(self, medicine):
+        return sum(MedicinePopularity.objects.filter(medicine=medicine).values_list('views', flat=True))
+
+    def top(self, **params):
+        response = self.client.get('/api/medicines/top/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['code'] for item in response.json()]
+
+    def test_views_are_buffered(self):
+        self.client.get('/api/medicines/V1/')
+        self.assertEqual(self.views(self.viewed), 0)
+        self.assertEqual(view_counter.flush(), 1)
+        self.assertEqual(self.views(self.viewed), 1)
+
+    def test_revalidated_views_count(self):
+        etag = self.client.get('/api/medicines/V1/')['ETag']
+        for _ in range(2):
+            response = self.client.get('/api/medicines/V1/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+        view_counter.flush()
+        self.assertEqual(self.views(self.viewed), 3)
+
+    def test_unknown_codes_are_dropped(self):
+        self.assertEqual(self.client.get('/api/medicines/MISSING/').status_code, 404)
+        self.assertEqual(view_counter.flush(), 0)
+
+    def test_batched_write_adds_to_existing_rows(self):
+        view_counter.record('V1')
+        view_counter.flush()
+        for _ in range(3):
+            view_counter.record('V1')
+        view_counter.record('V2')
+        # Codes, missing rows and one UPDATE per distinct count, in a savepoint
+        with self.assertNumQueries(6):
+            view_counter.flush()
+        self.assertEqual((self.views(self.viewed), self.views(self.scanned)), (4, 1))
+
+    def test_rankings_are_rebuilt_by_the_command_only(self):
+        for _ in range(3):
+            view_counter.record('V1')
+        view_counter.flush()
+        record_detection(self.scanned.pk)
+        self.assertEqual(self.top(), [])
+        self.assertFalse(TopMedicine.objects.exists())
+
+        call_command('refresh_top_medicines', stdout=StringIO())
+        # A detection weighs more than three views
+        self.assertEqual(self.top(), ['V2', 'V1'])
+        self.assertEqual(self.top(window='7d'), ['V2', 'V1'])
+
+    def test_inactive_medicines_are_not_ranked(self):
+        record_detection(self.scanned.pk)
+        self.scanned.is_active = False
+        self.scanned.save()
+        refresh_top_medicines()
+        self.assertEqual(self.top(), [])
+
+    def test_unknown_window(self):
+        self.assertEqual(self.client.get('/api/medicines/top/', {'window': '1y'}).status_code, 400)
@@ -0,0 +1,60 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.models import ImageUpload
+
+from .helpers import APITestMixin, make_medicine
+
+
+class FieldSelectionTests(APITestMixin, TestCase):
+    """``?fields=`` and ``?omit=`` trim the output and the columns fetched"""
+
+    def setUp(self):
+        super().setUp()
+        self.medicine = make_medicine(
+            'PRJ', name_en='Projection', description_ar='وصف طويل', description_en='Long text',
+            side_effects='Nausea', active_ingredients='Paracetamol',
+        )
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        selects = [query['sql'] for query in queries if 'FROM "api_medicine"' in query['sql']]
+        return response.json(), selects
+
+    def test_fields_on_detail(self):
+        data, selects = self.get('/api/medicines/PRJ/', fields='code,name_en,image_url')
+        self.assertEqual(data, {'code': 'PRJ', 'name_en': 'Projection', 'image_url': None})
+        self.assertTrue(selects)
+        for sql in selects:
+            self.assertNotIn('description_ar', sql)
+            self.assertNotIn('side_effects', sql)
+
+    def test_omit_on_search(self):
+        data, selects = self.get('/api/medicines/search/', q='projection', omit='description_ar,description_en')
+        self.assertEqual(data[0]['code'], 'PRJ')
+        self.assertNotIn('description_ar', data[0])
+        self.assertEqual(data[0]['side_effects'], 'Nausea')
+        self.assertFalse(any('"description_en"' in sql for sql in selects))
+
+    def test_unknown_fields_are_ignored(self):
+        data, _ = self.get('/api/medicines/PRJ/', fields='code,nonexistent')
+        self.assertEqual(data, {'code': 'PRJ'})
+
+    def test_nested_fields_on_uploads(self):
+        ImageUpload.objects.create(
+            image='uploads/scan.png', uploaded_by=self.user, detected_medicine=self.medicine, status=ImageUpload.DONE,
+        )
+        data, selects = self.get('/api/uploads/', fields='id,status,medicine_details.code,medicine_details.name_ar')
+        item = data['results'][0] if isinstance(data, dict) else data[0]
+        self.assertEqual(set(item), {'id', 'status', 'medicine_details'})
+        self.assertEqual(item['medicine_details'], {'code': 'PRJ', 'name_ar': self.medicine.name_ar})
+        self.assertFalse(any('description_ar' in sql for sql in selects))
+
+    def test_full_output_without_selection(self):
+        data, selects = self.get('/api/medicines/PRJ/')
+        self.assertEqual(data['description_en'], 'Long text')
+        self.assertIn('image_url', data)
+        self.assertTrue(any('description_ar' in sql for sql in selects))
@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.models import MedicineRegion, Region
+from api.regions import parse_regions, region_table, resolve_region
+
+from .helpers import APITestMixin, make_medicine
+
+
+class RegionParsingTests(TestCase):
+    """Region phrases are matched against the Region table's names and aliases"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_names_codes_and_aliases(self):
+        self.assertEqual(parse_regions('دولي ومصر والخليج'), ['INTL', 'EG', 'GCC'])
+        self.assertEqual(parse_regions('Saudi Arabia, UAE'), ['SA', 'AE'])
+        self.assertEqual(parse_regions('KSA / middle east'), ['SA', 'MENA'])
+        # Spelling variants normalize to the same phrase
+        self.assertEqual(parse_regions('الاردن و السعوديه'), ['JO', 'SA'])
+
+    def test_longest_phrase_wins(self):
+        self.assertEqual(parse_regions('دول الخليج'), ['GCC'])
+        self.assertEqual(parse_regions('دول عربية'), ['ARAB'])
+
+    def test_unknown_words_and_repeats(self):
+        self.assertEqual(parse_regions('متوفر في مصر فقط - مصر'), ['EG'])
+        self.assertEqual(parse_regions(''), [])
+        self.assertEqual(parse_regions(None), [])
+
+    def test_resolve_region(self):
+        self.assertEqual(resolve_region('gcc'), 'GCC')
+        self.assertEqual(resolve_region(' السعودية '), 'SA')
+        self.assertEqual(resolve_region('worldwide'), 'INTL')
+        self.assertIsNone(resolve_region('Atlantis'))
+
+    def test_aliases_edited_in_the_admin(self):
+        self.assertEqual(parse_regions('Misr'), [])
+        region = Region.objects.get(code='EG')
+        region.aliases = 'misr, مصر العربية'
+        region.save()
+        self.assertEqual(parse_regions('Misr'), ['EG'])
+        self.assertEqual(resolve_region('misr'), 'EG')
+
+    def test_new_region(self):
+        Region.objects.create(code='PK', name_ar='باكستان', name_en='Pakistan')
+        self.assertEqual(parse_regions('Pakistan ومصر'), ['PK', 'EG'])
+
+    def test_cached_per_catalog_version(self):
+        region_table()
+        # Each lookup only reads the version while the catalog is unchanged
+        with self.assertNumQueries(2):
+            self.assertEqual(parse_regions('مصر'), ['EG'])
+            self.assertEqual(resolve_region('SA'), 'SA')
+        Region.objects.get(code='GCC').members.remove(Region.objects.get(code='SA'))
+        self.assertNotIn('SA', region_table().members['GCC'])
+
+
+class RegionFilterTests(APITestMixin, TestCase):
+    """``?region=`` resolves names and aliases, and medicines are linked to
+    the regions their region_availability names"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('R1', region_availability='مصر والسعودية')
+        make_medicine('R2', region_availability='Gulf')
+        make_medicine('R3', region_availability='عالمي')
+        make_medicine('R4', region_availability='غير معروف')
+
+    def listed(self, region):
+        response = self.client.get('/api/medicines/', {'region': region, 'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['code'] for item in response.json()['results'])
+
+    def test_links(self):
+        self.assertEqual(
+            sorted(MedicineRegion.objects.values_list('medicine__code', 'region__code')),
+            [('R1', 'EG'), ('R1', 'SA'), ('R2', 'GCC'), ('R3', 'INTL')],
+        )
+
+    def test_filter_by_code_name_and_alias(self):
+        self.assertEqual(self.listed('KW'), ['R2', 'R3'])
+        self.assertEqual(self.listed('ksa'), ['R1', 'R2', 'R3'])
+        self.assertEqual(self.listed('مصر'), ['R1', 'R3'])
+        # A grouping also matches its member countries
+        self.assertEqual(self.listed('الخليج'), ['R1', 'R2', 'R3'])
+
+    def test_unknown_region(self):
+        response = self.client.get('/api/medicines/', {'region': 'Atlantis'})
+        self.assertEqual(response.status_code, 400)
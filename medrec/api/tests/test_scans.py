@@ -0,0 +1,286 @@
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api import scan_cache
+from api.models import Counter, ImageUpload, ScanCacheEntry
+from api.scan_cache import CACHE_HITS, CACHE_MISSES, NEAR_DUPLICATE_HITS
+from api.scans import claim_next, fail_abandoned, run_job
+
+from .helpers import APITestMixin, make_medicine
+
+MODEL_VERSION = 'test-model-1'
+
+
+def image_bytes(seed=0, shift=0):
+    """A PNG with a fixed pattern per seed; shift brightens it slightly,
+    giving other bytes with (nearly) the same dHash"""
+    from PIL import Image
+
+    image = Image.new('L', (90, 80))
+    image.putdata([
+        min(255, (x * 7 + y * 3 + seed * 50) % 200 + (x // 10) * 5 + shift)
+        for y in range(80) for x in range(90)
+    ])
+    data = BytesIO()
+    image.save(data, 'PNG')
+    return data.getvalue()
+
+
+class ScanTestMixin(APITestMixin):
+    """Uploads are stored in a temporary MEDIA_ROOT and inference is mocked"""
+
+    confidence = 0.95
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overrides = override_settings(
+            MEDIA_ROOT=media, SCAN_PROCESSING_ASYNC=False, AI_MODEL_PIN_FILE='', AI_MODEL_VERSION=MODEL_VERSION,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        make_medicine('SCAN1')
+        patcher = mock.patch('api.scans.infer', side_effect=self.infer)
+        self.infer_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def infer(self, path):
+        return {
+            'medicine_code': 'SCAN1', 'confidence': self.confidence, 'description': '',
+            'model_version': settings.AI_MODEL_VERSION,
+        }
+
+    def upload(self, data, name='scan.png'):
+        response = self.client.post(
+            '/api/uploads/new/', {'image': SimpleUploadedFile(name, data, content_type='image/png')},
+            format='multipart',
+        )
+        self.assertIn(response.status_code, (201, 202), response.content)
+        return ImageUpload.objects.get(pk=response.json()['id'])
+
+    def counters(self):
+        names = (CACHE_HITS, CACHE_MISSES, NEAR_DUPLICATE_HITS)
+        values = dict(Counter.objects.filter(name__in=names).values_list('name', 'value'))
+        return [values.get(name, 0) for name in names]
+
+
+class ScanCacheCounterTests(ScanTestMixin, TestCase):
+    """Every upload counts as exactly one of hit, near-duplicate hit or miss"""
+
+    def test_counts(self):
+        self.upload(image_bytes())
+        self.assertEqual(self.counters(), [0, 1, 0])
+        self.upload(image_bytes())
+        self.assertEqual(self.counters(), [1, 1, 0])
+        # Other bytes, so the exact lookup fails, but a near-duplicate answers
+        self.upload(image_bytes(shift=1))
+        self.assertEqual(self.counters(), [1, 1, 1])
+        self.assertEqual(self.infer_mock.call_count, 1)
+
+        self.upload(image_bytes(seed=2))
+        self.assertEqual(self.counters(), [1, 2, 1])
+        self.assertEqual(self.infer_mock.call_count, 2)
+
+
+@override_settings(SCAN_MAX_ATTEMPTS=2, SCAN_VISIBILITY_TIMEOUT=60)
+class ScanQueueTests(TestCase):
+    """Workers lease jobs; an expired lease is taken over until the job
+    runs out of attempts"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('worker-test')
+        make_medicine('SCAN1')
+        patcher = mock.patch('api.scans.infer', return_value={
+            'medicine_code': 'SCAN1', 'confidence': 0.9, 'model_version': MODEL_VERSION,
+        })
+        self.infer_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def job(self, **fields):
+        return ImageUpload.objects.create(image='uploads/job.png', uploaded_by=self.user, **fields)
+
+    def expire(self, job):
+        ImageUpload.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+    def test_claims_oldest_once(self):
+        first, second = self.job(), self.job()
+        claimed = claim_next('w1')
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts), (ImageUpload.RUNNING, 'w1', 1))
+        self.assertGreater(claimed.locked_until, timezone.now())
+        self.assertEqual(claim_next('w2').pk, second.pk)
+        self.assertIsNone(claim_next('w3'))
+
+    def test_retry_time_is_respected(self):
+        self.job(locked_until=timezone.now() + timedelta(seconds=30))
+        self.assertIsNone(claim_next('w1'))
+
+    def test_expired_lease_is_taken_over(self):
+        job = self.job()
+        stale = claim_next('w1')
+        self.assertIsNone(claim_next('w2'))
+        self.expire(job)
+        taken = claim_next('w2')
+        self.assertEqual((taken.pk, taken.locked_by, taken.attempts), (job.pk, 'w2', 2))
+
+        # The first worker lost its lease and cannot store a result
+        self.assertFalse(run_job(stale, 'w1'))
+        self.assertEqual(ImageUpload.objects.get(pk=job.pk).status, ImageUpload.RUNNING)
+        self.assertTrue(run_job(taken, 'w2'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_until, job.detected_medicine.code), (ImageUpload.DONE, None, 'SCAN1'))
+
+    def test_max_attempts(self):
+        job = self.job()
+        for worker in ('w1', 'w2'):
+            self.assertEqual(claim_next(worker).pk, job.pk)
+            self.expire(job)
+        # Out of attempts: never leased again, and failed once its lease expires
+        self.assertIsNone(claim_next('w3'))
+        self.assertEqual(fail_abandoned(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageUpload.FAILED)
+        self.assertTrue(job.error)
+
+    def test_failed_inference_is_retried_then_failed(self):
+        job = self.job()
+        self.infer_mock.side_effect = RuntimeError('model crashed')
+        with self.assertLogs('api.scans', 'ERROR'):
+            self.assertFalse(run_job(claim_next('w1'), 'w1'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageUpload.QUEUED)
+        self.assertGreater(job.locked_until, timezone.now())
+
+        self.expire(job)
+        with self.assertLogs('api.scans', 'ERROR'):
+            self.assertFalse(run_job(claim_next('w1'), 'w1'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_until), (ImageUpload.FAILED, None))
+        self.assertIn('model crashed', job.error)
+
+
+class ScanCacheTests(ScanTestMixin, TestCase):
+    """Results are cached by content hash and model version, bounded by
+    SCAN_CACHE_MAX_ENTRIES with least recently used eviction"""
+
+    def cached_upload(self, content_hash):
+        name = default_storage.save('uploads/cached.png', ContentFile(image_bytes()))
+        return ImageUpload.objects.create(image=name, uploaded_by=self.user, content_hash=content_hash)
+
+    def store(self, content_hash, model_version=MODEL_VERSION):
+        scan_cache.store(self.cached_upload(content_hash), json.dumps({'hash': content_hash}), model_version)
+
+    def test_store_and_lookup(self):
+        self.store('a' * 64)
+        entry = scan_cache.lookup('a' * 64, MODEL_VERSION)
+        self.assertEqual(json.loads(entry.result), {'hash': 'a' * 64})
+        self.assertEqual(ScanCacheEntry.objects.get().hits, 1)
+        self.assertIsNone(scan_cache.lookup('a' * 64, 'other-model'))
+        self.assertIsNone(scan_cache.lookup('b' * 64, MODEL_VERSION))
+        self.assertEqual(self.counters()[0], 1)
+
+    def test_entry_without_its_file_is_dropped(self):
+        self.store('a' * 64)
+        default_storage.delete(ScanCacheEntry.objects.get().image)
+        self.assertIsNone(scan_cache.lookup('a' * 64, MODEL_VERSION))
+        self.assertFalse(ScanCacheEntry.objects.exists())
+
+    @override_settings(SCAN_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_is_evicted(self):
+        self.store('a' * 64)
+        self.store('b' * 64)
+        ScanCacheEntry.objects.filter(content_hash='a' * 64).update(last_used_at=timezone.now() - timedelta(hours=2))
+        ScanCacheEntry.objects.filter(content_hash='b' * 64).update(last_used_at=timezone.now() - timedelta(hours=1))
+        # A hit makes "a" the most recently used, so "b" goes
+        scan_cache.lookup('a' * 64, MODEL_VERSION)
+        self.store('c' * 64)
+        self.assertEqual(
+            sorted(ScanCacheEntry.objects.values_list('content_hash', flat=True)), ['a' * 64, 'c' * 64],
+        )
+
+    def test_repeat_upload_shares_the_file(self):
+        first = self.upload(image_bytes())
+        second = self.upload(image_bytes())
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.detected_medicine.code, 'SCAN1')
+        self.assertEqual(self.infer_mock.call_count, 1)
+
+    def test_new_model_version_misses(self):
+        self.upload(image_bytes())
+        with override_settings(AI_MODEL_VERSION='test-model-2'):
+            again = self.upload(image_bytes())
+        self.assertFalse(again.cached)
+        self.assertEqual(self.infer_mock.call_count, 2)
+
+
+class NearDuplicateTests(ScanTestMixin, TestCase):
+    """With SCAN_PROCESSING_ASYNC off, a photo within a few dHash bits of a
+    recent confident scan reuses its result instead of running the model"""
+
+    def test_reuses_a_recent_confident_scan(self):
+        first = self.upload(image_bytes())
+        again = self.upload(image_bytes(shift=1))
+        self.assertTrue(again.cached)
+        self.assertEqual(again.status, ImageUpload.DONE)
+        self.assertEqual(json.loads(again.result), json.loads(first.result))
+        self.assertEqual(again.detected_medicine.code, 'SCAN1')
+        # Other bytes, so its own file is kept
+        self.assertNotEqual(again.image.name, first.image.name)
+        self.assertEqual(self.infer_mock.call_count, 1)
+
+    def test_different_photo(self):
+        self.upload(image_bytes())
+        self.assertFalse(self.upload(image_bytes(seed=2)).cached)
+        self.assertEqual(self.infer_mock.call_count, 2)
+
+    def test_low_confidence_is_not_reused(self):
+        self.confidence = 0.5
+        self.upload(image_bytes())
+        self.assertFalse(self.upload(image_bytes(shift=1)).cached)
+
+    def test_other_model_version_is_not_reused(self):
+        with override_settings(AI_MODEL_VERSION='test-model-0'):
+            self.upload(image_bytes())
+        self.assertFalse(self.upload(image_bytes(shift=1)).cached)
+
+    @override_settings(SCAN_NEAR_DUPLICATE_WINDOW=60)
+    def test_old_scans_are_not_reused(self):
+        first = self.upload(image_bytes())
+        ImageUpload.objects.filter(pk=first.pk).update(created_at=timezone.now() - timedelta(minutes=2))
+        self.assertFalse(self.upload(image_bytes(shift=1)).cached)
+
+    @override_settings(SCAN_NEAR_DUPLICATE_DISTANCE=None)
+    def test_disabled(self):
+        self.upload(image_bytes())
+        self.assertFalse(self.upload(image_bytes(shift=1)).cached)
+
+    def test_reused_results_are_not_passed_on(self):
+        first = self.upload(image_bytes())
+        self.assertTrue(self.upload(image_bytes(shift=1)).cached)
+        ImageUpload.objects.filter(pk=first.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertFalse(self.upload(image_bytes(shift=2)).cached)
+
+    def test_flat_images_are_not_matched(self):
+        from PIL import Image
+
+        for shade in (10, 12):
+            data = BytesIO()
+            Image.new('L', (90, 80), shade).save(data, 'PNG')
+            upload = self.upload(data.getvalue())
+            self.assertIsNone(upload.dhash)
+            self.assertFalse(upload.cached)
+        self.assertEqual(self.infer_mock.call_count, 2)
@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from api.models import Medicine
+from api.search import fuzzy_search_medicines
+
+from .helpers import APITestMixin, make_medicine
+
+
+class SearchTestMixin(APITestMixin):
+
+    def search(self, query, **params):
+        response = self.client.get('/api/medicines/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item['code'] for item in response.json()]
+
+
+class TokenSearchTests(SearchTestMixin, TestCase):
+    """Every query word must match the start of a word of the indexed fields"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('PAN500', name_en='Panadol', name_ar='بنادول', active_ingredients='Paracetamol')
+        make_medicine('ADO', name_en='Adol', name_ar='أدول', active_ingredients='Paracetamol', alternatives='Panadol')
+        make_medicine('AUG', name_en='Augmentin', name_ar='أوجمنتين', active_ingredients='Amoxicillin')
+        make_medicine('OFF', name_en='Panadol Night', is_active=False)
+
+    def test_prefixes_of_any_indexed_field(self):
+        self.assertEqual(sorted(self.search('panad')), ['ADO', 'PAN500'])
+        self.assertEqual(sorted(self.search('PARACETAMOL')), ['ADO', 'PAN500'])
+        self.assertEqual(self.search('pan500'), ['PAN500'])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.search('paracetamol adol'), ['ADO'])
+        self.assertEqual(self.search('paracetamol amoxicillin'), [])
+
+    def test_arabic_spelling_variants(self):
+        # Hamza forms and tashkeel do not matter
+        self.assertEqual(self.search('ادول'), ['ADO'])
+        self.assertEqual(self.search('أُوجمنتين'), ['AUG'])
+
+    def test_inactive_and_empty(self):
+        self.assertNotIn('OFF', self.search('night'))
+        self.assertEqual(self.search(''), [])
+        self.assertEqual(self.search('  ,.  '), [])
+
+
+class RankedSearchTests(SearchTestMixin, TestCase):
+    """``?mode=ranked`` orders hits by weighted bm25: names before
+    ingredients before descriptions"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('DESC', name_en='Zyrtec', description_en='Not for use with ibuprofen')
+        make_medicine('INGR', name_en='Combiflam', active_ingredients='Ibuprofen, Paracetamol')
+        make_medicine('NAME', name_en='Ibuprofen 400', active_ingredients='Ibuprofen', region_availability='مصر')
+
+    def test_weighted_relevance(self):
+        self.assertEqual(self.search('ibuprofen', mode='ranked'), ['NAME', 'INGR', 'DESC'])
+        # The token index does not cover descriptions
+        self.assertEqual(sorted(self.search('ibuprofen')), ['INGR', 'NAME'])
+
+    def test_follows_saves_and_filters(self):
+        medicine = Medicine.objects.get(code='DESC')
+        medicine.description_en = 'Antihistamine'
+        medicine.save()
+        self.assertEqual(self.search('ibuprofen', mode='ranked'), ['NAME', 'INGR'])
+        self.assertEqual(self.search('ibuprofen', mode='ranked', region='EG'), ['NAME'])
+
+
+class FuzzySearchTests(SearchTestMixin, TestCase):
+    """Typo-tolerant name search over the trigram index"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('PAN', name_en='Panadol', name_ar='بنادول', scientific_name='Paracetamol')
+        make_medicine('PAX', name_en='Panadol Extra', name_ar='بنادول اكسترا', scientific_name='Paracetamol, Caffeine')
+        make_medicine('AUG', name_en='Augmentin', name_ar='اوجمنتين', scientific_name='Amoxicillin')
+        make_medicine('AMO', name_en='Amoxil', name_ar='اموكسيل', scientific_name='Amoxicillin')
+        make_medicine('OFF', name_en='Panadol Night', name_ar='بنادول نايت', is_active=False)
+
+    def search(self, query):
+        return super().search(query, fuzzy=1)
+
+    def test_typos(self):
+        self.assertEqual(self.search('panadl')[:2], ['PAN', 'PAX'])
+        self.assertEqual(self.search('augmantin'), ['AUG'])
+        self.assertEqual(self.search('بندول')[:2], ['PAN', 'PAX'])
+        self.assertEqual(self.search('amoxcilin'), ['AUG', 'AMO'])
+
+    def test_no_match(self):
+        self.assertEqual(self.search('zzzzqq'), [])
+        self.assertNotIn('OFF', self.search('panadol night'))
+
+    def test_common_trigrams_are_skipped(self):
+        active = Medicine.objects.filter(is_active=True)
+        expected = list(fuzzy_search_medicines(active, 'panadl extra'))
+        # No budget: only the rarest few trigrams generate candidates
+        with mock.patch('api.search.FUZZY_MAX_POSTINGS', 0), mock.patch('api.search.FUZZY_MIN_GRAMS', 2):
+            found = list(fuzzy_search_medicines(active, 'panadl extra'))
+        self.assertEqual(found[:1], expected[:1])
+        self.assertEqual(found[0].code, 'PAX')
@@ -0,0 +1,62 @@
+from itertools import combinations
+
+from django.test import TestCase
+
+from api.models import Medicine, MedicineIngredient
+from api.similarity import jaccard, similar_medicines
+
+from .helpers import make_medicine
+
+INGREDIENTS = ('Paracetamol', 'Caffeine', 'Codeine', 'Ibuprofen', 'Chlorpheniramine', 'Pseudoephedrine')
+
+
+class SimilarCompositionTests(TestCase):
+    """The MinHash/LSH lookup agrees with an exact Jaccard scan"""
+
+    def setUp(self):
+        # Every 1-3 ingredient combination, so most pairs are near misses
+        sets = [combo for size in (1, 2, 3) for combo in combinations(INGREDIENTS, size)]
+        for index, combo in enumerate(sets):
+            make_medicine(f'SIM{index:02d}', active_ingredients=', '.join(combo))
+        make_medicine('OFF', active_ingredients='Paracetamol', is_active=False)
+
+    def ingredient_sets(self):
+        sets = {}
+        for medicine_id, ingredient_id in MedicineIngredient.objects.values_list('medicine_id', 'ingredient_id'):
+            sets.setdefault(medicine_id, set()).add(ingredient_id)
+        return sets
+
+    def test_matches_exact_scan(self):
+        sets = self.ingredient_sets()
+        active = Medicine.objects.filter(is_active=True)
+        active_pks = set(active.values_list('pk', flat=True))
+        for medicine in active:
+            found = dict(similar_medicines(active, medicine, threshold=0.5, limit=100))
+            expected = {
+                pk: round(jaccard(sets[medicine.pk], other), 4)
+                for pk, other in sets.items()
+                if pk != medicine.pk and pk in active_pks and jaccard(sets[medicine.pk], other) >= 0.5
+            }
+            self.assertTrue(expected, medicine.code)
+            # Never a false positive, and scores are the exact Jaccard
+            self.assertLessEqual(set(found), set(expected), medicine.code)
+            for pk, score in found.items():
+                self.assertEqual(score, expected[pk])
+            # Close matches are always found
+            self.assertLessEqual({pk for pk, score in expected.items() if score >= 2 / 3}, set(found), medicine.code)
+
+    def test_ordered_by_similarity(self):
+        medicine = Medicine.objects.get(code='SIM00')
+        scores = [score for _, score in similar_medicines(Medicine.objects.filter(is_active=True), medicine)]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_index_follows_saves(self):
+        active = Medicine.objects.filter(is_active=True)
+        medicine = make_medicine('NEW', active_ingredients='Paracetamol, Caffeine')
+        twin = Medicine.objects.get(code='SIM06')
+        self.assertEqual(twin.active_ingredients, 'Paracetamol, Caffeine')
+        self.assertIn((twin.pk, 1.0), similar_medicines(active, medicine))
+
+        medicine.active_ingredients = 'Ibuprofen'
+        medicine.save()
+        self.assertNotIn(twin.pk, dict(similar_medicines(active, medicine)))
@@ -0,0 +1,92 @@
+from django.test import SimpleTestCase, TestCase
+
+from api.models import MedicineIngredient
+from api.strengths import convert_range, parse_strength
+
+from .helpers import APITestMixin, make_medicine
+
+
+class ParseStrengthTests(SimpleTestCase):
+    """parse_strength converts to canonical units or gives up"""
+
+    def test_amounts(self):
+        self.assertEqual(parse_strength('500mg'), (500.0, 'mg'))
+        self.assertEqual(parse_strength('1 g'), (1000.0, 'mg'))
+        self.assertEqual(parse_strength('250 mcg'), (0.25, 'mg'))
+        self.assertEqual(parse_strength('1000 IU'), (1000.0, 'iu'))
+        self.assertEqual(parse_strength('2%'), (2.0, '%'))
+
+    def test_decimal_separators(self):
+        self.assertEqual(parse_strength('1.5 g'), (1500.0, 'mg'))
+        self.assertEqual(parse_strength('1,5 g'), (1500.0, 'mg'))
+        self.assertEqual(parse_strength('0,125 mg'), (0.125, 'mg'))
+        self.assertEqual(parse_strength('2,5mg/5ml'), (0.5, 'mg/ml'))
+
+    def test_ambiguous_comma_is_not_parsed(self):
+        # 1.5 mg or 1500 mg; neither guess is safe
+        self.assertEqual(parse_strength('1,500 mg'), (None, ''))
+        self.assertEqual(parse_strength('500mg/1,000ml'), (None, ''))
+
+    def test_per_unit(self):
+        self.assertEqual(parse_strength('250mg/5ml'), (50.0, 'mg/ml'))
+        self.assertEqual(parse_strength('125 mg / 5 ml'), (25.0, 'mg/ml'))
+        self.assertEqual(parse_strength('10mg/ml'), (10.0, 'mg/ml'))
+        self.assertEqual(parse_strength('1g/1l'), (1.0, 'mg/ml'))
+        self.assertEqual(parse_strength('20 mg/g'), (20.0, 'mg/g'))
+
+    def test_zero_per_amount(self):
+        self.assertEqual(parse_strength('250mg/0ml'), (None, ''))
+
+    def test_arabic_units_and_digits(self):
+        self.assertEqual(parse_strength('500 ملجم'), (500.0, 'mg'))
+        self.assertEqual(parse_strength('١ جم'), (1000.0, 'mg'))
+        self.assertEqual(parse_strength('250 مجم / 5 مل'), (50.0, 'mg/ml'))
+        self.assertEqual(parse_strength('1000 وحدة'), (1000.0, 'iu'))
+
+    def test_unparseable(self):
+        for text in ('', None, 'tablet', '500', '5 tablets'):
+            self.assertEqual(parse_strength(text), (None, ''), text)
+
+    def test_first_strength_only(self):
+        self.assertEqual(parse_strength('500mg + 65mg'), (500.0, 'mg'))
+
+    def test_convert_range(self):
+        self.assertEqual(convert_range('0.5', '1', 'g'), (500.0, 1000.0, 'mg'))
+        self.assertEqual(convert_range(None, '10', 'mg/ml'), (None, 10.0, 'mg/ml'))
+        self.assertEqual(convert_range('1', None, 'g/l'), (1.0, None, 'mg/ml'))
+        with self.assertRaises(ValueError):
+            convert_range('1', '2', 'tablets')
+        with self.assertRaises(ValueError):
+            convert_range('nan', None)
+
+
+class StrengthFilterTests(APITestMixin, TestCase):
+    """?strength_min=/?strength_max= compare canonical strengths"""
+
+    def setUp(self):
+        super().setUp()
+        make_medicine('ST1', active_ingredients='Paracetamol', concentration='500mg')
+        make_medicine('ST2', active_ingredients='Paracetamol', concentration='1,5 g')
+        make_medicine('ST3', active_ingredients='Paracetamol', concentration='1 g')
+        make_medicine('ST4', active_ingredients='Ibuprofen 1,5 g')
+
+    def listed(self, **params):
+        response = self.client.get('/api/medicines/', {**params, 'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['code'] for item in response.json()['results'])
+
+    def test_links_store_canonical_strength(self):
+        self.assertEqual(
+            MedicineIngredient.objects.get(medicine__code='ST2').strength_value, 1500.0,
+        )
+
+    def test_range_in_other_units(self):
+        self.assertEqual(self.listed(strength_min='1', strength_unit='g'), ['ST2', 'ST3', 'ST4'])
+        self.assertEqual(self.listed(strength_min='1.2', strength_max='2', strength_unit='g'), ['ST2', 'ST4'])
+
+    def test_range_for_one_ingredient(self):
+        self.assertEqual(self.listed(strength_min='1000', ingredient='parac'), ['ST2', 'ST3'])
+
+    def test_invalid_range(self):
+        response = self.client.get('/api/medicines/', {'strength_min': '1', 'strength_unit': 'tablets'})
+        self.assertEqual(response.status_code, 400)
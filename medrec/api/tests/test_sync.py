@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from api.models import Medicine
+from api.signals import deferred_indexing
+from api.views import MedicineChangesView
+
+from .helpers import APITestMixin, make_medicine
+
+
+class DeltaSyncTests(APITestMixin, TestCase):
+    """medicines/changes/ tokens: replay, incremental pages and removals"""
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        response = self.client.get('/api/medicines/changes/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def codes(self, items):
+        return sorted(item['code'] for item in items)
+
+    def test_full_replay_then_empty_delta(self):
+        make_medicine('S1')
+        make_medicine('S2')
+        first = self.sync()
+        self.assertEqual(self.codes(first['updated']), ['S1', 'S2'])
+        self.assertFalse(first['has_more'])
+
+        again = self.sync(first['token'])
+        self.assertEqual(again, {'token': first['token'], 'has_more': False, 'updated': [], 'removed': []})
+
+    def test_updates_and_removals_since_token(self):
+        kept, renamed, gone, hidden = (make_medicine(code) for code in ('S1', 'S2', 'S3', 'S4'))
+        token = self.sync()['token']
+
+        renamed.name_en = 'Renamed'
+        renamed.save()
+        gone_id = gone.pk
+        gone.delete()
+        hidden.is_active = False
+        hidden.save()
+        make_medicine('S5')
+
+        delta = self.sync(token)
+        self.assertEqual(self.codes(delta['updated']), ['S2', 'S5'])
+        self.assertEqual(
+            sorted(delta['removed'], key=lambda item: item['code']),
+            [{'id': gone_id, 'code': 'S3'}, {'id': hidden.pk, 'code': 'S4'}],
+        )
+        self.assertGreater(int(delta['token']), int(token))
+        self.assertNotIn(kept.code, self.codes(delta['updated']))
+
+    def test_pages_with_has_more(self):
+        with deferred_indexing():
+            for index in range(5):
+                make_medicine(f'P{index}')
+        seen = []
+        token = '0'
+        with mock.patch.object(MedicineChangesView, 'max_changes', 2):
+            while True:
+                page = self.sync(token)
+                seen.extend(self.codes(page['updated']))
+                token = page['token']
+                if not page['has_more']:
+                    break
+        self.assertEqual(sorted(seen), [f'P{index}' for index in range(5)])
+        self.assertEqual(Medicine.objects.count(), 5)
+
+    def test_invalid_token(self):
+        for token in ('abc', '-1'):
+            response = self.client.get('/api/medicines/changes/', {'since': token})
+            self.assertEqual(response.status_code, 400)
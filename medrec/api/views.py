@@ -1,17 +1,221 @@
 from rest_framework import generics, permissions, status, filters
+from rest_framework.exceptions import ParseError
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
-from django.db.models import Q
-from .models import ImageUpload, Medicine
-from .serializers import ImageUploadSerializer, MedicineSerializer, MedicineListSerializer
-from core.ai_service import infer
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from .ingredients import normalize_ingredient
+from .models import ActiveIngredient, ImageUpload, Medicine, MedicineChange, MedicineIngredient, TopMedicine
+from .serializers import (
+    ImageUploadSerializer,
+    MedicineAlternativeSerializer,
+    MedicineSerializer,
+    MedicineListSerializer,
+    apply_field_selection,
+    parse_field_list,
+    render_values_rows,
+    serializer_projection,
+    values_row_plan,
+)
+from .autocomplete import autocomplete_index
+from .catalog import get_catalog_version
+from .effects import filter_by_effects
+from .facets import compute_facets
+from .interactions import check_medicines
+from .pagination import MedicineKeysetPagination
+from .regions import filter_by_region, region_table, resolve_region
+from .scan_cache import ContentHashUploadHandler
+from .popularity import WINDOWS, get_top_version, view_counter
+from . import scans
+from .search import PREFIX_END, fuzzy_search_medicines, ranked_search_medicines, search_medicines
+from .similarity import DEFAULT_THRESHOLD, SIMILAR_REASON, similar_medicines
+from .strengths import convert_range, filter_by_strength
+from core.text import normalize_label
+
+
+def is_exact_match(request):
+    return request.query_params.get('exact') in ('1', 'true')
+
+
+def is_contains_match(request):
+    return request.query_params.get('contains') in ('1', 'true')
+
+
+def label_lookup(request, field, value):
+    """Filter kwargs for a normalized label column.
+
+    A prefix match by default, written as a range so the partial
+    (field, name_ar) index serves it; ``?exact=1`` matches the whole label
+    and ``?contains=1`` any part of it, which scans the table.
+    """
+    if is_exact_match(request):
+        return {field: value}
+    if is_contains_match(request):
+        return {f'{field}__contains': value}
+    return {f'{field}__gte': value, f'{field}__lt': value + PREFIX_END}
+
+
+def is_equivalent_only(request):
+    return request.query_params.get('equivalent') in ('1', 'true')
+
+
+def apply_region_filter(request, queryset):
+    """Restrict queryset to ``?region=`` (a code such as SA or GCC, or a name)"""
+    value = request.query_params.get('region')
+    if not value:
+        return queryset
+    table = region_table()
+    code = resolve_region(value, table)
+    if code is None:
+        raise ParseError(f'Unknown region: {value}')
+    return filter_by_region(queryset, code, table.members)
+
+
+def ingredient_prefix(value):
+    """Ingredients whose normalized name starts with value, e.g. "paracet" """
+    value = normalize_ingredient(value)
+    return ActiveIngredient.objects.filter(normalized_name__gte=value, normalized_name__lt=value + PREFIX_END)
+
 
+def apply_strength_filter(request, queryset, links=None):
+    """Restrict queryset to ``?strength_min=``/``?strength_max=`` in ``?strength_unit=``.
 
-class MedicineListView(generics.ListAPIView):
+    The unit defaults to mg; bounds are converted to canonical units, so
+    ``strength_min=0.5&strength_unit=g`` matches "500mg" and "1g".
+    ``?ingredient=`` (a name prefix) limits the range to that ingredient.
+    """
+    params = request.query_params
+    minimum, maximum = params.get('strength_min'), params.get('strength_max')
+    if not minimum and not maximum:
+        return queryset
+    try:
+        minimum, maximum, unit = convert_range(minimum, maximum, params.get('strength_unit', 'mg'))
+    except ValueError as exc:
+        raise ParseError(f'Invalid strength range: {exc}')
+    ingredient = params.get('ingredient')
+    if ingredient and links is None:
+        links = MedicineIngredient.objects.filter(ingredient__in=ingredient_prefix(ingredient))
+    return filter_by_strength(queryset, minimum, maximum, unit, links)
+
+
+class CatalogConditionalMixin:
+    """Strong ETag / Last-Modified validators derived from the catalog version.
+
+    A request whose If-None-Match (or If-Modified-Since) still matches gets
+    a 304 before any query or serialization runs. The ETag also covers the
+    full path and Accept header, so each representation has its own tag.
+    """
+
+    def get_etag(self, request, version):
+        variant = f'{request.get_full_path()}|{request.headers.get("Accept", "")}'
+        digest = hashlib.sha1(variant.encode()).hexdigest()[:16]
+        return quote_etag(f'{version}-{digest}')
+
+    def is_not_modified(self, request, etag, last_modified):
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            tags = parse_etags(if_none_match)
+            return '*' in tags or etag in tags
+        if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return (
+            if_modified_since is not None and last_modified is not None
+            and int(last_modified.timestamp()) <= if_modified_since
+        )
+
+    def get_version(self):
+        """(version, last modified) the validators are derived from"""
+        return get_catalog_version()
+
+    def get(self, request, *args, **kwargs):
+        version, last_modified = self.get_version()
+        self.catalog_version = version
+        etag = self.get_etag(request, version)
+        if self.is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class FieldSelectionMixin:
+    """Support ``?fields=`` and ``?omit=`` (comma separated, dotted for nested
+    serializers) on serialized output.
+
+    The selection is also pushed down into SQL with ``.only()``, so columns
+    that are not rendered, notably the large TextFields, are never fetched.
+    """
+
+    def get_field_selection(self):
+        params = self.request.query_params
+        return parse_field_list(params.get('fields')), parse_field_list(params.get('omit'))
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        # Input serializers keep every field so validation is unaffected
+        if 'data' not in kwargs:
+            apply_field_selection(serializer, *self.get_field_selection())
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, omit = self.get_field_selection()
+        if not fields and not omit:
+            return queryset
+        projection = serializer_projection(self.get_serializer())
+        if projection is None:
+            return queryset
+        only, related = projection
+        if self.paginator is not None:
+            # The paginator reads the ordering field of each row
+            only += [name.lstrip('-') for name in self.paginator.get_ordering(self.request, queryset, self)]
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only)
+
+
+class ValuesListMixin:
+    """Fast read path for list endpoints with flat serializers.
+
+    Rows are fetched with ``.values()`` and rendered through a precomputed
+    field plan instead of building model instances and running the
+    serializer per row. Output is identical to the serializer's. Falls back
+    to the regular path when the serializer has fields that need instances.
+    """
+
+    def list(self, request, *args, **kwargs):
+        plan = values_row_plan(self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = {column for _, column, _ in plan} | {'id'}
+        if self.paginator is not None:
+            columns.update(name.lstrip('-') for name in self.paginator.get_ordering(request, queryset, self))
+        rows = queryset.values(*columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(render_values_rows(page, plan))
+        return Response(render_values_rows(rows, plan))
+
+
+class MedicineListView(CatalogConditionalMixin, ValuesListMixin, FieldSelectionMixin, generics.ListAPIView):
     """List all medicines with search and filter"""
     queryset = Medicine.objects.filter(is_active=True)
     serializer_class = MedicineListSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = MedicineKeysetPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['code', 'name_ar', 'name_en', 'scientific_name', 'category']
     ordering_fields = ['name_ar', 'name_en', 'price', 'created_at']
@@ -20,38 +224,226 @@ class MedicineListView(generics.ListAPIView):
         queryset = super().get_queryset()
         category = self.request.query_params.get('category', None)
         if category:
-            queryset = queryset.filter(category=category)
-        return queryset
+            queryset = queryset.filter(category_norm=normalize_label(category))
+        manufacturer = self.request.query_params.get('manufacturer', None)
+        if manufacturer:
+            queryset = queryset.filter(manufacturer_norm=normalize_label(manufacturer))
+        queryset = apply_strength_filter(self.request, queryset)
+        return apply_region_filter(self.request, queryset)
 
 
-class MedicineDetailView(generics.RetrieveAPIView):
+class MedicineDetailView(CatalogConditionalMixin, FieldSelectionMixin, generics.RetrieveAPIView):
     """Get detailed medicine information"""
     queryset = Medicine.objects.filter(is_active=True)
     serializer_class = MedicineSerializer
     permission_classes = (permissions.IsAuthenticated,)
     lookup_field = 'code'
 
+    def get(self, request, *args, **kwargs):
+        # Counted before the 304 short-circuit, so revalidated views count too
+        view_counter.record(self.kwargs['code'])
+        return super().get(request, *args, **kwargs)
+
+
+class MedicineBulkView(CatalogConditionalMixin, FieldSelectionMixin, generics.ListAPIView):
+    """Look up many medicines by code or id in one query.
+
+    ``GET ?codes=A,B&ids=1,2`` (with ETag/304 like the detail view) or
+    ``POST {"codes": [...], "ids": [...]}`` for long lists. Results keep the
+    requested order and codes/ids that do not exist are listed in
+    ``missing``. ``?fields=``/``?omit=`` apply as on the detail view.
+    """
+    serializer_class = MedicineSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    max_items = 100
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        codes, ids = ([part for part in params.get(name, '').split(',') if part] for name in ('codes', 'ids'))
+        return self.lookup(codes, ids)
+
+    def post(self, request):
+        codes, ids = request.data.get('codes', []), request.data.get('ids', [])
+        if not isinstance(codes, list) or not isinstance(ids, list):
+            return Response({'error': 'codes and ids must be lists'}, status=status.HTTP_400_BAD_REQUEST)
+        return self.lookup(codes, ids)
+
+    def lookup(self, codes, ids):
+        try:
+            codes = list(dict.fromkeys(str(code).strip() for code in codes))
+            ids = list(dict.fromkeys(int(pk) for pk in ids))
+        except (TypeError, ValueError):
+            return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(codes) + len(ids) > self.max_items:
+            return Response(
+                {'error': f'At most {self.max_items} codes and ids per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(
+            Medicine.objects.filter(Q(code__in=codes) | Q(pk__in=ids), is_active=True)
+        ) if codes or ids else []
+        by_code, by_id = {}, {}
+        for medicine in queryset:
+            by_code[medicine.code] = by_id[medicine.pk] = medicine
+
+        found, missing = [], []
+        for key, index in [(code, by_code) for code in codes] + [(pk, by_id) for pk in ids]:
+            if key not in index:
+                missing.append(key)
+            elif index[key] not in found:
+                found.append(index[key])
+        return Response({'results': self.get_serializer(found, many=True).data, 'missing': missing})
+
 
-class MedicineSearchView(generics.ListAPIView):
-    """Search medicines by code or name"""
+class MedicineSearchView(CatalogConditionalMixin, FieldSelectionMixin, generics.ListAPIView):
+    """Search medicines by code, name, ingredients or alternatives using the token index.
+
+    ``?mode=ranked`` orders hits by FTS5 bm25 relevance instead of by name,
+    ``?fuzzy=1`` tolerates typos in medicine names.
+    """
     serializer_class = MedicineSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_queryset(self):
         query = self.request.query_params.get('q', '')
         if query:
-            return Medicine.objects.filter(
-                Q(code__icontains=query) |
-                Q(name_ar__icontains=query) |
-                Q(name_en__icontains=query) |
-                Q(scientific_name__icontains=query) |
-                Q(active_ingredients__icontains=query) |
-                Q(alternatives__icontains=query)
-            ).filter(is_active=True)[:20]
+            queryset = apply_region_filter(self.request, Medicine.objects.filter(is_active=True))
+            if self.request.query_params.get('fuzzy') in ('1', 'true'):
+                return fuzzy_search_medicines(queryset, query, limit=20)
+            if self.request.query_params.get('mode') == 'ranked':
+                return ranked_search_medicines(queryset, query, limit=20)
+            return search_medicines(queryset, query)[:20]
         return Medicine.objects.none()
 
 
-class ImageUploadCreateView(generics.CreateAPIView):
+class MedicineChangesView(CatalogConditionalMixin, FieldSelectionMixin, generics.ListAPIView):
+    """Delta sync feed for offline clients.
+
+    Returns the medicines created or updated since ``?since=<token>`` and
+    the ids/codes of those deleted or deactivated, plus the token to send
+    next time. Omitting ``since`` replays the whole catalog.
+    """
+    serializer_class = MedicineSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    max_changes = 500
+
+    def list(self, request, *args, **kwargs):
+        try:
+            since = int(request.query_params.get('since', 0))
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'Invalid since token'}, status=status.HTTP_400_BAD_REQUEST)
+
+        changes = list(
+            MedicineChange.objects.filter(id__gt=since)
+            .values_list('id', 'medicine_id', 'code', 'action')[:self.max_changes + 1]
+        )
+        has_more = len(changes) > self.max_changes
+        changes = changes[:self.max_changes]
+
+        # Only the latest change per medicine matters
+        latest = {medicine_id: (code, action) for _, medicine_id, code, action in changes}
+        candidates = [
+            medicine_id for medicine_id, (_, action) in latest.items()
+            if action in (MedicineChange.CREATED, MedicineChange.UPDATED)
+        ]
+        medicines = list(self.filter_queryset(Medicine.objects.filter(pk__in=candidates, is_active=True)))
+        updated_ids = {medicine.pk for medicine in medicines}
+        removed = [
+            {'id': medicine_id, 'code': code}
+            for medicine_id, (code, _) in latest.items() if medicine_id not in updated_ids
+        ]
+
+        return Response({
+            'token': str(changes[-1][0] if changes else since),
+            'has_more': has_more,
+            'updated': self.get_serializer(medicines, many=True).data,
+            'removed': removed,
+        })
+
+
+class MedicineFacetsView(MedicineListView):
+    """Counts per category, manufacturer, region and price band for the
+    medicines the list endpoint returns with the same parameters
+    (``?search=``, ``?category=``, ``?manufacturer=``, ``?region=`` and the
+    strength range).
+
+    Counted in one grouped query and cached per catalog version, so
+    repeated calls from filter screens cost one cache read until the
+    catalog changes.
+    """
+    pagination_class = None
+    filter_backends = [filters.SearchFilter]
+    cache_timeout = 60 * 60
+
+    def list(self, request, *args, **kwargs):
+        params = sorted(request.query_params.lists())
+        key = f'medicine-facets:{self.catalog_version}:{hashlib.sha1(repr(params).encode()).hexdigest()}'
+        facets = cache.get(key)
+        if facets is None:
+            facets = compute_facets(self.filter_queryset(self.get_queryset()))
+            cache.set(key, facets, self.cache_timeout)
+        return Response(facets)
+
+
+class MedicineCheckView(CatalogConditionalMixin, generics.ListAPIView):
+    """Check a medication list for duplicate ingredients and warnings that
+    name another listed medicine's ingredient.
+
+    ``GET ?codes=A,B,C`` (with ETag/304) or ``POST {"codes": [...]}``.
+    Answered from the ingredient links and the warning term index in a
+    fixed number of queries; see api/interactions.py.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    max_items = 50
+
+    def list(self, request, *args, **kwargs):
+        return self.check([part for part in request.query_params.get('codes', '').split(',') if part])
+
+    def post(self, request):
+        codes = request.data.get('codes', [])
+        if not isinstance(codes, list):
+            return Response({'error': 'codes must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+        return self.check(codes)
+
+    def check(self, codes):
+        codes = list(dict.fromkeys(str(code).strip() for code in codes))
+        if len(codes) > self.max_items:
+            return Response(
+                {'error': f'At most {self.max_items} codes per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        by_code = {
+            medicine.code: medicine
+            for medicine in Medicine.objects.filter(code__in=codes, is_active=True).only('code', 'name_ar', 'warnings')
+        }
+        medicines = [by_code[code] for code in codes if code in by_code]
+        result = check_medicines(medicines)
+        return Response({
+            'medicines': [medicine.code for medicine in medicines],
+            'missing': [code for code in codes if code not in by_code],
+            **result,
+        })
+
+
+class MedicineAutocompleteView(APIView):
+    """Code and name prefix completions served from an in-memory index"""
+    permission_classes = (permissions.IsAuthenticated,)
+    max_limit = 20
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), self.max_limit)
+        except ValueError:
+            limit = 10
+        return Response(autocomplete_index.complete(query, limit=max(limit, 1)))
+
+
+class ImageUploadCreateView(FieldSelectionMixin, generics.CreateAPIView):
     queryset = ImageUpload.objects.all()
     serializer_class = ImageUploadSerializer
     permission_classes = (permissions.IsAuthenticated,)
@@ -61,127 +453,211 @@ class ImageUploadCreateView(generics.CreateAPIView):
         serializer.save(uploaded_by=self.request.user)
 
     def create(self, request, *args, **kwargs):
+        # Hash the image while it is received, before the parsers run
+        hasher = ContentHashUploadHandler(request)
+        request.upload_handlers.insert(0, hasher)
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        instance = serializer.save(uploaded_by=request.user)
-
-        # Run AI inference
-        image_path = instance.image.path
-        result = infer(image_path)
-        
-        # Save full result as JSON
-        import json
-        instance.result = json.dumps(result, ensure_ascii=False)
-        instance.confidence = result.get('confidence', 0.0)
-        
-        # Try to match detected medicine by code
-        medicine_code = result.get('medicine_code')
-        if medicine_code:
-            try:
-                medicine = Medicine.objects.get(code=medicine_code, is_active=True)
-                instance.detected_medicine = medicine
-            except Medicine.DoesNotExist:
-                pass
-        
-        instance.save()
+        instance = scans.create_upload(serializer, request.user, hasher.digests.get('image', ''))
+
+        # Queued for run_scan_worker unless answered from the cache or run inline
+        if instance.status == ImageUpload.QUEUED:
+            response_status = status.HTTP_202_ACCEPTED
+        else:
+            response_status = status.HTTP_201_CREATED
 
         out_serializer = self.get_serializer(instance, context={'request': request})
-        headers = self.get_success_headers(out_serializer.data)
-        return Response(out_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        headers = {'Location': reverse('upload-detail', kwargs={'pk': instance.pk}, request=request)}
+        return Response(out_serializer.data, status=response_status, headers=headers)
 
 
-class ImageUploadListView(generics.ListAPIView):
+class ImageUploadListView(FieldSelectionMixin, generics.ListAPIView):
     serializer_class = ImageUploadSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_queryset(self):
         return ImageUpload.objects.filter(uploaded_by=self.request.user).order_by('-created_at')
 
-class ImageUploadDetailView(generics.RetrieveDestroyAPIView):
-    "`"`"Get or delete a specific upload/scan for the current user"`"`"
+class ImageUploadDetailView(FieldSelectionMixin, generics.RetrieveDestroyAPIView):
+    """Get or delete a specific upload/scan for the current user.
+
+    While the scan is queued or running the response carries Retry-After,
+    the suggested delay before polling again.
+    """
     serializer_class = ImageUploadSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    poll_interval = 1
 
     def get_queryset(self):
         return ImageUpload.objects.filter(uploaded_by=self.request.user)
 
-class MedicineAlternativesView(generics.ListAPIView):
-    "`"`"Find alternative medicines based on exact active ingredients"`"`"
-    serializer_class = MedicineListSerializer
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        response = Response(self.get_serializer(instance).data)
+        if instance.status in (ImageUpload.QUEUED, ImageUpload.RUNNING):
+            response['Retry-After'] = str(self.poll_interval)
+        return response
+
+class MedicineAlternativesView(CatalogConditionalMixin, ValuesListMixin, FieldSelectionMixin, generics.ListAPIView):
+    """Alternatives of a medicine, best first, from the precomputed alternatives graph.
+
+    ``?mode=similar`` instead ranks medicines by Jaccard similarity of their
+    ingredient sets (``?threshold=``, default 0.5), so combination products
+    sharing most ingredients are found too. ``?equivalent=1`` keeps only
+    dose-equivalent alternatives (same ingredients at the same strengths,
+    "1g" equals "1000mg"); strength range parameters apply as on the list.
+    """
+    serializer_class = MedicineAlternativeSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_queryset(self):
-        code = self.kwargs.get('code')
+        if self.request.query_params.get('mode') == 'similar':
+            return self.get_similar_queryset()
+
+        # Edges are scored by same ingredient set, same strengths and being
+        # named in the alternatives text; see api/alternatives.py
+        edge = {
+            'incoming_alternatives__source__code': self.kwargs.get('code'),
+            'incoming_alternatives__source__is_active': True,
+        }
+        if is_equivalent_only(self.request):
+            edge['incoming_alternatives__same_strength'] = True
+        queryset = (
+            Medicine.objects.filter(is_active=True, **edge)
+            .annotate(score=F('incoming_alternatives__score'), reason=F('incoming_alternatives__reason'))
+            .order_by('-score', 'name_ar', 'pk')
+        )
+        return apply_strength_filter(self.request, queryset)
+
+    def get_similar_queryset(self):
         try:
-            base_medicine = Medicine.objects.get(code=code, is_active=True)
-            # Find others with the exact same active ingredients (excluding itself)
-            if base_medicine.active_ingredients:
-                return Medicine.objects.filter(
-                    active_ingredients=base_medicine.active_ingredients,
-                    is_active=True
-                ).exclude(code=code)
-            return Medicine.objects.none()
-        except Medicine.DoesNotExist:
-            return Medicine.objects.none()
-
-class MedicineActiveIngredientsView(generics.ListAPIView):
-    "`"`"Search medicines strictly by their active ingredients"`"`"
+            threshold = float(self.request.query_params.get('threshold', DEFAULT_THRESHOLD))
+        except ValueError:
+            threshold = -1
+        if not 0 < threshold <= 1:
+            raise ParseError('threshold must be a number between 0 and 1')
+
+        queryset = Medicine.objects.filter(is_active=True)
+        base_medicine = queryset.only('pk').filter(code=self.kwargs.get('code')).first()
+        similar = similar_medicines(queryset, base_medicine, threshold) if base_medicine else []
+        if not similar:
+            return queryset.none().annotate(score=Value(0.0), reason=Value(SIMILAR_REASON))
+        score = Case(*[When(pk=pk, then=Value(value)) for pk, value in similar], output_field=FloatField())
+        queryset = (
+            queryset.filter(pk__in=[pk for pk, _ in similar])
+            .annotate(score=score, reason=Value(SIMILAR_REASON))
+            .order_by('-score', 'name_ar', 'pk')
+        )
+        return apply_strength_filter(self.request, queryset)
+
+class MedicineActiveIngredientsView(CatalogConditionalMixin, ValuesListMixin, FieldSelectionMixin, generics.ListAPIView):
+    """Search medicines strictly by their active ingredients.
+
+    ``?strength_min=``/``?strength_max=``/``?strength_unit=`` filter on that
+    ingredient's strength, e.g. paracetamol between 500 and 1000 mg.
+    """
     serializer_class = MedicineListSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = MedicineKeysetPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = MedicineListView.ordering_fields
 
     def get_queryset(self):
         ingredient = self.kwargs.get('ingredient', '')
-        if ingredient:
-            return Medicine.objects.filter(
-                active_ingredients__icontains=ingredient,
-                is_active=True
-            )
+        if normalize_ingredient(ingredient):
+            # Ingredient names starting with the given text, e.g. "paracet"
+            links = MedicineIngredient.objects.filter(ingredient__in=ingredient_prefix(ingredient))
+            queryset = Medicine.objects.filter(pk__in=links.values('medicine_id'), is_active=True)
+            # A strength range applies to the same ingredient's strength
+            return apply_strength_filter(self.request, queryset, links)
         return Medicine.objects.none()
 
-class MedicineBySideEffectView(generics.ListAPIView):
-    "`"`"Search medicines by side effects or warnings (e.g. check if a medicine causes drowsiness)"`"`"
+class MedicineBySideEffectView(CatalogConditionalMixin, ValuesListMixin, FieldSelectionMixin, generics.ListAPIView):
+    """Search medicines by side effects or warnings (e.g. check if a medicine causes drowsiness).
+
+    Answered from the stemmed effect term index, so "دوخة", "الدوخة" and
+    "dizziness" find the same medicines. Negated effects ("no drowsiness")
+    are a 400; exclusions use ``?none=`` of MedicineEffectsQueryView.
+    """
     serializer_class = MedicineListSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = MedicineKeysetPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = MedicineListView.ordering_fields
 
     def get_queryset(self):
         effect = self.kwargs.get('effect', '')
         if effect:
-            return Medicine.objects.filter(
-                Q(side_effects__icontains=effect) | Q(warnings__icontains=effect),
-                is_active=True
-            )
+            return self.filter_by_effects(all_of=[effect])
         return Medicine.objects.none()
 
-class MedicineByCategoryView(generics.ListAPIView):
-    "`"`"Filter medicines strictly by a specific category (e.g. مسكنات, مضادات حيوية)"`"`"
+    def filter_by_effects(self, **expressions):
+        try:
+            return filter_by_effects(Medicine.objects.filter(is_active=True), **expressions)
+        except ValueError as exc:
+            raise ParseError(str(exc))
+
+
+class MedicineEffectsQueryView(MedicineBySideEffectView):
+    """Combine several side effects/warnings in one query.
+
+    ``?all=``, ``?any=`` and ``?none=`` take comma separated effects; an
+    effect can be limited to one field with a ``side_effects:`` or
+    ``warnings:`` prefix, e.g. ``?none=drowsiness,warnings:liver``.
+    """
+
+    def get_queryset(self):
+        params = self.request.query_params
+        all_of, any_of, none_of = (
+            [part for part in params.get(name, '').split(',') if part.strip()]
+            for name in ('all', 'any', 'none')
+        )
+        if not (all_of or any_of or none_of):
+            return Medicine.objects.none()
+        return self.filter_by_effects(all_of=all_of, any_of=any_of, none_of=none_of)
+
+class MedicineByCategoryView(CatalogConditionalMixin, ValuesListMixin, FieldSelectionMixin, generics.ListAPIView):
+    """Filter medicines strictly by a specific category (e.g. مسكنات, مضادات حيوية).
+
+    Matches are on the normalized category, so case, hamza forms and extra
+    spaces do not matter. The category must start with the given text;
+    ``?exact=1`` requires the whole category and ``?contains=1`` accepts it
+    anywhere. All but ``?contains=1`` are answered from the
+    (is_active, category_norm) index.
+    """
     serializer_class = MedicineListSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = MedicineKeysetPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = MedicineListView.ordering_fields
 
     def get_queryset(self):
-        category_name = self.kwargs.get('category', '')
+        category_name = normalize_label(self.kwargs.get('category', ''))
         if category_name:
             return Medicine.objects.filter(
-                category__icontains=category_name,
-                is_active=True
+                is_active=True, **label_lookup(self.request, 'category_norm', category_name)
             )
         return Medicine.objects.none()
 
-class MedicineByManufacturerView(generics.ListAPIView):
-    "`"`"Filter medicines strictly by Manufacturer/Company name"`"`"
+class MedicineByManufacturerView(CatalogConditionalMixin, ValuesListMixin, FieldSelectionMixin, generics.ListAPIView):
+    """Filter medicines strictly by Manufacturer/Company name (prefix, ``?exact=1``
+    or ``?contains=1`` as for categories)"""
     serializer_class = MedicineListSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = MedicineKeysetPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = MedicineListView.ordering_fields
 
     def get_queryset(self):
-        manufacturer_name = self.kwargs.get('manufacturer', '')
+        manufacturer_name = normalize_label(self.kwargs.get('manufacturer', ''))
         if manufacturer_name:
             return Medicine.objects.filter(
-                manufacturer__icontains=manufacturer_name,
-                is_active=True
+                is_active=True, **label_lookup(self.request, 'manufacturer_norm', manufacturer_name)
             )
         return Medicine.objects.none()
 
 class ClearUserScanHistoryView(generics.DestroyAPIView):
-    "`"`"Wipes out the entire scan/upload history for the current user"`"`"
+    """Wipes out the entire scan/upload history for the current user"""
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_queryset(self):
@@ -191,10 +667,40 @@ class ClearUserScanHistoryView(generics.DestroyAPIView):
         count, _ = self.get_queryset().delete()
         return Response({"message": f"Successfully deleted {count} scan records."}, status=status.HTTP_204_NO_CONTENT)
 
-class TopMedicinesView(generics.ListAPIView):
-    "`"`"Returns a list of the 10 most recently added or updated medicines"`"`"
+class TopMedicinesView(CatalogConditionalMixin, ValuesListMixin, FieldSelectionMixin, generics.ListAPIView):
+    """Most popular medicines by scan detections and detail views.
+
+    ``?window=all|7d|30d`` (default all). Served from the precomputed
+    TopMedicine rankings, which only the refresh_top_medicines command
+    rebuilds.
+    """
     serializer_class = MedicineListSerializer
     permission_classes = (permissions.IsAuthenticated,)
-    
+    cache_timeout = 60 * 60
+
+    def get_window(self):
+        window = self.request.query_params.get('window', TopMedicine.ALL_TIME)
+        if window not in WINDOWS:
+            raise ParseError(f'window must be one of {", ".join(WINDOWS)}')
+        return window
+
+    def get_version(self):
+        catalog_version, catalog_modified = get_catalog_version()
+        top_version, refreshed_at = get_top_version()
+        last_modified = max(filter(None, (catalog_modified, refreshed_at)), default=None)
+        return f'{catalog_version}.{top_version}', last_modified
+
     def get_queryset(self):
-        return Medicine.objects.filter(is_active=True).order_by('-created_at')[:10]
+        return (
+            Medicine.objects.filter(top_entries__window=self.get_window(), is_active=True)
+            .order_by('top_entries__rank')
+        )
+
+    def list(self, request, *args, **kwargs):
+        path = hashlib.sha1(request.get_full_path().encode()).hexdigest()
+        key = f'top-medicines:{self.catalog_version}:{path}'
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, self.cache_timeout)
+        return Response(data)
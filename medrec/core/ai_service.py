@@ -1,39 +1,65 @@
+import logging
 import os
-from pathlib import Path
+
+from .model_registry import get_model
+
+logger = logging.getLogger(__name__)
+
 
 def infer(image_path: str) -> dict:
     """AI inference function for medicine detection.
 
-    Replace this with your actual AI model integration.
-    The model should analyze the image and return medicine code with confidence.
-    
+    When the INFERENCE_SERVER_SOCKET setting names a running inference
+    server (see core/inference_server.py), the image is sent there and
+    batched with concurrent calls; otherwise it runs in this process.
+
     Args:
         image_path: Path to the uploaded image
-        
+
     Returns:
         dict: {
             'medicine_code': str - the unique code of detected medicine,
             'confidence': float - confidence score (0.0 to 1.0),
-            'description': str - additional info
+            'description': str - additional info,
+            'model_version': str - version of the model that answered
         }
     """
-    name = Path(image_path).name
-    
-    # TODO: Replace with actual model inference
-    # Example integration points:
-    # 1. Load your trained model (TensorFlow, PyTorch, etc.)
-    # 2. Preprocess the image
-    # 3. Run inference
-    # 4. Post-process results
-    # 5. Return medicine_code and confidence
-    
-    # Dummy response for testing
-    return {
-        'medicine_code': 'MED001',  # Replace with actual detected code
-        'confidence': 0.85,
-        'description': f'Placeholder detection for {name}. Integrate your AI model here.',
-        'alternatives': [
-            {'medicine_code': 'MED002', 'confidence': 0.65},
-            {'medicine_code': 'MED003', 'confidence': 0.45}
-        ]
-    }
+    client = _get_client()
+    if client is not None:
+        try:
+            return client.infer(image_path)
+        except ConnectionError:
+            logger.warning('Inference server unavailable, running inference in process')
+    return infer_batch([image_path])[0]
+
+
+def infer_batch(image_paths: list) -> list:
+    """Run the model on several images at once; one result dict (as
+    returned by infer) per path, in order.
+
+    The model is loaded once per process by core.model_registry; each
+    result records the model_version that produced it.
+    """
+    loaded = get_model()
+    results = loaded.model.predict(image_paths)
+    for result in results:
+        result['model_version'] = loaded.version
+    return results
+
+
+_client = None
+
+
+def _get_client():
+    """Inference server client for this process, or None when not configured"""
+    global _client
+    from django.conf import settings
+
+    address = getattr(settings, 'INFERENCE_SERVER_SOCKET', '')
+    if not address:
+        return None
+    if _client is None or _client.address != address or _client.pid != os.getpid():
+        from .inference_server import InferenceClient, server_authkey
+
+        _client = InferenceClient(address, authkey=server_authkey())
+    return _client
@@ -0,0 +1,247 @@
+import hashlib
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT = 0.01
+
+# Seconds a client waits for its result before giving up on the server
+DEFAULT_CLIENT_TIMEOUT = 60
+
+
+class InferenceError(RuntimeError):
+    """The model failed on a request sent to the inference server"""
+
+
+def server_authkey():
+    """Connection key shared by the server and its clients, from SECRET_KEY"""
+    from django.conf import settings
+
+    return hashlib.sha256(f'inference-server:{settings.SECRET_KEY}'.encode()).digest()
+
+
+def _percentiles(values):
+    if not values:
+        return {'p50': None, 'p95': None, 'max': None}
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+    return {'p50': pick(0.5), 'p95': pick(0.95), 'max': round(ordered[-1] * 1000, 2)}
+
+
+class BatchStats:
+    """Batch size and latency counters; percentiles cover the last `window` samples"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.sizes = Counter()
+        self._waits = deque(maxlen=window)
+        self._runs = deque(maxlen=window)
+
+    def record(self, size, waits, run_time, failed=False):
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            self.errors += failed
+            self.sizes[size] += 1
+            self._waits.extend(waits)
+            self._runs.append(run_time)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'uptime': round(time.time() - self.started),
+                'batches': self.batches,
+                'items': self.items,
+                'errors': self.errors,
+                'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0,
+                'batch_sizes': dict(sorted(self.sizes.items())),
+                # Time from a request arriving to its batch starting
+                'wait_ms': _percentiles(self._waits),
+                'run_ms': _percentiles(self._runs),
+            }
+
+
+class _Request:
+    __slots__ = ('connection', 'send_lock', 'request_id', 'image_path', 'received')
+
+    def __init__(self, connection, send_lock, request_id, image_path):
+        self.connection = connection
+        self.send_lock = send_lock
+        self.request_id = request_id
+        self.image_path = image_path
+        self.received = time.monotonic()
+
+
+class InferenceServer:
+    """Micro-batching inference server on a Unix socket.
+
+    One process owns the model; concurrent infer() calls from web and scan
+    worker processes are queued and run together through handler
+    (ai_service.infer_batch by default), which takes a list of image paths
+    and returns one result per path. A batch closes when it holds
+    max_batch_size images or its oldest image has waited max_wait seconds,
+    and each caller gets its own result back.
+    """
+
+    def __init__(self, address, handler=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait=DEFAULT_MAX_WAIT, authkey=None):
+        if handler is None:
+            from .ai_service import infer_batch as handler
+        self.address = address
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.authkey = authkey
+        self.stats = BatchStats()
+        self._queue = queue.Queue()
+        self._listener = None
+
+    def start(self):
+        """Listen and start the accept and batching threads"""
+        if os.path.exists(self.address):
+            # Left behind by a server that did not shut down cleanly
+            os.unlink(self.address)
+        self._listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        threading.Thread(target=self._accept_loop, name='inference-accept', daemon=True).start()
+        threading.Thread(target=self._batch_loop, name='inference-batcher', daemon=True).start()
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+    def _accept_loop(self):
+        while self._listener is not None:
+            try:
+                connection = self._listener.accept()
+            except AuthenticationError:
+                logger.warning('Rejected inference client with a wrong key')
+                continue
+            except OSError:
+                # Listener closed
+                return
+            threading.Thread(target=self._read_loop, args=(connection,), daemon=True).start()
+
+    def _read_loop(self, connection):
+        send_lock = threading.Lock()
+        try:
+            while True:
+                kind, request_id, payload = connection.recv()
+                if kind == 'infer':
+                    self._queue.put(_Request(connection, send_lock, request_id, payload))
+                elif kind == 'stats':
+                    from .model_registry import registry
+
+                    with send_lock:
+                        connection.send(('stats', request_id, {**self.stats.snapshot(), 'model': registry.info()}))
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = batch[0].received + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Past the deadline, still take requests that are already waiting
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            self._run(self._next_batch())
+
+    def _run(self, batch):
+        started = time.monotonic()
+        failed = False
+        try:
+            results = self.handler([request.image_path for request in batch])
+            if len(results) != len(batch):
+                raise ValueError(f'{len(results)} results for a batch of {len(batch)}')
+            replies = [('ok', request.request_id, result) for request, result in zip(batch, results)]
+        except Exception as exc:
+            logger.exception('Inference failed for a batch of %s', len(batch))
+            failed = True
+            replies = [('error', request.request_id, repr(exc)) for request in batch]
+        self.stats.record(
+            len(batch), [started - request.received for request in batch], time.monotonic() - started, failed,
+        )
+        for request, reply in zip(batch, replies):
+            try:
+                with request.send_lock:
+                    request.connection.send(reply)
+            except (OSError, ValueError):
+                # The client disconnected while waiting
+                pass
+
+
+class InferenceClient:
+    """Client for InferenceServer; safe to share between threads, each of
+    which keeps its own connection.
+
+    Raises ConnectionError when the server cannot be reached and
+    InferenceError when the model failed on the image.
+    """
+
+    def __init__(self, address, authkey=None, timeout=DEFAULT_CLIENT_TIMEOUT):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self._local = threading.local()
+        self._ids = itertools.count()
+
+    def infer(self, image_path):
+        kind, _, payload = self._call('infer', image_path)
+        if kind == 'error':
+            raise InferenceError(payload)
+        return payload
+
+    def stats(self):
+        return self._call('stats')[2]
+
+    def _call(self, kind, payload=None):
+        request_id = next(self._ids)
+        try:
+            connection = self._connection()
+            connection.send((kind, request_id, payload))
+            if not connection.poll(self.timeout):
+                raise TimeoutError(f'No answer from the inference server in {self.timeout}s')
+            reply = connection.recv()
+        except (OSError, EOFError, AuthenticationError) as exc:
+            # A late answer would be read by the next call, so start over
+            self._disconnect()
+            raise ConnectionError(f'Inference server at {self.address}: {exc}') from exc
+        if reply[1] != request_id:
+            self._disconnect()
+            raise ConnectionError(f'Inference server at {self.address} answered out of order')
+        return reply
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+        return connection
+
+    def _disconnect(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            connection.close()
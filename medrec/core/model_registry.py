@@ -0,0 +1,186 @@
+import logging
+import os
+import resource
+import tempfile
+import threading
+import time
+from importlib import import_module
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_VERSION = 'placeholder-1'
+
+# Seconds between checks of the pin file for a new version
+DEFAULT_PIN_CHECK_INTERVAL = 5
+
+WARMUP_IMAGE_SIZE = (224, 224)
+
+
+class PlaceholderModel:
+    """Test double for the detection model, used until AI_MODEL_LOADER
+    names a real one.
+
+    Every image is reported as MED001 with confidence 0.85 (plus two fixed
+    alternatives), so the upload, queue, batching and caching paths can run
+    end to end without model weights. A real loader takes a version,
+    loads its weights and returns an object with the same predict():
+    one result dict per image path, in order, for the whole batch at once.
+    """
+
+    def __init__(self, version):
+        self.version = version
+
+    def predict(self, image_paths):
+        return [
+            {
+                'medicine_code': 'MED001',
+                'confidence': 0.85,
+                'description': f'Placeholder detection for {os.path.basename(path)}',
+                'alternatives': [
+                    {'medicine_code': 'MED002', 'confidence': 0.65},
+                    {'medicine_code': 'MED003', 'confidence': 0.45}
+                ]
+            }
+            for path in image_paths
+        ]
+
+
+def load_placeholder_model(version):
+    """Default AI_MODEL_LOADER; returns the PlaceholderModel test double"""
+    return PlaceholderModel(version)
+
+
+def _resident_memory():
+    """Current resident memory of this process in bytes"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current usage, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _warmup(model):
+    """Run one synthetic image through model so the first real scan does
+    not pay for lazy initialisation; returns the seconds it took"""
+    from PIL import Image
+
+    started = time.perf_counter()
+    with tempfile.NamedTemporaryFile(suffix='.png') as image_file:
+        Image.new('RGB', WARMUP_IMAGE_SIZE, (128, 128, 128)).save(image_file, 'PNG')
+        image_file.flush()
+        model.predict([image_file.name])
+    return time.perf_counter() - started
+
+
+class LoadedModel:
+    def __init__(self, model, version, load_seconds, warmup_seconds, memory_bytes):
+        self.model = model
+        self.version = version
+        self.load_seconds = load_seconds
+        self.warmup_seconds = warmup_seconds
+        self.memory_bytes = memory_bytes
+        self.loaded_at = time.time()
+
+    def info(self):
+        return {
+            'model_version': self.version,
+            'load_seconds': round(self.load_seconds, 3),
+            'warmup_seconds': round(self.warmup_seconds, 3),
+            'memory_bytes': self.memory_bytes,
+            'loaded_at': round(self.loaded_at),
+            'pid': os.getpid(),
+        }
+
+
+class ModelRegistry:
+    """Loads the detection model once per process and swaps versions live.
+
+    The version comes from the AI_MODEL_PIN_FILE file when it exists (see
+    the pin_model_version command), else from AI_MODEL_VERSION. The pin
+    file is checked at most every AI_MODEL_PIN_CHECK_INTERVAL seconds; a
+    new version is loaded and warmed up while the old one keeps serving,
+    then replaces it. Loading before forking workers (preload) lets them
+    share the weights.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = None
+        self._pinned = None
+        self._checked_at = 0.0
+
+    def _setting(self, name, default):
+        from django.conf import settings
+
+        return getattr(settings, name, default)
+
+    def wanted_version(self):
+        """Version the pin file or settings ask for"""
+        pin_file = self._setting('AI_MODEL_PIN_FILE', '')
+        if pin_file:
+            try:
+                with open(pin_file) as pin:
+                    version = pin.read().strip()
+                if version:
+                    return version
+            except FileNotFoundError:
+                pass
+        return self._setting('AI_MODEL_VERSION', DEFAULT_MODEL_VERSION)
+
+    def load(self, version):
+        """Load, warm up and activate version; returns the LoadedModel"""
+        loader_path = self._setting('AI_MODEL_LOADER', 'core.model_registry.load_placeholder_model')
+        module_name, _, attribute = loader_path.rpartition('.')
+        loader = getattr(import_module(module_name), attribute)
+
+        memory_before = _resident_memory()
+        started = time.perf_counter()
+        model = loader(version)
+        load_seconds = time.perf_counter() - started
+        warmup_seconds = _warmup(model)
+        loaded = LoadedModel(model, version, load_seconds, warmup_seconds, _resident_memory() - memory_before)
+        self._active = loaded
+        logger.info('Loaded model %s', loaded.info())
+        return loaded
+
+    def get(self):
+        """The active LoadedModel, loading or swapping it when needed"""
+        active = self._active
+        now = time.monotonic()
+        interval = self._setting('AI_MODEL_PIN_CHECK_INTERVAL', DEFAULT_PIN_CHECK_INTERVAL)
+        if active is not None and now - self._checked_at < interval:
+            return active
+
+        # Only one thread loads; the others keep using the current model
+        if not self._lock.acquire(blocking=active is None):
+            return active
+        try:
+            self._checked_at = now
+            active = self._active
+            version = self.wanted_version()
+            if active is None or active.version != version:
+                try:
+                    active = self.load(version)
+                except Exception:
+                    if active is None:
+                        raise
+                    logger.exception('Could not load model %s, still serving %s', version, active.version)
+            return active
+        finally:
+            self._lock.release()
+
+    def info(self):
+        return self._active.info() if self._active is not None else None
+
+
+registry = ModelRegistry()
+
+
+def get_model():
+    return registry.get()
+
+
+def preload():
+    """Load the model now, e.g. in a parent process before it forks"""
+    return registry.get()
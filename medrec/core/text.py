@@ -0,0 +1,79 @@
+import re
+import unicodedata
+
+# Tashkeel (harakat, tanween, shadda, sukun, superscript alef) and tatweel
+_ARABIC_MARKS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+
+_ARABIC_FOLD = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ة': 'ه',
+    'ى': 'ي',
+    'ؤ': 'و',
+    'ئ': 'ي',
+    # Arabic-Indic and extended Arabic-Indic digits
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+    '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+})
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize_text(value: str) -> str:
+    """Fold Arabic and Latin text to a canonical form for matching.
+
+    Arabic: strips tashkeel and tatweel, unifies alef/hamza forms, ta marbuta
+    and alef maqsura. Latin: case-folds and removes accents.
+    """
+    if not value:
+        return ''
+    value = _ARABIC_MARKS.sub('', value)
+    value = value.translate(_ARABIC_FOLD)
+    value = unicodedata.normalize('NFKD', value.casefold())
+    return ''.join(ch for ch in value if not unicodedata.combining(ch))
+
+
+def normalize_label(value: str) -> str:
+    """normalize_text() with surrounding and repeated whitespace collapsed,
+    for exact lookups on short labels such as categories."""
+    return ' '.join(normalize_text(value).split())
+
+
+def tokenize(value: str) -> list:
+    """Split text into normalized word tokens, in order of appearance."""
+    return _TOKEN_RE.findall(normalize_text(value).replace('_', ' '))
+
+
+def trigrams(value: str) -> set:
+    """Character trigrams of each normalized word, padded like pg_trgm"""
+    grams = set()
+    for word in tokenize(value):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def edit_distance(a: str, b: str, max_distance: int = None) -> int:
+    """Levenshtein distance between a and b.
+
+    With max_distance, stops early and returns max_distance + 1 once the
+    distance is known to exceed it.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
@@ -119,3 +119,55 @@ SIMPLE_JWT = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
+
+# Seconds between checks of the catalog version by a worker's in-memory
+# autocomplete index; a change is rebuilt in the background
+AUTOCOMPLETE_CHECK_INTERVAL = 5
+
+# Seconds each process buffers medicine detail views before writing them
+# to the popularity counters. medicines/top/ is rebuilt only by
+# refresh_top_medicines, which should be scheduled (e.g. cron)
+POPULARITY_VIEW_FLUSH_INTERVAL = 10
+
+# Scans (uploads/new/) are queued and processed by run_scan_worker; set
+# SCAN_PROCESSING_ASYNC=0 to run inference inside the upload request
+SCAN_PROCESSING_ASYNC = os.environ.get('SCAN_PROCESSING_ASYNC', '1') == '1'
+
+# Seconds a worker may hold a scan before another worker takes it over;
+# keep it well above the slowest inference
+SCAN_VISIBILITY_TIMEOUT = 120
+
+# Attempts per scan before it is marked failed
+SCAN_MAX_ATTEMPTS = 3
+
+# Unix socket of run_inference_server. When set, infer() sends images to
+# that process, which batches concurrent scans; empty runs the model in
+# each process
+INFERENCE_SERVER_SOCKET = os.environ.get('INFERENCE_SERVER_SOCKET', '')
+
+# Largest batch the inference server runs, and the longest (milliseconds)
+# a request waits for its batch to fill
+INFERENCE_MAX_BATCH_SIZE = 8
+INFERENCE_MAX_WAIT_MS = 10
+
+# Detection model: AI_MODEL_LOADER(version) returns the model, see
+# core/model_registry.py. pin_model_version writes AI_MODEL_PIN_FILE,
+# which running processes check every AI_MODEL_PIN_CHECK_INTERVAL seconds
+# to swap to a new version without a restart. The default loader returns
+# a fixed-answer test double (PlaceholderModel)
+AI_MODEL_LOADER = 'core.model_registry.load_placeholder_model'
+AI_MODEL_VERSION = os.environ.get('AI_MODEL_VERSION', 'placeholder-1')
+AI_MODEL_PIN_FILE = os.environ.get('AI_MODEL_PIN_FILE', str(BASE_DIR / 'model_version.pin'))
+AI_MODEL_PIN_CHECK_INTERVAL = 5
+
+# Results kept for re-uploads of identical images (per model version);
+# the least recently used are evicted beyond this
+SCAN_CACHE_MAX_ENTRIES = 10000
+
+# A scan whose perceptual hash is at most this many bits (of 64) from a
+# scan finished in the last SCAN_NEAR_DUPLICATE_WINDOW seconds with at
+# least SCAN_NEAR_DUPLICATE_MIN_CONFIDENCE reuses its result. At most 11;
+# None disables the lookup
+SCAN_NEAR_DUPLICATE_DISTANCE = 4
+SCAN_NEAR_DUPLICATE_WINDOW = 10 * 60
+SCAN_NEAR_DUPLICATE_MIN_CONFIDENCE = 0.8